@@ -0,0 +1,100 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+from src.bot.api_client import MLBClient
+from src.bot.cache import ScheduleCache
+from src.bot.guild_settings import GuildSettings
+from src.bot.outbound import OutboundDispatcher
+from src.bot.schedule_index import ScheduleIndex
+
+_ids = itertools.count(1)
+
+
+@dataclass
+class FakeMessage:
+    """送信されたメッセージの記録"""
+    id: int
+    channel: "FakeChannel"
+    content: Optional[str]
+    sent_at: float
+    embed: Any = None
+
+    @property
+    def jump_url(self) -> str:
+        return f"https://discord.com/channels/0/{self.channel.id}/{self.id}"
+
+
+@dataclass
+class FakeGuild:
+    id: int
+    name: str = "bench-guild"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@dataclass
+class FakeAuthor:
+    id: int
+    name: str = "bench-user"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeChannel:
+    """Discordへの送信を模擬するチャンネル
+
+    send_latency 秒だけ待ってから送信内容を記録する (DiscordのREST呼び出しの代わり)。
+    """
+
+    def __init__(self, channel_id: int, send_latency: float = 0.0, guild: Optional[FakeGuild] = None):
+        self.id = channel_id
+        self.guild = guild
+        self.send_latency = send_latency
+        self.sent: List[FakeMessage] = []
+
+    def __str__(self) -> str:
+        return f"bench-channel-{self.id}"
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> FakeMessage:
+        if self.send_latency > 0:
+            await asyncio.sleep(self.send_latency)
+        message = FakeMessage(next(_ids), self, content, time.perf_counter(), kwargs.get("embed"))
+        self.sent.append(message)
+        return message
+
+
+class FakeContext:
+    """commands.Context の代わりにコマンドのコールバックへ渡すコンテキスト"""
+
+    def __init__(self, channel: FakeChannel, author: Optional[FakeAuthor] = None):
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author or FakeAuthor(next(_ids))
+        self.message = FakeMessage(next(_ids), channel, "!dodgers", time.perf_counter())
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> FakeMessage:
+        return await self.channel.send(content, **kwargs)
+
+
+@dataclass
+class FakeBot:
+    """Cogが参照する DodgersBot の属性だけを持つ代役"""
+    mlb_client: MLBClient
+    schedule_cache: ScheduleCache
+    schedule_index: ScheduleIndex = field(default_factory=ScheduleIndex)
+    guild_settings: GuildSettings = field(default_factory=GuildSettings)
+    outbound: OutboundDispatcher = field(default_factory=OutboundDispatcher)
+
+    def is_ready(self) -> bool:
+        return True
+
+    @classmethod
+    def create(cls, mlb_client: MLBClient, **cache_kwargs: Any) -> "FakeBot":
+        return cls(
+            mlb_client=mlb_client,
+            schedule_cache=ScheduleCache(mlb_client.fetch_league_schedule, **cache_kwargs),
+        )
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import discord
+import yarl
+from aiohttp import WSMsgType, web
+
+BOT_USER = {"id": "1000", "username": "fake-dodgers-bot", "discriminator": "0", "avatar": None, "bot": True}
+APPLICATION = {"id": "1000", "flags": 0}
+
+
+def guild_id(index: int) -> int:
+    """index 番目のギルドID (タイムスタンプ部分が index+1 のスノーフレーク)"""
+    return (index + 1) << 22
+
+
+def shard_for(gid: int, shard_count: int) -> int:
+    """ギルドを担当するシャード (Discordと同じ計算式)"""
+    return (gid >> 22) % shard_count
+
+
+@dataclass
+class FakeGatewayStats:
+    """偽ゲートウェイが受けた接続・IDENTIFY の記録"""
+    identifies: List[Tuple[int, float]] = field(default_factory=list)
+    heartbeats: int = 0
+    rest_requests: Dict[str, int] = field(default_factory=dict)
+
+
+class FakeGateway:
+    """ネットワークなしでシャーディングを試すための Discord の代役
+
+    REST の /users/@me・/gateway/bot・/users/{id} と、ゲートウェイ (WebSocket) の
+    HELLO → IDENTIFY → READY → GUILD_CREATE・HEARTBEAT → HEARTBEAT_ACK だけを実装する。
+    ギルドはシャードの計算式 ((guild_id >> 22) % shard_count) どおりに各シャードへ配られる。
+    """
+
+    def __init__(self, *, guilds: int = 100, shards: int = 4, max_concurrency: int = 16,
+                 heartbeat_interval_ms: int = 1000, host: str = "127.0.0.1", port: int = 0):
+        self.guilds = guilds
+        self.shards = shards
+        self.max_concurrency = max_concurrency
+        self.heartbeat_interval_ms = heartbeat_interval_ms
+        self.host = host
+        self.port = port
+        self.stats = FakeGatewayStats()
+        self._runner: Optional[web.AppRunner] = None
+        self._sockets: List[web.WebSocketResponse] = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.base_url}/api/v10"
+
+    @property
+    def gateway_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/gateway"
+
+    def expected_guilds(self, shard_id: int, shard_count: Optional[int] = None) -> int:
+        count = shard_count or self.shards
+        return sum(1 for i in range(self.guilds) if shard_for(guild_id(i), count) == shard_id)
+
+    @contextmanager
+    def patched(self) -> Iterator[None]:
+        """discord.py の REST・ゲートウェイの接続先をこの偽サーバーに向ける"""
+        old_base = discord.http.Route.BASE
+        old_gateway = discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY
+        discord.http.Route.BASE = self.api_base
+        discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(self.gateway_url)
+        try:
+            yield
+        finally:
+            discord.http.Route.BASE = old_base
+            discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = old_gateway
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/api/v10/users/@me", self._me)
+        app.router.add_get("/api/v10/users/{user_id}", self._user)
+        app.router.add_get("/api/v10/oauth2/applications/@me", self._application)
+        app.router.add_get("/api/v10/gateway/bot", self._gateway_bot)
+        app.router.add_get("/gateway", self._websocket)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+
+    async def close(self) -> None:
+        for ws in list(self._sockets):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeGateway":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    # --- REST ---
+
+    def _count(self, name: str) -> None:
+        self.stats.rest_requests[name] = self.stats.rest_requests.get(name, 0) + 1
+
+    async def _me(self, request: web.Request) -> web.Response:
+        self._count("users/@me")
+        return _json_response(BOT_USER)
+
+    async def _user(self, request: web.Request) -> web.Response:
+        self._count("users/{id}")
+        return _json_response({**BOT_USER, "id": request.match_info["user_id"]})
+
+    async def _application(self, request: web.Request) -> web.Response:
+        self._count("oauth2/applications/@me")
+        return _json_response({
+            **APPLICATION, "name": BOT_USER["username"], "description": "", "icon": None,
+            "bot_public": False, "bot_require_code_grant": False, "owner": BOT_USER, "verify_key": "",
+        })
+
+    async def _gateway_bot(self, request: web.Request) -> web.Response:
+        self._count("gateway/bot")
+        return _json_response({
+            "url": self.gateway_url,
+            "shards": self.shards,
+            "session_start_limit": {
+                "total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": self.max_concurrency,
+            },
+        })
+
+    # --- ゲートウェイ ---
+
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.append(ws)
+        sequence = 0
+
+        async def dispatch(event: str, data: Dict[str, Any]) -> None:
+            nonlocal sequence
+            sequence += 1
+            await ws.send_str(json.dumps({"op": 0, "t": event, "s": sequence, "d": data}))
+
+        await ws.send_str(json.dumps({"op": 10, "d": {"heartbeat_interval": self.heartbeat_interval_ms}}))
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                payload = json.loads(message.data)
+                op = payload.get("op")
+                if op == 1:
+                    self.stats.heartbeats += 1
+                    await ws.send_str(json.dumps({"op": 11}))
+                elif op == 2:
+                    shard_id, shard_count = payload["d"].get("shard", [0, 1])
+                    self.stats.identifies.append((shard_id, time.perf_counter()))
+                    ids = [guild_id(i) for i in range(self.guilds) if shard_for(guild_id(i), shard_count) == shard_id]
+                    await dispatch("READY", {
+                        "v": 10,
+                        "user": BOT_USER,
+                        "application": APPLICATION,
+                        "guilds": [{"id": str(gid), "unavailable": True} for gid in ids],
+                        "session_id": f"session-{shard_id}",
+                        "resume_gateway_url": self.gateway_url,
+                        "shard": [shard_id, shard_count],
+                    })
+                    for gid in ids:
+                        await dispatch("GUILD_CREATE", _guild_payload(gid))
+        finally:
+            self._sockets.remove(ws)
+        return ws
+
+
+def _json_response(data: Any) -> web.Response:
+    # discord.py は Content-Type が application/json ちょうどの場合だけJSONとして解釈する
+    return web.Response(body=json.dumps(data).encode(), content_type="application/json")
+
+
+def _guild_payload(gid: int) -> Dict[str, Any]:
+    return {
+        "id": str(gid),
+        "name": f"fake-guild-{gid >> 22}",
+        "owner_id": BOT_USER["id"],
+        "unavailable": False,
+        "member_count": 1,
+        "large": False,
+        "features": [],
+        "roles": [],
+        "emojis": [],
+        "stickers": [],
+        "channels": [],
+        "threads": [],
+        "members": [],
+        "presences": [],
+        "voice_states": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+    }
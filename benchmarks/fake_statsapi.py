@@ -0,0 +1,178 @@
+import asyncio
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+from aiohttp import web
+
+# ドジャースを含む15試合分の対戦カード (ホームID, ホーム名, アウェイID, アウェイ名)
+MATCHUPS = [
+    (119, "Los Angeles Dodgers", 137, "San Francisco Giants"),
+    (147, "New York Yankees", 111, "Boston Red Sox"),
+    (121, "New York Mets", 143, "Philadelphia Phillies"),
+    (112, "Chicago Cubs", 138, "St. Louis Cardinals"),
+    (117, "Houston Astros", 140, "Texas Rangers"),
+    (144, "Atlanta Braves", 146, "Miami Marlins"),
+    (135, "San Diego Padres", 109, "Arizona Diamondbacks"),
+    (136, "Seattle Mariners", 108, "Los Angeles Angels"),
+    (110, "Baltimore Orioles", 139, "Tampa Bay Rays"),
+    (141, "Toronto Blue Jays", 142, "Minnesota Twins"),
+    (114, "Cleveland Guardians", 116, "Detroit Tigers"),
+    (118, "Kansas City Royals", 145, "Chicago White Sox"),
+    (113, "Cincinnati Reds", 134, "Pittsburgh Pirates"),
+    (158, "Milwaukee Brewers", 115, "Colorado Rockies"),
+    (120, "Washington Nationals", 133, "Athletics"),
+]
+
+
+@dataclass
+class FakeStatsAPIConfig:
+    """偽 statsapi サーバーの挙動設定"""
+    latency: float = 0.05          # 1リクエストあたりの基本遅延 (秒)
+    jitter: float = 0.01           # 遅延に加える一様乱数の幅 (秒)
+    failure_rate: float = 0.0      # 503を返す確率
+    status: str = "In Progress"    # 生成する試合の detailedState
+    seed: Optional[int] = 0
+
+
+@dataclass
+class FakeStatsAPIStats:
+    """偽サーバーが受けたリクエスト数"""
+    requests: int = 0
+    failures: int = 0
+    by_path: Dict[str, int] = field(default_factory=dict)
+
+
+class FakeStatsAPI:
+    """ネットワークなしでベンチマークするための statsapi.mlb.com の代役
+
+    schedule (1日分・期間指定) とライブフィード (feed/live, timestamps, diffPatch) に応答し、
+    設定した遅延と失敗率を注入する。
+    """
+
+    def __init__(self, config: Optional[FakeStatsAPIConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeStatsAPIConfig()
+        self.host = host
+        self.port = port
+        self.stats = FakeStatsAPIStats()
+        self._random = random.Random(self.config.seed)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def client_kwargs(self) -> Dict[str, str]:
+        """この偽サーバーを向く MLBClient のエンドポイント引数を返す"""
+        return {
+            "endpoint": f"{self.base_url}/api/v1/schedule?sportId=1&date={{date}}",
+            "range_endpoint": f"{self.base_url}/api/v1/schedule?sportId=1&startDate={{start}}&endDate={{end}}",
+            "live_feed_endpoint": f"{self.base_url}/api/v1.1/game/{{game_pk}}/feed/live",
+        }
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/api/v1/schedule", self._schedule)
+        app.router.add_get("/api/v1.1/game/{game_pk}/feed/live", self._live_feed)
+        app.router.add_get("/api/v1.1/game/{game_pk}/feed/live/timestamps", self._timestamps)
+        app.router.add_get("/api/v1.1/game/{game_pk}/feed/live/diffPatch", self._diff_patch)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # port=0 の場合は割り当てられたポートを取得する
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeStatsAPI":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    async def _simulate(self, request: web.Request) -> Optional[web.Response]:
+        """遅延と失敗を注入する (失敗させる場合はレスポンスを返す)"""
+        self.stats.requests += 1
+        path = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.stats.by_path[path] = self.stats.by_path.get(path, 0) + 1
+        delay = self.config.latency + self._random.uniform(0, self.config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.config.failure_rate:
+            self.stats.failures += 1
+            return web.Response(status=503, text="injected failure")
+        return None
+
+    def _games_for(self, day: str) -> List[Dict[str, Any]]:
+        number = int(day.replace("-", "")) % 100000
+        games = []
+        for i, (home_id, home, away_id, away) in enumerate(MATCHUPS):
+            game: Dict[str, Any] = {
+                "gamePk": number * 100 + i,
+                "gameNumber": 1,
+                "gameType": "R",
+                "gameDate": f"{day}T02:10:00Z",
+                "status": {"detailedState": self.config.status},
+                "teams": {
+                    "home": {"team": {"id": home_id, "name": home}},
+                    "away": {"team": {"id": away_id, "name": away}},
+                },
+                "venue": {"name": f"{home} Stadium"},
+            }
+            if self.config.status not in ("Scheduled", "Preview", "Pre-Game", "Warmup"):
+                game["teams"]["home"]["score"] = 3
+                game["teams"]["away"]["score"] = 2
+            if self.config.status in ("Final", "Game Over", "Completed Early"):
+                game["teams"]["home"]["isWinner"] = True
+                game["teams"]["away"]["isWinner"] = False
+            games.append(game)
+        return games
+
+    async def _schedule(self, request: web.Request) -> web.Response:
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        if "date" in request.query:
+            days = [request.query["date"]]
+        else:
+            start = date.fromisoformat(request.query["startDate"])
+            end = date.fromisoformat(request.query["endDate"])
+            days = [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+        return web.json_response({
+            "dates": [{"date": day, "games": self._games_for(day)} for day in days],
+        })
+
+    async def _live_feed(self, request: web.Request) -> web.Response:
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        return web.json_response({
+            "metaData": {"timeStamp": "20240701_021000"},
+            "gameData": {
+                "status": {"detailedState": self.config.status},
+                "datetime": {"officialDate": "2024-07-01", "dateTime": "2024-07-01T02:10:00Z"},
+                "teams": {"home": {"name": MATCHUPS[0][1]}, "away": {"name": MATCHUPS[0][3]}},
+                "venue": {"name": f"{MATCHUPS[0][1]} Stadium"},
+            },
+            "liveData": {"linescore": {
+                "currentInning": 5, "inningHalf": "Top",
+                "teams": {"home": {"runs": 3}, "away": {"runs": 2}},
+            }},
+        })
+
+    async def _timestamps(self, request: web.Request) -> web.Response:
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        return web.json_response(["20240701_021000"])
+
+    async def _diff_patch(self, request: web.Request) -> web.Response:
+        failure = await self._simulate(request)
+        if failure is not None:
+            return failure
+        return web.json_response([])
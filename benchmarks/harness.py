@@ -0,0 +1,485 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from src.bot.api_client import GameInfo, MLBClient
+from .fake_discord import FakeBot, FakeChannel, FakeContext, FakeGuild
+from .fake_statsapi import FakeStatsAPI, FakeStatsAPIConfig
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# 小さすぎる値の揺らぎで回帰と判定しないための許容量 (ミリ秒)
+ABSOLUTE_SLACK_MS = 2.0
+# --tolerance より緩く比べる指標 (悪化の割合の下限)
+# loop lag の p99 は GC やボットの起動処理の1〜2回分で決まり、同じ環境・同じコードでも実行ごとに2〜3倍動くため、
+# イベントループを長く止めるような大きな悪化だけを検出する
+METRIC_TOLERANCE: Dict[str, float] = {"loop_lag_p99_ms": 2.0}
+# 時間に比例する指標 (環境の速さの違いを calibration_ms の比で打ち消す)
+TIME_METRICS = ("p50_ms", "p95_ms", "p99_ms", "loop_lag_p99_ms", "throughput")
+
+# 値が小さいほど良い指標 / 大きいほど良い指標
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "upstream_calls_per_command", "loop_lag_p99_ms")
+HIGHER_IS_BETTER = ("throughput",)
+
+
+def _calibration_workload() -> None:
+    data = {"games": [{"id": i, "name": f"team{i}", "score": [i, i * 2]} for i in range(200)]}
+    for _ in range(20):
+        json.loads(json.dumps(data))
+        sorted(str(i) for i in range(2000))
+
+
+def calibrate(rounds: int = 9) -> float:
+    """この環境の速さの目安 (ミリ秒, 小さいほど速い)
+
+    ボットのコードを含まない固定の処理 (JSON の変換とソート) の所要時間の最小値を返す。
+    ベースラインと比べるときに、マシンの違いや同居する処理による速さの違いを打ち消すのに使う。
+    """
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        _calibration_workload()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """ソート済みの値から p パーセンタイル (0-100) を線形補間で求める"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+class LoopLagMonitor:
+    """イベントループの遅延 (予定より何秒遅れてスリープから戻ったか) を計測する"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+@dataclass
+class BenchmarkResult:
+    """1シナリオ分の計測結果"""
+    name: str
+    samples: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    throughput: float
+    upstream_calls_per_command: Optional[float] = None
+    loop_lag_p99_ms: Optional[float] = None
+    loop_lag_max_ms: Optional[float] = None
+    errors: int = 0
+    params: Dict[str, Any] = field(default_factory=dict)
+    # 計測直前の calibrate() の値 (ベースラインとの比較で環境の速さの違いを打ち消す)
+    calibration_ms: Optional[float] = None
+
+    @classmethod
+    def from_latencies(cls, name: str, latencies: List[float], elapsed: float, **kwargs: Any) -> "BenchmarkResult":
+        values = sorted(latencies)
+        return cls(
+            name=name,
+            samples=len(values),
+            p50_ms=percentile(values, 50) * 1000,
+            p95_ms=percentile(values, 95) * 1000,
+            p99_ms=percentile(values, 99) * 1000,
+            throughput=len(values) / elapsed if elapsed > 0 else 0.0,
+            **kwargs,
+        )
+
+    @classmethod
+    def median_of(cls, results: List["BenchmarkResult"]) -> "BenchmarkResult":
+        """同じシナリオを複数回実行した結果から、指標ごとの中央値を取った結果を作る"""
+        merged = asdict(results[0])
+        for key in (*LOWER_IS_BETTER, *HIGHER_IS_BETTER, "loop_lag_max_ms", "errors"):
+            values = [getattr(result, key) for result in results if getattr(result, key) is not None]
+            if values:
+                merged[key] = statistics.median(values)
+        # 環境の速さは一時的な負荷の影響を受けにくい最小値を使う
+        calibrations = [result.calibration_ms for result in results if result.calibration_ms is not None]
+        merged["calibration_ms"] = min(calibrations) if calibrations else None
+        merged["errors"] = int(merged["errors"])
+        merged["params"] = {**merged["params"], "repeat": len(results)}
+        return cls(**merged)
+
+    def format(self) -> str:
+        lines = [
+            f"[{self.name}] samples={self.samples} errors={self.errors}",
+            f"  latency  p50={self.p50_ms:.2f}ms p95={self.p95_ms:.2f}ms p99={self.p99_ms:.2f}ms",
+            f"  throughput={self.throughput:.1f}/s",
+        ]
+        if self.upstream_calls_per_command is not None:
+            lines.append(f"  upstream calls/command={self.upstream_calls_per_command:.4f}")
+        if self.loop_lag_p99_ms is not None:
+            lines.append(f"  loop lag p99={self.loop_lag_p99_ms:.2f}ms max={self.loop_lag_max_ms:.2f}ms")
+        if self.calibration_ms is not None:
+            lines.append(f"  calibration={self.calibration_ms:.2f}ms")
+        return "\n".join(lines)
+
+
+# --- シナリオ ---
+
+async def bench_dodgers_command(
+    *,
+    name: str = "dodgers_command",
+    invocations: int = 2000,
+    concurrency: int = 500,
+    channels: int = 50,
+    upstream_latency: float = 0.05,
+    failure_rate: float = 0.0,
+    send_latency: float = 0.005,
+    cached: bool = True,
+) -> BenchmarkResult:
+    """偽 statsapi と偽コンテキストで DodgersCommandsCog.dodgers_game を大量に同時実行する"""
+    from src.bot.cogs.dodgers import DodgersCommandsCog
+
+    params = {k: v for k, v in locals().items() if k != "DodgersCommandsCog"}
+    config = FakeStatsAPIConfig(latency=upstream_latency, failure_rate=failure_rate)
+    async with FakeStatsAPI(config) as server:
+        async with MLBClient(**server.client_kwargs(), backoff_base=0.01) as client:
+            cache_kwargs = {} if cached else {"live_ttl": 0.0, "max_stale": 0.0}
+            bot = FakeBot.create(client, **cache_kwargs)
+            cog = DodgersCommandsCog(bot)
+            guild = FakeGuild(1)
+            fake_channels = [FakeChannel(i, send_latency, guild) for i in range(channels)]
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies: List[float] = []
+
+            async def invoke(i: int) -> None:
+                ctx = FakeContext(fake_channels[i % channels])
+                async with semaphore:
+                    start = time.perf_counter()
+                    await cog.dodgers_game.callback(cog, ctx)
+                    latencies.append(time.perf_counter() - start)
+
+            monitor = LoopLagMonitor()
+            monitor.start()
+            started = time.perf_counter()
+            await asyncio.gather(*(invoke(i) for i in range(invocations)))
+            elapsed = time.perf_counter() - started
+            await monitor.stop()
+
+    errors = sum(
+        1 for channel in fake_channels for message in channel.sent
+        if message.content and "エラー" in message.content
+    )
+    lag = sorted(monitor.samples)
+    return BenchmarkResult.from_latencies(
+        name, latencies, elapsed,
+        upstream_calls_per_command=server.stats.requests / invocations,
+        loop_lag_p99_ms=percentile(lag, 99) * 1000,
+        loop_lag_max_ms=(lag[-1] if lag else 0.0) * 1000,
+        errors=errors,
+        params=params,
+    )
+
+
+def bench_format_game_info(*, iterations: int = 50000, batch: int = 100) -> BenchmarkResult:
+    """format_game_info の1回あたりの所要時間を計測する"""
+    from src.bot.utils import format_game_info
+
+    game = GameInfo(
+        date="2024-07-01", status="In Progress",
+        home_team="Los Angeles Dodgers", away_team="San Francisco Giants",
+        venue="Dodger Stadium", game_time_utc="2024-07-01T02:10:00Z",
+        home_score="3", away_score="2", game_pk=745000,
+    )
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(iterations // batch):
+        t = time.perf_counter()
+        for _ in range(batch):
+            format_game_info(game)
+        latencies.append((time.perf_counter() - t) / batch)
+    elapsed = time.perf_counter() - started
+    result = BenchmarkResult.from_latencies("format_game_info", latencies, elapsed,
+                                            params={"iterations": iterations, "batch": batch})
+    result.samples = iterations
+    result.throughput = iterations / elapsed
+    return result
+
+
+def bench_season_stats(*, season_days: int = 162, iterations: int = 20000, batch: int = 100) -> BenchmarkResult:
+    """ResultsStore にリーグ1シーズン分の結果を入れ、1チームのシーズン成績の集計にかかる時間を計測する"""
+    import random
+    from datetime import date, timedelta
+    from src.bot.results import ResultsStore
+    from src.bot.teams import DEFAULT_TEAM_ID, TEAMS_BY_ID
+
+    rng = random.Random(0)
+    team_ids = sorted(TEAMS_BY_ID)
+    opening = date(2024, 3, 28)
+    store = ResultsStore()
+    append_started = time.perf_counter()
+    # 1日15試合 (全30チームが1試合ずつ) を日付順に追加する
+    for day in range(season_days):
+        rng.shuffle(team_ids)
+        for i in range(0, len(team_ids), 2):
+            home_score, away_score = rng.randint(0, 9), rng.randint(0, 9)
+            if home_score == away_score:
+                home_score += 1
+            store.add(GameInfo(
+                date=(opening + timedelta(days=day)).isoformat(), status="Final",
+                home_team="home", away_team="away", venue="venue", game_time_utc="",
+                home_score=str(home_score), away_score=str(away_score),
+                game_pk=day * 100 + i, home_team_id=team_ids[i], away_team_id=team_ids[i + 1], game_type="R",
+            ))
+    append_elapsed = time.perf_counter() - append_started
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(iterations // batch):
+        t = time.perf_counter()
+        for _ in range(batch):
+            store.summary(DEFAULT_TEAM_ID)
+        latencies.append((time.perf_counter() - t) / batch)
+    elapsed = time.perf_counter() - started
+    result = BenchmarkResult.from_latencies(
+        "season_stats", latencies, elapsed,
+        params={"games": len(store), "iterations": iterations, "batch": batch,
+                "append_us_per_game": round(append_elapsed / len(store) * 1e6, 2)},
+    )
+    result.samples = iterations
+    result.throughput = iterations / elapsed
+    return result
+
+
+async def bench_health_check(*, requests: int = 20000, concurrency: int = 200) -> BenchmarkResult:
+    """FastAPIの health_check ハンドラを同時に呼び出す"""
+    os.environ.setdefault("DISCORD_BOT_TOKEN", "benchmark-token")
+    from src import server
+
+    async with MLBClient() as client:
+        server.bot_client = FakeBot.create(client)
+        try:
+            semaphore = asyncio.Semaphore(concurrency)
+            latencies: List[float] = []
+
+            async def invoke() -> None:
+                async with semaphore:
+                    start = time.perf_counter()
+                    await server.health_check()
+                    latencies.append(time.perf_counter() - start)
+
+            monitor = LoopLagMonitor()
+            monitor.start()
+            started = time.perf_counter()
+            await asyncio.gather(*(invoke() for _ in range(requests)))
+            elapsed = time.perf_counter() - started
+            await monitor.stop()
+        finally:
+            server.bot_client = None
+
+    lag = sorted(monitor.samples)
+    return BenchmarkResult.from_latencies(
+        "health_check", latencies, elapsed,
+        loop_lag_p99_ms=percentile(lag, 99) * 1000,
+        loop_lag_max_ms=(lag[-1] if lag else 0.0) * 1000,
+        params={"requests": requests, "concurrency": concurrency},
+    )
+
+
+async def bench_outbound_priority(
+    *,
+    channels: int = 20,
+    broadcasts_per_channel: int = 3,
+    send_latency: float = 0.005,
+) -> BenchmarkResult:
+    """一斉配信でキューが埋まっているときのコマンド返信の待ち時間を計測する
+
+    全チャンネルに一斉配信を積んだ直後に各チャンネルへ返信を1件ずつ送り、
+    返信が配信より先に送られる (優先度付きキュー) ことを確認する。
+    """
+    from src.bot.outbound import PRIORITY_BROADCAST, OutboundDispatcher
+
+    params = {k: v for k, v in locals().items() if k not in ("PRIORITY_BROADCAST", "OutboundDispatcher")}
+    dispatcher = OutboundDispatcher()
+    fake_channels = [FakeChannel(i, send_latency) for i in range(channels)]
+    latencies: List[float] = []
+
+    async def reply(channel: FakeChannel) -> None:
+        start = time.perf_counter()
+        await dispatcher.send(channel.id, channel.send, "reply")
+        latencies.append(time.perf_counter() - start)
+
+    monitor = LoopLagMonitor()
+    monitor.start()
+    started = time.perf_counter()
+    broadcasts = [
+        dispatcher.send(channel.id, channel.send, "broadcast", priority=PRIORITY_BROADCAST, kind="broadcast")
+        for channel in fake_channels for _ in range(broadcasts_per_channel)
+    ]
+    await asyncio.gather(*broadcasts, *(reply(channel) for channel in fake_channels))
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+    await dispatcher.close()
+
+    # 返信より後に送られた一斉配信があればエラーとして数える
+    errors = sum(
+        1 for channel in fake_channels
+        if [m.content for m in channel.sent].index("reply") > 1
+    )
+    lag = sorted(monitor.samples)
+    return BenchmarkResult.from_latencies(
+        "outbound_priority", latencies, elapsed,
+        loop_lag_p99_ms=percentile(lag, 99) * 1000,
+        loop_lag_max_ms=(lag[-1] if lag else 0.0) * 1000,
+        errors=errors,
+        params=params,
+    )
+
+
+async def bench_sharded_ready(
+    *,
+    shards: int = 4,
+    guilds: int = 200,
+    max_concurrency: int = 16,
+) -> BenchmarkResult:
+    """偽ゲートウェイに対して AutoShardedBot を起動し、各シャードが READY になるまでの時間を計測する
+
+    全シャードの受け取ったギルド数がゲートウェイ側の期待値と一致しなければエラーとして数える。
+    """
+    from src.bot.core import DodgersBot, default_intents
+    from .fake_gateway import FakeGateway
+
+    params = {k: v for k, v in locals().items() if k not in ("DodgersBot", "default_intents", "FakeGateway")}
+    latencies: List[float] = []
+    async with FakeGateway(guilds=guilds, shards=shards, max_concurrency=max_concurrency) as gateway, \
+            FakeStatsAPI() as api:
+        with gateway.patched():
+            bot = DodgersBot(
+                intents=default_intents(message_content=False),
+                mlb_client=MLBClient(**api.client_kwargs()),
+                shard_count=shards,
+                identify_concurrency=max_concurrency,
+            )
+            started = time.perf_counter()
+
+            async def on_shard_ready(shard_id: int) -> None:
+                latencies.append(time.perf_counter() - started)
+
+            bot.add_listener(on_shard_ready)
+            monitor = LoopLagMonitor()
+            monitor.start()
+            async with bot:
+                await bot.login("fake-token")
+                connect = asyncio.create_task(bot.connect())
+                await asyncio.wait_for(bot.wait_until_ready(), timeout=60)
+                elapsed = time.perf_counter() - started
+                stats = bot.shard_stats()
+            await asyncio.gather(connect, return_exceptions=True)
+            await monitor.stop()
+
+    errors = sum(1 for shard in stats if shard["guilds"] != gateway.expected_guilds(shard["shard_id"]))
+    errors += shards - len(latencies)
+    lag = sorted(monitor.samples)
+    return BenchmarkResult.from_latencies(
+        "sharded_ready", latencies, elapsed,
+        loop_lag_p99_ms=percentile(lag, 99) * 1000,
+        loop_lag_max_ms=(lag[-1] if lag else 0.0) * 1000,
+        errors=errors,
+        params=params,
+    )
+
+
+SCENARIOS: Dict[str, Callable[[], Awaitable[BenchmarkResult]]] = {
+    "dodgers_command": lambda: bench_dodgers_command(),
+    "dodgers_command_uncached": lambda: bench_dodgers_command(name="dodgers_command_uncached", cached=False),
+    "dodgers_command_faulty": lambda: bench_dodgers_command(name="dodgers_command_faulty", failure_rate=0.2, cached=False),
+    "format_game_info": lambda: asyncio.to_thread(bench_format_game_info),
+    "health_check": lambda: bench_health_check(),
+    "season_stats": lambda: asyncio.to_thread(bench_season_stats),
+    "outbound_priority": lambda: bench_outbound_priority(),
+    "sharded_ready": lambda: bench_sharded_ready(),
+}
+
+
+# --- ベースライン ---
+
+def baseline_path(name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(result: BenchmarkResult) -> str:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = baseline_path(result.name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(asdict(result), f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return path
+
+
+def load_baseline(name: str) -> Optional[Dict[str, Any]]:
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def calibration_scale(result: BenchmarkResult, baseline: Dict[str, Any]) -> float:
+    """ベースラインを保存した環境に対して、今の環境が何倍遅いか
+
+    calibrate() 自体も2〜3割揺らぐため、速い環境に合わせて基準を厳しくすることはしない (1未満は1にする)。
+    どちらかに calibration_ms がなければ1。
+    """
+    old, new = baseline.get("calibration_ms"), result.calibration_ms
+    if not old or not new:
+        return 1.0
+    return max(1.0, new / old)
+
+
+def compare_to_baseline(result: BenchmarkResult, baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """ベースラインと比べて tolerance (割合) を超えて悪化した指標を返す
+
+    時間に比例する指標は、ベースラインの値を環境の速さの比 (calibration_scale) で補正してから比べる。
+    """
+    regressions = []
+    current = asdict(result)
+    scale = calibration_scale(result, baseline)
+    for key in LOWER_IS_BETTER:
+        old, new = baseline.get(key), current.get(key)
+        if old is None or new is None:
+            continue
+        expected = old * scale if key in TIME_METRICS else old
+        allowed = max(tolerance, METRIC_TOLERANCE.get(key, 0.0))
+        slack = ABSOLUTE_SLACK_MS if key.endswith("_ms") else 0.0
+        if new > expected * (1 + allowed) + slack:
+            regressions.append(f"{result.name}.{key}: {expected:.4f} -> {new:.4f}")
+    for key in HIGHER_IS_BETTER:
+        old, new = baseline.get(key), current.get(key)
+        if old is None or new is None:
+            continue
+        expected = old / scale if key in TIME_METRICS else old
+        allowed = max(tolerance, METRIC_TOLERANCE.get(key, 0.0))
+        if new < expected * (1 - allowed):
+            regressions.append(f"{result.name}.{key}: {expected:.1f} -> {new:.1f}")
+    if result.errors > baseline.get("errors", 0) * (1 + tolerance):
+        regressions.append(f"{result.name}.errors: {baseline.get('errors', 0)} -> {result.errors}")
+    return regressions
@@ -0,0 +1,67 @@
+"""ベンチマークの実行エントリーポイント
+
+使い方:
+    python -m benchmarks.run                      # 全シナリオを3回ずつ実行し、中央値をベースラインと比較
+    python -m benchmarks.run dodgers_command      # 指定したシナリオだけ実行
+    python -m benchmarks.run --save-baseline      # 結果をベースラインとして保存
+    python -m benchmarks.run --save-baseline --repeat 5  # 5回の中央値をベースラインとして保存 (推奨)
+"""
+import argparse
+import asyncio
+import logging
+import random
+import sys
+from typing import List
+from .harness import (
+    SCENARIOS, BenchmarkResult, calibrate, calibration_scale, compare_to_baseline, load_baseline, save_baseline,
+)
+
+
+async def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Dodgers Discord Bot のベンチマーク")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"実行するシナリオ (省略時は全て): {', '.join(SCENARIOS)}")
+    parser.add_argument("--save-baseline", action="store_true", help="結果をベースラインとして保存する")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="回帰と判定する悪化の割合 (既定 0.25)")
+    parser.add_argument("--repeat", type=int, default=3, help="各シナリオの実行回数 (指標ごとの中央値を使う, 既定 3)")
+    parser.add_argument("--seed", type=int, default=0, help="各シナリオの前に設定する乱数シード (既定 0)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"不明なシナリオ: {', '.join(unknown)} (選択肢: {', '.join(SCENARIOS)})")
+    if args.repeat < 1:
+        parser.error("--repeat は1以上を指定してください")
+
+    # 計測中のログ出力がI/Oとして結果に混ざらないようにする
+    logging.basicConfig(level=logging.ERROR)
+
+    regressions: List[str] = []
+    for name in args.scenarios or list(SCENARIOS):
+        runs = []
+        for _ in range(args.repeat):
+            # 環境の速さは実行の直前に測る (同居する処理の負荷は時間とともに変わるため)
+            calibration = calibrate()
+            # リトライの待ち時間のゆらぎ (MLBClient) などが実行ごとに変わらないようにする
+            random.seed(args.seed)
+            run = await SCENARIOS[name]()
+            run.calibration_ms = calibration
+            runs.append(run)
+        result = runs[0] if len(runs) == 1 else BenchmarkResult.median_of(runs)
+        print(result.format())
+        if args.save_baseline:
+            print(f"  ベースラインを保存しました: {save_baseline(result)}")
+            continue
+        baseline = load_baseline(name)
+        if baseline is None:
+            print("  (ベースラインなし)")
+            continue
+        found = compare_to_baseline(result, baseline, args.tolerance)
+        print(f"  環境の速さの補正: x{calibration_scale(result, baseline):.2f}")
+        print("  回帰: " + ", ".join(found) if found else "  ベースライン比: OK")
+        regressions.extend(found)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
@@ -1,7 +1,18 @@
-import requests
-from typing import Dict, Optional
-from datetime import date
-from dataclasses import dataclass
+import asyncio
+import json
+import logging
+import random
+import aiohttp
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Union
+from datetime import date, datetime, timezone
+from dataclasses import dataclass, field
+from .teams import DEFAULT_TEAM_ID
+from ..metrics import MLB_API_REQUEST_DURATION, MLB_API_REQUESTS
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class GameInfo:
@@ -14,41 +25,348 @@ class GameInfo:
     game_time_utc: str
     home_score: Optional[str] = None
     away_score: Optional[str] = None
+    game_pk: Optional[int] = None
+    game_number: int = 1
+    home_team_id: Optional[int] = None
+    away_team_id: Optional[int] = None
+    # 試合の結果 (勝ったチームのID, 終了していない・引き分けの場合はNone)
+    winner_team_id: Optional[int] = None
+    # 試合の種別 (gameType。"R" がレギュラーシーズン、"S" がオープン戦、"F"/"D"/"L"/"W" がポストシーズンなど)
+    game_type: Optional[str] = None
+
+
+@dataclass
+class LeagueSchedule:
+    """1日分のリーグ全体の日程 (1回の sportId=1 リクエストの結果)
+
+    取得時に一度だけチームIDごとの対応表を作るため、何チーム分問い合わせても追加の上流呼び出しは発生しない。
+    """
+    date: str
+    games: List[GameInfo] = field(default_factory=list)
+    by_team: Dict[int, List[GameInfo]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not self.by_team:
+            for game in self.games:
+                for team_id in (game.home_team_id, game.away_team_id):
+                    if team_id is not None:
+                        self.by_team.setdefault(team_id, []).append(game)
+            for team_games in self.by_team.values():
+                team_games.sort(key=lambda game: game.game_number)
+
+    def games_for(self, team_id: int) -> List[GameInfo]:
+        """指定チームのこの日の試合 (ダブルヘッダーは第1試合から順) を返す"""
+        return self.by_team.get(team_id, [])
+
+    def game_for(self, team_id: int) -> Optional[GameInfo]:
+        """指定チームのこの日の最初の試合を返す (試合がない場合はNone)"""
+        games = self.by_team.get(team_id)
+        return games[0] if games else None
+
+
+MLB_API_ENDPOINT = "https://statsapi.mlb.com/api/v1/schedule?sportId=1&date={date}"
+MLB_SCHEDULE_RANGE_ENDPOINT = "https://statsapi.mlb.com/api/v1/schedule?sportId=1&startDate={start}&endDate={end}"
+MLB_LIVE_FEED_ENDPOINT = "https://statsapi.mlb.com/api/v1.1/game/{game_pk}/feed/live"
+
+# この値を超えるレスポンスはイベントループ外 (スレッドプール) でJSONデコードする
+JSON_OFFLOAD_THRESHOLD = 64 * 1024
+
+# リトライ対象とするHTTPステータスコード
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# count_requests の範囲で送ったリクエスト数 (範囲外ではNone)
+# 範囲内で作られたタスク (日程キャッシュの取得など) はコンテキストを引き継ぐので、その送信も数える
+_REQUEST_COUNTER: ContextVar[Optional[List[int]]] = ContextVar("mlb_request_counter", default=None)
+
+
+def _parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Retry-After ヘッダー (秒数または HTTP-date) を秒数にする (ない・解析できない場合はNone)"""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@contextmanager
+def count_requests() -> Iterator[List[int]]:
+    """範囲内で MLBClient が送ったリクエスト数 (リトライを含む) を数える
+
+    返すリストの先頭要素が送信数 (範囲を抜けた後も読める)。
+    """
+    counter = [0]
+    token = _REQUEST_COUNTER.set(counter)
+    try:
+        yield counter
+    finally:
+        _REQUEST_COUNTER.reset(token)
+
+
+class MLBClient:
+    """MLB Stats API 用の非同期HTTPクライアント
+
+    キープアライブ接続をプールする aiohttp セッションを保持し、
+    リクエストごとのタイムアウト・同時実行数の上限・バックオフ付きリトライを提供する。
+    ボット (DodgersBot) が1つのインスタンスを所有し、起動時に start()、終了時に close() する。
+    """
+
+    def __init__(
+        self,
+        *,
+        endpoint: str = MLB_API_ENDPOINT,
+        live_feed_endpoint: str = MLB_LIVE_FEED_ENDPOINT,
+        range_endpoint: str = MLB_SCHEDULE_RANGE_ENDPOINT,
+        timeout: float = 10.0,
+        max_concurrency: int = 8,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+    ):
+        self.endpoint = endpoint
+        self.live_feed_endpoint = live_feed_endpoint
+        self.range_endpoint = range_endpoint
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        """接続プールを持つセッションを作成する (作成済みの場合は何もしない)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={"Accept": "application/json"},
+            )
+            logger.info("MLBClient: HTTPセッションを作成しました。")
+
+    async def close(self) -> None:
+        """セッションをクローズし、プールされた接続を解放する"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("MLBClient: HTTPセッションをクローズしました。")
+        self._session = None
+
+    @property
+    def is_closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def __aenter__(self) -> "MLBClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def get_json(self, url: str, endpoint: str = "other") -> Any:
+        """URLにGETリクエストを送り、デコードしたJSONを返す
 
-MLB_API_ENDPOINT = "https://statsapi.mlb.com/api/v1/schedule?sportId=1&teamId=119&date={date}"
+        リトライの挙動は get_bytes と同じ。
 
-async def fetch_dodgers_game() -> Optional[GameInfo]:
+        Raises:
+            aiohttp.ClientError: リトライ後もリクエストが失敗した場合
+            asyncio.TimeoutError: リトライ後もタイムアウトした場合
+            ValueError: レスポンスがJSONとして解析できない場合
+        """
+        return await self._decode_json(await self.get_bytes(url, endpoint))
+
+    async def get_bytes(self, url: str, endpoint: str = "other") -> bytes:
+        """URLにGETリクエストを送り、レスポンスの本文をそのまま返す
+
+        タイムアウト・接続エラー・リトライ対象のステータスコードの場合は
+        指数バックオフ (ジッター付き) で最大 max_retries 回まで再試行する。
+        429 に Retry-After が付いている場合は、その秒数 (リクエストのタイムアウトが上限) 以上待つ。
+        endpoint はメトリクスのラベルとして使う。
+
+        Raises:
+            aiohttp.ClientError: リトライ後もリクエストが失敗した場合
+            asyncio.TimeoutError: リトライ後もタイムアウトした場合
+        """
+        await self.start()
+        assert self._session is not None
+
+        duration = MLB_API_REQUEST_DURATION.labels(endpoint=endpoint)
+        counter = _REQUEST_COUNTER.get()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    if counter is not None:
+                        counter[0] += 1
+                    with duration.time():
+                        async with self._session.get(url) as response:
+                            response.raise_for_status()
+                            body = await response.read()
+                MLB_API_REQUESTS.labels(endpoint=endpoint, outcome="ok").inc()
+                return body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    MLB_API_REQUESTS.labels(endpoint=endpoint, outcome="error").inc()
+                    raise
+                MLB_API_REQUESTS.labels(endpoint=endpoint, outcome="retry").inc()
+                delay = self._retry_delay(attempt, e)
+                attempt += 1
+                logger.warning(
+                    "MLB APIリクエストを再試行します (%d/%d, %.2f秒後): %s",
+                    attempt, self.max_retries, delay, e,
+                )
+                await asyncio.sleep(delay)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """再試行までの秒数 (429 の Retry-After はタイムアウトを上限に、バックオフより優先する)"""
+        delay = self.backoff_base * (2 ** attempt) * (1 + random.random())
+        if isinstance(error, aiohttp.ClientResponseError) and error.status == 429:
+            retry_after = _parse_retry_after(error.headers)
+            if retry_after is not None:
+                if self.timeout.total is not None:
+                    retry_after = min(retry_after, self.timeout.total)
+                delay = max(delay, retry_after)
+        return delay
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in RETRYABLE_STATUSES
+        return True
+
+    @staticmethod
+    async def _decode_json(body: bytes) -> Any:
+        if len(body) < JSON_OFFLOAD_THRESHOLD:
+            return json.loads(body)
+        return await asyncio.get_running_loop().run_in_executor(None, json.loads, body)
+
+    async def fetch_league_schedule(self, game_date: Optional[date] = None) -> LeagueSchedule:
+        """指定日 (省略時は今日) のリーグ全体の日程を1回のリクエストで取得する"""
+        day = (game_date or date.today()).strftime('%Y-%m-%d')
+        schedule_data = await self.get_json(self.endpoint.format(date=day), "schedule")
+        return parse_league_schedule(schedule_data, day)
+
+    async def fetch_team_game(self, team_id: int, game_date: Optional[date] = None) -> Optional[GameInfo]:
+        """指定日 (省略時は今日) の指定チームの試合情報を取得する
+
+        Returns:
+            Optional[GameInfo]: 試合情報 (試合がない場合はNone)
+        """
+        return (await self.fetch_league_schedule(game_date)).game_for(team_id)
+
+    async def fetch_dodgers_game(self, game_date: Optional[date] = None) -> Optional[GameInfo]:
+        """指定日 (省略時は今日) のドジャースの試合情報を取得する
+
+        Returns:
+            Optional[GameInfo]: 試合情報 (試合がない場合はNone)
+        """
+        return await self.fetch_team_game(DEFAULT_TEAM_ID, game_date)
+
+    async def fetch_schedule_range(self, start: date, end: date) -> List[GameInfo]:
+        """start から end まで (両端を含む) の全試合を1回のリクエストで取得する
+
+        ダブルヘッダーを含め、日付ごとのすべての試合を返す。
+        """
+        url = self.range_endpoint.format(start=start.isoformat(), end=end.isoformat())
+        schedule_data = await self.get_json(url, "schedule_range")
+        return parse_schedule_games(schedule_data)
+
+    async def fetch_live_feed(self, game_pk: int) -> Dict[str, Any]:
+        """試合のライブフィード全体を取得する"""
+        return await self.get_json(self.live_feed_endpoint.format(game_pk=game_pk), "live_feed")
+
+    async def fetch_live_timestamps(self, game_pk: int) -> List[str]:
+        """ライブフィードの更新タイムコード一覧 (古い順) を取得する"""
+        url = self.live_feed_endpoint.format(game_pk=game_pk) + "/timestamps"
+        return await self.get_json(url, "live_timestamps")
+
+    async def fetch_live_diff(self, game_pk: int, start_timecode: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """start_timecode 以降のライブフィードの差分を取得する
+
+        Returns:
+            JSON Patch のリスト (各要素の "diff" キーに操作列)。
+            差分が大きすぎる場合はフィード全体 (dict) が返される。
+        """
+        url = self.live_feed_endpoint.format(game_pk=game_pk) + "/diffPatch"
+        return await self.get_json(f"{url}?startTimecode={start_timecode}", "live_diff")
+
+
+def parse_league_schedule(schedule_data: Dict[str, Any], day: str) -> LeagueSchedule:
+    """schedule APIの1日分のレスポンスを LeagueSchedule に変換する
+
+    Raises:
+        KeyError, ValueError: データ解析に失敗した場合
+    """
+    games = [
+        parse_game(game, day)
+        for day_data in schedule_data['dates']
+        for game in day_data['games']
+    ]
+    return LeagueSchedule(date=day, games=games)
+
+
+def parse_schedule_games(schedule_data: Dict[str, Any]) -> List[GameInfo]:
+    """schedule APIのレスポンスに含まれる全日付・全試合を GameInfo のリストに変換する
+
+    Raises:
+        KeyError, ValueError: データ解析に失敗した場合
+    """
+    return [
+        parse_game(game, day_data['date'])
+        for day_data in schedule_data['dates']
+        for game in day_data['games']
+    ]
+
+
+def parse_game(game: Dict[str, Any], day: str) -> GameInfo:
+    """schedule APIの試合1件を GameInfo に変換する"""
+    winner = next((side for side in ('home', 'away') if game['teams'][side].get('isWinner')), None)
+    return GameInfo(
+        date=day,
+        status=game['status']['detailedState'],
+        home_team=game['teams']['home']['team']['name'],
+        away_team=game['teams']['away']['team']['name'],
+        venue=game['venue']['name'],
+        game_time_utc=game['gameDate'],
+        home_score=game['teams']['home'].get('score'),
+        away_score=game['teams']['away'].get('score'),
+        game_pk=game.get('gamePk'),
+        game_number=game.get('gameNumber', 1),
+        home_team_id=game['teams']['home']['team'].get('id'),
+        away_team_id=game['teams']['away']['team'].get('id'),
+        winner_team_id=game['teams'][winner]['team'].get('id') if winner else None,
+        game_type=game.get('gameType'),
+    )
+
+
+async def fetch_dodgers_game(client: Optional[MLBClient] = None) -> Optional[GameInfo]:
     """ドジャースの試合情報を取得する
-    
+
+    Args:
+        client: 使用するクライアント。省略時は一時的なクライアントを作成して破棄する。
+
     Returns:
         Optional[GameInfo]: 試合情報 (試合がない場合はNone)
     """
     try:
-        today = date.today().strftime('%Y-%m-%d')
-        api_url = MLB_API_ENDPOINT.format(date=today)
-        
-        response = requests.get(api_url)
-        response.raise_for_status()
-        schedule_data = response.json()
-        
-        if not schedule_data['dates'] or not schedule_data['dates'][0]['games']:
-            return None
-        
-        game = schedule_data['dates'][0]['games'][0]
-        return GameInfo(
-            date=today,
-            status=game['status']['detailedState'],
-            home_team=game['teams']['home']['team']['name'],
-            away_team=game['teams']['away']['team']['name'],
-            venue=game['venue']['name'],
-            game_time_utc=game['gameDate'],
-            home_score=game['teams']['home'].get('score'),
-            away_score=game['teams']['away'].get('score')
-        )
-    
-    except requests.exceptions.RequestException as e:
-        print(f"APIリクエストエラー: {e}")
+        if client is not None:
+            return await client.fetch_dodgers_game()
+        async with MLBClient() as temp_client:
+            return await temp_client.fetch_dodgers_game()
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.error("APIリクエストエラー: %s", e)
         raise
     except (KeyError, ValueError) as e:
-        print(f"データ解析エラー: {e}")
-        raise
\ No newline at end of file
+        logger.error("データ解析エラー: %s", e)
+        raise
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from datetime import date
+from typing import Awaitable, Callable, Dict, List, Optional
+from .api_client import GameInfo, LeagueSchedule
+from .teams import DEFAULT_TEAM_ID
+
+logger = logging.getLogger(__name__)
+
+# detailedState ごとのTTL分類
+FINAL_STATES = frozenset({
+    "Final", "Game Over", "Completed Early", "Postponed", "Cancelled", "Suspended",
+})
+SCHEDULED_STATES = frozenset({"Scheduled", "Preview"})
+PREGAME_STATES = frozenset({"Pre-Game", "Warmup", "Delayed Start"})
+
+Fetcher = Callable[[date], Awaitable[LeagueSchedule]]
+
+
+@dataclass
+class CacheEntry:
+    """キャッシュされたリーグ全体の日程"""
+    value: LeagueSchedule
+    fetched_at: float
+    expires_at: float
+    stale_until: float
+
+
+@dataclass
+class CacheStats:
+    """キャッシュのヒット/ミス等のカウンタ"""
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    upstream_calls: int = 0
+    errors: int = 0
+
+
+class ScheduleCache:
+    """MLB APIの日程取得の前段に置く、試合状態に応じたTTLを持つキャッシュ
+
+    日付ごとにリーグ全体の日程 (LeagueSchedule) を保持し、どのチームの問い合わせも同じエントリから答える。
+
+    - 同じ日付への同時リクエストは1回の上流呼び出しにまとめる (single-flight)
+    - TTLは各試合の GameInfo.status (detailedState) に応じて決め、その日の最短のものを使う
+      (試合終了/試合なしは長く、試合中は短く)
+    - 期限切れ直後は古いデータを返しつつバックグラウンドで更新する (stale-while-revalidate)
+    """
+
+    def __init__(
+        self,
+        fetcher: Fetcher,
+        *,
+        live_ttl: float = 15.0,
+        pregame_ttl: float = 60.0,
+        scheduled_ttl: float = 300.0,
+        final_ttl: float = 3600.0,
+        no_game_ttl: float = 1800.0,
+        max_stale: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._fetcher = fetcher
+        self.live_ttl = live_ttl
+        self.pregame_ttl = pregame_ttl
+        self.scheduled_ttl = scheduled_ttl
+        self.final_ttl = final_ttl
+        self.no_game_ttl = no_game_ttl
+        self.max_stale = max_stale
+        self._clock = clock
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = CacheStats()
+
+    def ttl_for(self, game: Optional[GameInfo]) -> float:
+        """試合状態に応じたTTL (秒) を返す"""
+        if game is None:
+            return self.no_game_ttl
+        if game.status in FINAL_STATES:
+            return self.final_ttl
+        if game.status in SCHEDULED_STATES:
+            return self.scheduled_ttl
+        if game.status in PREGAME_STATES:
+            return self.pregame_ttl
+        # "In Progress", "Manager challenge", "Delayed" など試合中の状態
+        return self.live_ttl
+
+    def ttl_for_schedule(self, schedule: LeagueSchedule) -> float:
+        """その日の全試合のうち最短のTTL (秒) を返す"""
+        if not schedule.games:
+            return self.no_game_ttl
+        return min(self.ttl_for(game) for game in schedule.games)
+
+    async def get_game(self, team_id: int = DEFAULT_TEAM_ID, game_date: Optional[date] = None) -> Optional[GameInfo]:
+        """指定チームの指定日 (省略時は今日) の最初の試合をキャッシュ経由で取得する"""
+        return (await self.get(game_date)).game_for(team_id)
+
+    async def get_team_games(self, team_id: int, game_date: Optional[date] = None) -> List[GameInfo]:
+        """指定チームの指定日 (省略時は今日) の全試合をキャッシュ経由で取得する"""
+        return (await self.get(game_date)).games_for(team_id)
+
+    async def get(self, game_date: Optional[date] = None) -> LeagueSchedule:
+        """指定日 (省略時は今日) のリーグ全体の日程をキャッシュ経由で取得する
+
+        Raises:
+            上流の取得で発生した例外 (有効なキャッシュがない場合のみ)
+        """
+        day = game_date or date.today()
+        key = day.isoformat()
+        now = self._clock()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if now < entry.expires_at:
+                self.stats.hits += 1
+                return entry.value
+            if now < entry.stale_until:
+                self.stats.stale_hits += 1
+                self._refresh(key, day)
+                return entry.value
+
+        self.stats.misses += 1
+        return await asyncio.shield(self._refresh(key, day))
+
+    def peek(self, game_date: Optional[date] = None) -> Optional[CacheEntry]:
+        """上流を呼ばずにキャッシュの内容を返す (存在しなければNone)"""
+        return self._entries.get((game_date or date.today()).isoformat())
+
+    def invalidate(self, game_date: Optional[date] = None) -> None:
+        """キャッシュを破棄する (日付省略時は全件)"""
+        if game_date is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(game_date.isoformat(), None)
+
+    def snapshot(self) -> Dict[str, int]:
+        """監視用にカウンタとキャッシュ件数を返す"""
+        data = asdict(self.stats)
+        data["entries"] = len(self._entries)
+        data["inflight"] = len(self._inflight)
+        return data
+
+    def _refresh(self, key: str, day: date) -> asyncio.Task:
+        """同じキーの取得が進行中ならそれを返し、なければ新しく開始する"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+            return task
+        task = asyncio.create_task(self._fetch(key, day), name=f"schedule-cache:{key}")
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._on_done(key, t))
+        return task
+
+    async def _fetch(self, key: str, day: date) -> LeagueSchedule:
+        self.stats.upstream_calls += 1
+        logger.debug("ScheduleCache: %s を上流から取得します", key)
+        value = await self._fetcher(day)
+        now = self._clock()
+        ttl = self.ttl_for_schedule(value)
+        self._entries[key] = CacheEntry(
+            value=value,
+            fetched_at=now,
+            expires_at=now + ttl,
+            stale_until=now + ttl + self.max_stale,
+        )
+        return value
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            # 待機者がいない (バックグラウンド更新の) 場合でも例外を回収しておく
+            self.stats.errors += 1
+            logger.warning("ScheduleCache: %s の更新に失敗しました: %s", key, error)
@@ -0,0 +1,12 @@
+"""ボットの機能別モジュール (Cog)
+
+setup_hook はこのディレクトリを走査せず、COG_EXTENSIONS に並べた拡張を並行して読み込む。
+Cog を追加・削除したときはこの一覧も更新すること。
+"""
+
+COG_EXTENSIONS = (
+    "src.bot.cogs.dodgers",
+    "src.bot.cogs.teams",
+    "src.bot.cogs.live_updates",
+    "src.bot.cogs.keep_alive",
+)
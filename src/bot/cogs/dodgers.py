@@ -1,11 +1,22 @@
 import discord
 from discord.ext import commands
 import logging
-from ..api_client import fetch_dodgers_game
-from ..utils import format_game_info
+import time
+from datetime import date
+from typing import Optional
+from ..teams import DEFAULT_TEAM_ID, find_team, get_team
+from ..utils import format_game_info, format_games, format_result_line, format_season_summary, parse_date
 
 logger = logging.getLogger(__name__)
 
+# !results で表示する件数の上限
+MAX_RESULTS = 20
+# 日程索引の差分更新の間隔と、1回の更新の締め切り (秒)
+REFRESH_INTERVAL = 3600.0
+REFRESH_DEADLINE = 300.0
+# 索引を更新しないプロセス (クラスタモードの2番目以降のワーカー) が索引ファイルの変更を確認する間隔 (秒)
+RELOAD_INTERVAL = 300.0
+
 class DodgersCommandsCog(commands.Cog):
     """ドジャース関連のコマンドを管理するCog"""
 
@@ -13,32 +24,129 @@ class DodgersCommandsCog(commands.Cog):
         self.bot = bot
         logger.info("DodgersCommandsCog が初期化されました。")
 
-    @commands.command(name='dodgers', help='今日のドジャースの試合情報を表示します。')
-    async def dodgers_game(self, ctx: commands.Context):
-        """!dodgers コマンドの処理"""
-        logger.info(f"!dodgers コマンドを受信: author='{ctx.author}'")
+    async def cog_load(self):
+        """Cogのロード時に日程索引の更新ジョブを登録する (初回はボットの準備完了後すぐ)
+
+        索引を更新しないプロセスでは、代わりに索引ファイルの変更を確認して読み直すジョブを登録する。
+        """
+        if self.bot.schedule_index_owner:
+            self.bot.scheduler.add_job(
+                "refresh_schedule_index", self.refresh_schedule_index,
+                interval=REFRESH_INTERVAL, deadline=REFRESH_DEADLINE, cost=1,
+            )
+        else:
+            self.bot.scheduler.add_job(
+                "reload_schedule_index", self.bot.schedule_index.reload_if_changed,
+                interval=RELOAD_INTERVAL, deadline=REFRESH_DEADLINE, initial_delay=RELOAD_INTERVAL,
+            )
+
+    def cog_unload(self):
+        """Cogがアンロードされるときにジョブを止める"""
+        self.bot.scheduler.remove_job("refresh_schedule_index")
+        self.bot.scheduler.remove_job("reload_schedule_index")
+
+    @commands.group(name='dodgers', invoke_without_command=True, extras={'dedup': True}, help='今日のドジャースの試合情報を表示します。日付 (YYYY-MM-DD / MM-DD) を指定するとその日の試合を表示します。')
+    async def dodgers_game(self, ctx: commands.Context, date_text: Optional[str] = None):
+        """!dodgers コマンドの処理
+
+        ログには取得・整形・送信の各段階の所要時間を付け、返信の本文や試合情報そのものは出さない
+        (相関IDで同じコマンドの他のログと突き合わせられる)。
+        """
+        logger.debug("!dodgers コマンドを受信: author=%s", ctx.author.id)
+        if date_text is not None:
+            await self._reply_for_date(ctx, date_text)
+            return
         try:
-            logger.info("ドジャースの試合情報を取得開始...")
-            game_info = await fetch_dodgers_game()
-            logger.info(f"試合情報取得完了: {game_info}")
+            started = time.perf_counter()
+            game_info = await self.bot.schedule_cache.get_game()
+            fetched = time.perf_counter()
+            logger.debug("試合情報取得完了: game_pk=%s", game_info.game_pk if game_info else None)
 
             if game_info:
-                reply = format_game_info(game_info)
-                logger.info(f"返信メッセージ生成: '{reply}'")
-                await ctx.send(reply)
-                logger.info(f"返信を送信しました: channel='{ctx.channel}'")
+                # ダブルヘッダーのもう1試合は索引から補う
+                others = [
+                    game for game in self.bot.schedule_index.games_on(date.fromisoformat(game_info.date))
+                    if game.game_pk != game_info.game_pk
+                ]
+                if others:
+                    games = sorted([game_info, *others], key=lambda game: game.game_number)
+                    reply = format_games(games, "今日のドジャースの試合")
+                else:
+                    reply = format_game_info(game_info)
             else:
-                logger.info("今日の試合情報が見つかりませんでした。")
-                await ctx.send("今日のドジャースの試合情報が見つかりませんでした。")
+                reply = "今日のドジャースの試合情報が見つかりませんでした。"
+            formatted = time.perf_counter()
+            await ctx.send(reply)
+            sent = time.perf_counter()
+            logger.info(
+                "!dodgers に返信しました",
+                extra={
+                    "game_pk": game_info.game_pk if game_info else None,
+                    "channel_id": ctx.channel.id,
+                    "fetch_ms": round((fetched - started) * 1000, 2),
+                    "format_ms": round((formatted - fetched) * 1000, 2),
+                    "send_ms": round((sent - formatted) * 1000, 2),
+                },
+            )
 
-        except Exception as e:
-            logger.exception(f"!dodgers コマンド処理中にエラーが発生しました: author='{ctx.author}'")
+        except Exception:
+            logger.exception("!dodgers コマンド処理中にエラーが発生しました: author=%s", ctx.author.id)
             try:
                 await ctx.send("試合情報の取得中にエラーが発生しました。")
             except discord.HTTPException:
                 logger.error("エラーメッセージの送信に失敗しました。")
 
+    @dodgers_game.command(name='stats', extras={'dedup': True}, help='シーズン成績 (勝敗・得失点・ホーム/ビジター別・直近10試合) を表示します (例: !dodgers stats NYY)。')
+    async def stats(self, ctx: commands.Context, *, team_query: Optional[str] = None):
+        """!dodgers stats コマンドの処理 (終了した試合の結果ストアから集計し、上流には問い合わせない)"""
+        team = find_team(team_query) if team_query else get_team(DEFAULT_TEAM_ID)
+        if team is None:
+            await ctx.send(f"チーム「{team_query}」が見つかりませんでした。略称 (例: LAD, NYY) か愛称で指定してください。")
+            return
+        summary = self.bot.schedule_index.results.summary(team.id)
+        if not summary.games:
+            await ctx.send(f"{team.name} の今シーズンの試合結果が見つかりませんでした。")
+            return
+        await ctx.send(format_season_summary(summary, team.name))
+
+    async def _reply_for_date(self, ctx: commands.Context, date_text: str) -> None:
+        """指定日の試合を索引から返信する (ネットワークアクセスなし)"""
+        try:
+            day = parse_date(date_text)
+        except ValueError:
+            await ctx.send("日付は YYYY-MM-DD または MM-DD の形式で指定してください。")
+            return
+
+        games = self.bot.schedule_index.games_on(day)
+        if games:
+            await ctx.send(format_games(games))
+        else:
+            await ctx.send(f"{day.isoformat()} のドジャースの試合情報が見つかりませんでした。")
+
+    @commands.command(name='next', extras={'dedup': True}, help='次のドジャースの試合情報を表示します。')
+    async def next_game(self, ctx: commands.Context):
+        """!next コマンドの処理"""
+        game = self.bot.schedule_index.next_game()
+        if game:
+            await ctx.send(format_game_info(game, "次のドジャースの試合"))
+        else:
+            await ctx.send("次のドジャースの試合情報が見つかりませんでした。")
+
+    @commands.command(name='results', extras={'dedup': True}, help='直近のドジャースの試合結果を表示します (既定5件)。')
+    async def results(self, ctx: commands.Context, count: int = 5):
+        """!results コマンドの処理"""
+        games = self.bot.schedule_index.last_results(max(1, min(count, MAX_RESULTS)))
+        if games:
+            lines = "\n".join(format_result_line(game) for game in games)
+            await ctx.send(f"⚾ **直近のドジャースの試合結果** ⚾\n{lines}")
+        else:
+            await ctx.send("試合結果が見つかりませんでした。")
+
+    async def refresh_schedule_index(self):
+        """シーズン日程の索引を定期的に差分更新する (スケジューラのジョブ, 失敗はスケジューラが記録する)"""
+        await self.bot.schedule_index.refresh(self.bot.mlb_client)
+
 async def setup(bot: commands.Bot):
     """Cogをボットに登録するためのセットアップ関数"""
     await bot.add_cog(DodgersCommandsCog(bot))
-    logger.info("DodgersCommandsCog がボットに登録されました。")
\ No newline at end of file
+    logger.info("DodgersCommandsCog がボットに登録されました。")
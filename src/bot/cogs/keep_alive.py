@@ -1,53 +1,55 @@
-import discord
-from discord.ext import commands, tasks
+import aiohttp
+from discord.ext import commands
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# keep-alive の間隔と、1回のリクエストのタイムアウト (秒)
+KEEP_ALIVE_INTERVAL = 300.0
+KEEP_ALIVE_TIMEOUT = 10.0
+
 class KeepAliveCog(commands.Cog):
-    """Koyebのスリープを防ぐための定期実行タスクを管理するCog"""
+    """Koyebのスリープを防ぐため、FastAPIのヘルスチェック (/) へ定期的に自分自身でリクエストを送るCog
+
+    DiscordのREST API (fetch_user) を呼ぶとレート制限の枠を無駄に使うため、ローカルへのリクエストで済ませる。
+    実行はボットのスケジューラが行う (ボットの準備完了は待たない)。
+    """
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.keep_alive.add_exception_type(discord.DiscordException)
+        self._session: Optional[aiohttp.ClientSession] = None
         logger.info("KeepAliveCog が初期化されました。")
-        # Cogロード時にタスクを開始するのではなく、on_ready後に開始するようにする
-        # self.keep_alive.start() # ここでは開始しない
 
-    def cog_unload(self):
-        """Cogがアンロードされるときにタスクをキャンセルする"""
-        self.keep_alive.cancel()
-        logger.info("KeepAliveCog がアンロードされ、keep_alive タスクがキャンセルされました。")
+    async def cog_load(self):
+        """Cogのロード時に keep-alive ジョブを登録する"""
+        if not self.bot.keep_alive_url:
+            logger.info("KeepAliveCog: keep-alive の送信先が設定されていないため無効です。")
+            return
+        self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=KEEP_ALIVE_TIMEOUT))
+        # 起動直後はAPIサーバーがまだ待ち受けていないことがあるので、最初の実行は1間隔後
+        self.bot.scheduler.add_job(
+            "keep_alive", self.keep_alive,
+            interval=KEEP_ALIVE_INTERVAL, deadline=KEEP_ALIVE_TIMEOUT,
+            requires_ready=False, initial_delay=KEEP_ALIVE_INTERVAL,
+        )
+        logger.info("KeepAliveCog: keep_alive ジョブを登録しました (%s)。", self.bot.keep_alive_url)
+
+    async def cog_unload(self):
+        """Cogがアンロードされるときにジョブを止めてセッションを閉じる"""
+        self.bot.scheduler.remove_job("keep_alive")
+        if self._session is not None:
+            await self._session.close()
+        logger.info("KeepAliveCog がアンロードされ、keep_alive ジョブを停止しました。")
 
-    @tasks.loop(minutes=5)
     async def keep_alive(self):
-        """Koyebのスリープを防ぐための定期実行タスク"""
-        try:
-            # 軽量なAPIコールを実行 (例: ボット自身の情報を取得)
-            if self.bot.is_ready(): # ボットが準備完了しているか確認
-                user = await self.bot.fetch_user(self.bot.user.id)
-                logger.info(f"Keep-alive: Fetched user info for {user.name}")
-            else:
-                logger.warning("Keep-alive: Bot is not ready yet, skipping API call.")
-        except Exception as e:
-            logger.error(f"Keep-alive タスク中にエラーが発生しました: {e}", exc_info=True)
-
-    @keep_alive.before_loop
-    async def before_keep_alive(self):
-        """keep_aliveループが開始される前に実行される"""
-        logger.info("Keep-alive: Waiting until bot is ready...")
-        await self.bot.wait_until_ready()
-        logger.info("Keep-alive: Bot is ready, starting loop.")
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        """ボットの準備完了時にタスクを開始する"""
-        if not self.keep_alive.is_running():
-            self.keep_alive.start()
-            logger.info("KeepAliveCog: keep_alive タスクを開始しました (on_ready)。")
+        """Koyebのスリープを防ぐための定期実行ジョブ (失敗はスケジューラがエラーとして数える)"""
+        async with self._session.get(self.bot.keep_alive_url) as response:
+            response.raise_for_status()
+        logger.debug("Keep-alive: %s -> HTTP %d", self.bot.keep_alive_url, response.status)
 
 
 async def setup(bot: commands.Bot):
     """Cogをボットに登録するためのセットアップ関数"""
     await bot.add_cog(KeepAliveCog(bot))
-    logger.info("KeepAliveCog がボットに登録されました。")
\ No newline at end of file
+    logger.info("KeepAliveCog がボットに登録されました。")
@@ -0,0 +1,261 @@
+import asyncio
+import discord
+from discord.ext import commands
+import logging
+from datetime import datetime, timezone
+from typing import Optional, Set
+from ..api_client import GameInfo
+from ..cache import FINAL_STATES, PREGAME_STATES, SCHEDULED_STATES
+from ..live_feed import LiveFeed, LiveScore
+from ..outbound import PRIORITY_BROADCAST
+from ..scoreboard import ScoreboardManager
+from ..utils import format_live_update
+
+logger = logging.getLogger(__name__)
+
+# 試合フェーズ
+PHASE_IDLE = "idle"          # 購読者なし
+PHASE_NO_GAME = "no_game"    # 今日は試合なし
+PHASE_AWAY = "hours_away"    # 開始まで1時間以上
+PHASE_PREGAME = "pregame"    # 開始1時間前〜プレイボール
+PHASE_LIVE = "live"          # 試合中
+PHASE_FINAL = "final"        # 試合終了
+
+# フェーズごとのポーリング間隔 (秒)
+POLL_INTERVALS = {
+    PHASE_IDLE: 60.0,
+    PHASE_NO_GAME: 1800.0,
+    PHASE_PREGAME: 60.0,
+    PHASE_LIVE: 10.0,
+    PHASE_FINAL: 1800.0,
+}
+# フェーズごとの1回のポーリングで送るリクエスト数の見積もり (スケジューラの予算から先に差し引く)
+# 試合中は日程に加えてライブフィード (タイムスタンプ一覧と差分) を取得する。
+# 見積もりとの差は実行後にスケジューラが実際のリクエスト数で精算する
+POLL_COSTS = {
+    PHASE_IDLE: 1,       # 購読者がいる場合 (次のポーリングで日程を取得する)
+    PHASE_NO_GAME: 1,
+    PHASE_AWAY: 1,
+    PHASE_PREGAME: 1,
+    PHASE_LIVE: 3,
+    PHASE_FINAL: 1,
+}
+PREGAME_WINDOW = 3600.0      # この秒数より前は PHASE_AWAY として扱う
+MAX_AWAY_INTERVAL = 1800.0
+POLL_DEADLINE = 60.0         # 1回のポーリングの締め切り (秒)
+POLL_JOB = "poll_live_game"
+
+
+def game_phase(game: Optional[GameInfo], now: Optional[datetime] = None) -> str:
+    """試合情報からポーリング用のフェーズを判定する"""
+    if game is None:
+        return PHASE_NO_GAME
+    if game.status in FINAL_STATES:
+        return PHASE_FINAL
+    if game.status in PREGAME_STATES:
+        return PHASE_PREGAME
+    if game.status in SCHEDULED_STATES:
+        if seconds_until_start(game, now) > PREGAME_WINDOW:
+            return PHASE_AWAY
+        return PHASE_PREGAME
+    return PHASE_LIVE
+
+
+def seconds_until_start(game: GameInfo, now: Optional[datetime] = None) -> float:
+    """試合開始までの秒数を返す (開始時刻が解析できない場合は0)"""
+    try:
+        start = datetime.fromisoformat(game.game_time_utc.replace('Z', '+00:00'))
+    except ValueError:
+        return 0.0
+    return (start - (now or datetime.now(timezone.utc))).total_seconds()
+
+
+class LiveUpdatesCog(commands.Cog):
+    """試合中のスコア更新を購読チャンネルにプッシュするCog
+
+    スケジューラのジョブが試合フェーズに応じて間隔を変えながらライブフィードを取得し、
+    スコアや状態が変わったときだけ、1回の取得結果を全購読チャンネルへ配信する。
+    `!scoreboard` を使ったチャンネルでは、新しいメッセージを送らずに1つの埋め込みを編集し続ける。
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.subscribers: Set[int] = set()
+        self.scoreboards = ScoreboardManager(bot.outbound)
+        self.phase = PHASE_IDLE
+        self._feed: Optional[LiveFeed] = None
+        self._last_pushed: Optional[LiveScore] = None
+        logger.info("LiveUpdatesCog が初期化されました。")
+
+    async def cog_load(self):
+        """Cogのロード時にポーリングジョブを登録する (購読者がいない間は間隔を空けて空振りする)"""
+        self.bot.scheduler.add_job(
+            POLL_JOB, self.poll_live_game,
+            interval=POLL_INTERVALS[PHASE_IDLE], deadline=POLL_DEADLINE, cost=self._poll_cost(),
+        )
+
+    def cog_unload(self):
+        """Cogがアンロードされるときにジョブを止める"""
+        self.bot.scheduler.remove_job(POLL_JOB)
+        self.scoreboards.close()
+        logger.info("LiveUpdatesCog がアンロードされ、poll_live_game ジョブを停止しました。")
+
+    @commands.command(name='subscribe', help='このチャンネルでドジャースの試合速報を受け取ります。')
+    @commands.guild_only()
+    async def subscribe(self, ctx: commands.Context):
+        """!subscribe コマンドの処理"""
+        self.subscribers.add(ctx.channel.id)
+        self._update_cost()
+        logger.info("ライブ更新の購読を追加: channel='%s' (購読数: %d)", ctx.channel, len(self.subscribers))
+        await ctx.send("このチャンネルで試合速報を配信します。停止するには `!unsubscribe` を使ってください。")
+
+    @commands.command(name='unsubscribe', help='このチャンネルの試合速報の配信を停止します。')
+    @commands.guild_only()
+    async def unsubscribe(self, ctx: commands.Context):
+        """!unsubscribe コマンドの処理"""
+        self.subscribers.discard(ctx.channel.id)
+        self._update_cost()
+        logger.info("ライブ更新の購読を解除: channel='%s' (購読数: %d)", ctx.channel, len(self.subscribers))
+        await ctx.send("このチャンネルへの試合速報の配信を停止しました。")
+
+    @commands.command(name='scoreboard', help='このチャンネルに試合に合わせて更新されるスコアボードを表示します (停止: !scoreboard off)。')
+    @commands.guild_only()
+    async def scoreboard(self, ctx: commands.Context, action: Optional[str] = None):
+        """!scoreboard コマンドの処理"""
+        if action == "off":
+            if self.scoreboards.remove(ctx.channel.id):
+                self._update_cost()
+                logger.info("スコアボードを停止: channel='%s' (スコアボード数: %d)", ctx.channel, len(self.scoreboards))
+                await ctx.send("このチャンネルのスコアボードの更新を停止しました。")
+            else:
+                await ctx.send("このチャンネルにはスコアボードがありません。")
+            return
+
+        existing = self.scoreboards.get_message(ctx.channel.id)
+        if existing is not None:
+            # 同じスコアボードを何度も送らず、既存のメッセージを案内する
+            # (更新はポーリングに任せる。ここで日程の内容を描くとイニングの表示が消えてしまう)
+            await ctx.send(f"このチャンネルのスコアボードはこちらです: {existing.jump_url}")
+            return
+        game = await self.bot.schedule_cache.get_game()
+        if game is None:
+            await ctx.send("今日のドジャースの試合は予定されていません。")
+            return
+        inning, inning_half = None, None
+        if self._feed is not None and self._feed.game_pk == game.game_pk:
+            # 試合中はライブフィードの内容 (イニング込み) で描き、他のスコアボードと表示を揃える
+            score, live_game = self._feed.score(), self._feed.to_game_info()
+            if score is not None and live_game is not None:
+                game, inning, inning_half = live_game, score.inning, score.inning_half
+        await self.scoreboards.post(ctx.channel, ctx.channel.id, game, inning, inning_half)
+        self._update_cost()
+        logger.info("スコアボードを追加: channel='%s' (スコアボード数: %d)", ctx.channel, len(self.scoreboards))
+
+    async def poll_live_game(self) -> None:
+        """試合フェーズに応じた間隔でライブフィードを確認し、変化があれば配信する (スケジューラのジョブ)"""
+        if not self.subscribers and not self.scoreboards:
+            self._set_phase(PHASE_IDLE)
+            return
+
+        game = await self.bot.schedule_cache.get_game()
+        phase = game_phase(game)
+        self._set_phase(phase, game)
+
+        if game is None or game.game_pk is None:
+            return
+        use_feed = phase == PHASE_LIVE or (phase == PHASE_FINAL and self._feed is not None)
+        if not use_feed:
+            # 試合前などはイニング情報がないため日程の内容でスコアボードを更新する (変化がなければ編集されない)
+            self.scoreboards.update_all(game)
+            return
+        await self._check_feed(game.game_pk)
+        if phase == PHASE_FINAL:
+            # 最終スコアを配信したら次の試合まで差分フィードは不要
+            self._feed = None
+
+    async def _check_feed(self, game_pk: int) -> None:
+        if self._feed is None or self._feed.game_pk != game_pk:
+            self._feed = LiveFeed(game_pk)
+            self._last_pushed = None
+
+        if not await self._feed.update(self.bot.mlb_client):
+            return
+        score = self._feed.score()
+        game = self._feed.to_game_info()
+        if score is None or game is None:
+            return
+        # スコアボードはイニングの進行も反映する (編集は内容が変わったときだけ、まとめて送られる)
+        self.scoreboards.update_all(game, score.inning, score.inning_half)
+        if not self.subscribers or not self._score_changed(score):
+            return
+
+        self._last_pushed = score
+        await self.broadcast(format_live_update(game, score.inning, score.inning_half))
+
+    def _score_changed(self, score: LiveScore) -> bool:
+        last = self._last_pushed
+        return last is None or (last.status, last.away_score, last.home_score) != (
+            score.status, score.away_score, score.home_score
+        )
+
+    def _set_phase(self, phase: str, game: Optional[GameInfo] = None) -> None:
+        if phase == PHASE_AWAY and game is not None:
+            # 試合開始1時間前に PHASE_PREGAME へ切り替わるように間隔を調整する
+            wait = seconds_until_start(game) - PREGAME_WINDOW
+            interval = min(max(wait, POLL_INTERVALS[PHASE_PREGAME]), MAX_AWAY_INTERVAL)
+        else:
+            interval = POLL_INTERVALS.get(phase, MAX_AWAY_INTERVAL)
+
+        if phase != self.phase:
+            logger.info("ライブ更新: フェーズ %s -> %s (間隔 %.0f秒)", self.phase, phase, interval)
+            self.phase = phase
+        self.bot.scheduler.set_interval(POLL_JOB, interval)
+        self._update_cost()
+
+    def _poll_cost(self) -> int:
+        """次のポーリングで送るリクエスト数の見積もり
+
+        購読者もスコアボードもない間は上流へリクエストしないので、リクエストの予算を使わない。
+        """
+        if not self.subscribers and not self.scoreboards:
+            return 0
+        return POLL_COSTS.get(self.phase, 1)
+
+    def _update_cost(self) -> None:
+        # 購読・スコアボードの追加直後の (まだフェーズが idle の) ポーリングから見積もりを反映する
+        job = self.bot.scheduler.get(POLL_JOB)
+        if job is not None:
+            job.cost = self._poll_cost()
+
+    async def broadcast(self, content: str) -> None:
+        """1つのメッセージを全購読チャンネルに送信する"""
+        channel_ids = list(self.subscribers)
+        results = await asyncio.gather(
+            *(self._send_to(channel_id, content) for channel_id in channel_ids),
+            return_exceptions=True,
+        )
+        sent = sum(1 for r in results if r is True)
+        logger.info("ライブ更新を配信しました: %d/%d チャンネル", sent, len(channel_ids))
+
+    async def _send_to(self, channel_id: int, content: str) -> bool:
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            self.subscribers.discard(channel_id)
+            return False
+        try:
+            # 一斉配信はコマンドへの返信より後回しにする (送信時間・失敗数はディスパッチャが記録する)
+            await self.bot.outbound.send(channel_id, channel.send, content, priority=PRIORITY_BROADCAST, kind="broadcast")
+            return True
+        except (discord.Forbidden, discord.NotFound):
+            # 送信できなくなったチャンネルは購読を解除する
+            self.subscribers.discard(channel_id)
+            logger.warning("チャンネル %d に送信できないため購読を解除しました。", channel_id)
+        except discord.HTTPException as e:
+            logger.error("チャンネル %d への配信に失敗しました: %s", channel_id, e)
+        return False
+
+
+async def setup(bot: commands.Bot):
+    """Cogをボットに登録するためのセットアップ関数"""
+    await bot.add_cog(LiveUpdatesCog(bot))
+    logger.info("LiveUpdatesCog がボットに登録されました。")
@@ -0,0 +1,103 @@
+import discord
+from discord.ext import commands
+import logging
+from datetime import date
+from typing import Optional, Tuple
+from ..teams import DEFAULT_TEAM_ID, TEAMS_BY_ID, Team, find_team, get_team
+from ..utils import format_games, parse_date
+
+logger = logging.getLogger(__name__)
+
+class TeamCommandsCog(commands.Cog):
+    """ギルドごとのお気に入りチームと、任意チームの試合情報コマンドを管理するCog
+
+    試合情報はリーグ全体の日程 (1回の sportId=1 リクエスト) から引くため、
+    チームがいくつ指定されても上流への呼び出しは増えない。
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        logger.info("TeamCommandsCog が初期化されました。")
+
+    def _guild_team(self, ctx: commands.Context) -> Team:
+        guild_id = ctx.guild.id if ctx.guild else None
+        team_id = self.bot.guild_settings.get_team_id(guild_id)
+        team = get_team(team_id)
+        if team is None:
+            # 設定ファイルに知らないチームIDが残っている場合 (手で編集された・チームが変わったなど) は既定のチームにする
+            logger.warning("お気に入りチームのIDが不明なため既定のチームを使います: guild=%s team_id=%s", guild_id, team_id)
+            team = TEAMS_BY_ID[DEFAULT_TEAM_ID]
+        return team
+
+    @commands.command(name='team', help='このサーバーのお気に入りチームを表示・設定します (例: !team NYY)。')
+    async def team(self, ctx: commands.Context, *, query: Optional[str] = None):
+        """!team コマンドの処理"""
+        if query is None:
+            team = self._guild_team(ctx)
+            await ctx.send(f"このサーバーのお気に入りチーム: **{team.name}** ({team.abbreviation})")
+            return
+
+        if ctx.guild is None:
+            await ctx.send("お気に入りチームはサーバー内でのみ設定できます。")
+            return
+        if not ctx.author.guild_permissions.manage_guild:
+            await ctx.send("お気に入りチームの変更には「サーバーの管理」権限が必要です。")
+            return
+
+        team = find_team(query)
+        if team is None:
+            await ctx.send(f"チーム「{query}」が見つかりませんでした。略称 (例: LAD, NYY) か愛称で指定してください。")
+            return
+        await self.bot.guild_settings.set_team_id(ctx.guild.id, team.id)
+        logger.info("お気に入りチームを変更: guild='%s' team='%s'", ctx.guild, team.name)
+        await ctx.send(f"このサーバーのお気に入りチームを **{team.name}** に設定しました。")
+
+    @commands.command(name='game', help='チームの試合情報を表示します (例: !game NYY, !game red sox 7/1)。チーム省略時はお気に入りチーム。')
+    async def game(self, ctx: commands.Context, *args: str):
+        """!game コマンドの処理"""
+        try:
+            team_query, day = self._parse_args(args)
+        except ValueError:
+            await ctx.send("日付は YYYY-MM-DD または MM-DD の形式で指定してください。")
+            return
+
+        team = find_team(team_query) if team_query else self._guild_team(ctx)
+        if team is None:
+            await ctx.send(f"チーム「{team_query}」が見つかりませんでした。略称 (例: LAD, NYY) か愛称で指定してください。")
+            return
+
+        try:
+            games = await self.bot.get_team_games(team.id, day)
+        except Exception:
+            logger.exception("!game コマンド処理中にエラーが発生しました: author='%s'", ctx.author)
+            try:
+                await ctx.send("試合情報の取得中にエラーが発生しました。")
+            except discord.HTTPException:
+                logger.error("エラーメッセージの送信に失敗しました。")
+            return
+
+        if games:
+            await ctx.send(format_games(games, f"{team.name} の試合"))
+        else:
+            await ctx.send(f"{day.isoformat()} の {team.name} の試合情報が見つかりませんでした。")
+
+    @staticmethod
+    def _parse_args(args: Tuple[str, ...]) -> Tuple[str, date]:
+        """引数をチーム名と日付に分ける (日付は数字と区切り文字だけの引数)
+
+        Raises:
+            ValueError: 日付らしい引数が解析できない場合
+        """
+        day = date.today()
+        words = []
+        for arg in args:
+            if arg[:1].isdigit() and ("-" in arg or "/" in arg):
+                day = parse_date(arg)
+            else:
+                words.append(arg)
+        return " ".join(words), day
+
+async def setup(bot: commands.Bot):
+    """Cogをボットに登録するためのセットアップ関数"""
+    await bot.add_cog(TeamCommandsCog(bot))
+    logger.info("TeamCommandsCog がボットに登録されました。")
@@ -1,45 +1,318 @@
 import discord
 from discord.ext import commands, tasks # commands をインポート
-from typing import Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from datetime import date, datetime
+import asyncio
 import logging
-import os # Cogロードのために追加
-from .api_client import fetch_dodgers_game
+import math
+import time
+import yarl
+from .api_client import GameInfo, LeagueSchedule, MLBClient
+from .cache import ScheduleCache
+from .cogs import COG_EXTENSIONS
+from .schedule_index import ScheduleIndex
+from .guild_settings import GuildSettings
+from .outbound import OutboundDispatcher, PRIORITY_INTERACTIVE
+from .scheduler import DEFAULT_REQUEST_BUDGET, Scheduler
 from .utils import format_game_info
+from ..logs import correlation_scope
+from ..metrics import COMMAND_DURATION, COMMANDS, monitor_event_loop_lag
+from ..startup import StartupTimeline
 
 # ロガーを取得 (basicConfigはserver.pyで行う)
 logger = logging.getLogger(__name__)
 
-class DodgersBot(commands.Bot):
-    """ドジャースの試合情報を提供するDiscordボット (commands.Botベース)"""
+class InstrumentedContext(commands.Context):
+    """返信をボットの送信キュー (OutboundDispatcher) 経由で送るコンテキスト
 
-    def __init__(self, *, intents: discord.Intents):
+    送信時間・待ち時間はディスパッチャがメトリクスに記録する。
+    読み取り専用のコマンド (extras={"dedup": True} を付けたもの) の最初の返信は、コマンド文字列と
+    返信内容で重複判定し、同じチャンネルで直前に同じ質問・同じ回答があればその回答へのリンクを返す。
+    設定を変えるコマンドは返信が毎回異なる意味を持つので重複判定しない。
+    """
+
+    command_started_at: Optional[float] = None
+    _replied: bool = False
+
+    async def send(self, *args, **kwargs) -> discord.Message:
+        dedup_key = None
+        if not self._replied and self.command is not None and self.command.extras.get("dedup"):
+            dedup_key = self._dedup_key(*args, **kwargs)
+        self._replied = True
+        return await self.bot.outbound.send(
+            self.channel.id, super().send, *args,
+            priority=PRIORITY_INTERACTIVE, kind="reply", dedup_key=dedup_key, **kwargs,
+        )
+
+    def _dedup_key(self, content: Any = None, **kwargs: Any) -> str:
+        """重複判定のキー (正規化したコマンド文字列と返信内容)"""
+        embed = kwargs.get("embed")
+        parts = [
+            " ".join(self.message.content.split()).lower(),
+            str(content if content is not None else kwargs.get("content", "")),
+            repr(embed.to_dict()) if embed is not None else "",
+        ]
+        return "\x1f".join(parts)
+
+
+def default_intents(message_content: bool = True) -> discord.Intents:
+    """ボットが使うインテント (message_content はプレフィックスコマンドに必要な特権インテント)"""
+    intents = discord.Intents.default()
+    intents.message_content = message_content
+    return intents
+
+def configure_discord_endpoints(api_base: Optional[str] = None, gateway_url: Optional[str] = None) -> None:
+    """discord.py の REST・ゲートウェイの接続先を差し替える (ローカルの偽ゲートウェイで試験する場合)"""
+    if api_base:
+        discord.http.Route.BASE = api_base.rstrip("/")
+    if gateway_url:
+        discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(gateway_url)
+
+# IDENTIFY は同じバケット (shard_id % max_concurrency) ごとにこの秒数に1回まで
+IDENTIFY_INTERVAL = 5.0
+
+class DodgersBot(commands.AutoShardedBot):
+    """ドジャースの試合情報を提供するDiscordボット (commands.AutoShardedBotベース)
+
+    shard_ids / shard_count を指定すると、そのシャードだけを担当する (クラスタモードのワーカー)。
+    省略した場合は Discord の推奨シャード数で全シャードを1プロセスで担当する。
+    """
+
+    def __init__(
+        self,
+        *,
+        intents: discord.Intents,
+        mlb_client: Optional[MLBClient] = None,
+        schedule_index_path: Optional[str] = None,
+        guild_settings_path: Optional[str] = None,
+        shard_ids: Optional[Sequence[int]] = None,
+        shard_count: Optional[int] = None,
+        identify_concurrency: int = 1,
+        guild_ready_timeout: float = 2.0,
+        keep_alive_url: Optional[str] = None,
+        schedule_index_owner: bool = True,
+        request_budget: float = DEFAULT_REQUEST_BUDGET,
+        timeline: Optional[StartupTimeline] = None,
+        monitor_loop_lag: bool = True,
+    ):
         # コマンドプレフィックスを設定 (例: '!')
-        super().__init__(command_prefix='!', intents=intents)
+        super().__init__(
+            command_prefix='!',
+            intents=intents,
+            shard_ids=list(shard_ids) if shard_ids is not None else None,
+            shard_count=shard_count,
+            # READY 後、最後の GUILD_CREATE からこの秒数待って on_ready を発火する
+            guild_ready_timeout=guild_ready_timeout,
+        )
+        # 同時に IDENTIFY できるバケット数 (GET /gateway/bot の session_start_limit.max_concurrency)
+        self.identify_concurrency = max(1, identify_concurrency)
+        self._identify_locks: Dict[int, asyncio.Lock] = {}
+        self._last_identify: Dict[int, float] = {}
+        # MLB APIクライアント (接続プールを共有するためボットが1つだけ所有する)
+        self.mlb_client: MLBClient = mlb_client or MLBClient()
+        # 同時リクエストを1回の上流呼び出しにまとめる試合情報キャッシュ
+        self.schedule_cache = ScheduleCache(self._fetch_league_schedule)
+        # シーズン日程のローカル索引 (日付指定・次の試合・直近の結果に使う)
+        self.schedule_index = ScheduleIndex(schedule_index_path)
+        # ギルドごとのお気に入りチーム
+        self.guild_settings = GuildSettings(guild_settings_path)
+        # Discordへの送信キュー (返信を一斉配信より優先し、チャンネルごとに送信間隔を調整する)
+        self.outbound = OutboundDispatcher()
+        # 定期ジョブ (Cog が cog_load で登録する) と、ジョブが外部へ送るリクエストの予算 (1分あたり)
+        self.scheduler = Scheduler(request_budget=request_budget, is_ready=self.is_ready)
+        # keep-alive で定期的にリクエストを送る自分自身のURL (FastAPI の /, 省略時は keep-alive しない)
+        self.keep_alive_url = keep_alive_url
+        # 日程索引を上流から更新するプロセスか (クラスタモードでは最初のワーカーだけ。他は更新されたファイルを読み直す)
+        self.schedule_index_owner = schedule_index_owner
+        # コマンドの所要時間をメトリクスに記録する
+        self.before_invoke(self._record_command_start)
+        self.after_invoke(self._record_command_end)
+        # イベントループの遅延を loop="bot" として記録するか
+        # (APIサーバーと同じループで動かす場合は "api" の計測と重複するので記録しない)
+        self.monitor_loop_lag = monitor_loop_lag
+        self._loop_lag_task: Optional[asyncio.Task] = None
+        # グレースフルシャットダウン用: 実行中のコマンド数と、新しいコマンドを受け付けないフラグ
+        self.draining = False
+        self._inflight_commands = 0
+        self._commands_idle = asyncio.Event()
+        self._commands_idle.set()
+        # 起動フェーズの計測 (server.py はプロセス全体のタイムラインを渡す)
+        self.timeline = timeline or StartupTimeline()
+        # 今日の日程の事前取得 (ゲートウェイへのログイン・接続と並行して行う)
+        self._prewarm_task: Optional[asyncio.Task] = None
         # Cogをロードするための初期化処理は setup_hook で行う
 
+    async def _fetch_league_schedule(self, game_date: Optional[date] = None) -> LeagueSchedule:
+        """日程キャッシュの取得関数 (終了した試合は索引の定期更新を待たずに成績の集計に加える)
+
+        集計に加えるのは索引のシーズンの試合だけ (過去の日付の問い合わせで別シーズンの結果が混ざらないようにする)。
+        """
+        schedule = await self.mlb_client.fetch_league_schedule(game_date)
+        self.schedule_index.add_results(schedule.games)
+        return schedule
+
+    @property
+    def prewarmed(self) -> bool:
+        """今日の日程の事前取得が終わったか (失敗した場合も True)"""
+        return self._prewarm_task is not None and self._prewarm_task.done()
+
+    async def login(self, token: str) -> None:
+        """ログインの前に今日の日程の事前取得を始める
+
+        最初のコマンドが上流の応答を待たずに済むよう、REST ログイン・setup_hook・ゲートウェイ接続と
+        並行して statsapi から今日のリーグ日程を取得しておく。
+        """
+        # MLB APIのHTTPセッションはイベントループ上で作成する必要がある
+        await self.mlb_client.start()
+        if self._prewarm_task is None:
+            self._prewarm_task = asyncio.create_task(self._prewarm(), name="DodgersBot.prewarm")
+        self.timeline.begin("login")
+        await super().login(token)
+
+    async def _prewarm(self) -> None:
+        with self.timeline.phase("mlb_prewarm"):
+            try:
+                await self.schedule_cache.get(date.today())
+            except Exception:
+                # 取得できなくても起動は続ける (最初のコマンドで取り直す)
+                logger.warning("今日の日程の事前取得に失敗しました。", exc_info=True)
+
     async def setup_hook(self) -> None:
         """ボットが内部セットアップを完了した後に呼び出される"""
+        self.timeline.end("login")
         logger.info("ボットのセットアップを開始します (setup_hook)...")
 
-        # Cogファイルをロード
-        cogs_dir = "src/bot/cogs"
-        for filename in os.listdir(cogs_dir):
-            if filename.endswith(".py") and not filename.startswith("_"):
-                cog_name = f"src.bot.cogs.{filename[:-3]}"
-                try:
-                    await self.load_extension(cog_name)
-                    logger.info(f"Cog '{cog_name}' をロードしました。")
-                except commands.ExtensionError as e:
-                    logger.exception(f"Cog '{cog_name}' のロードに失敗しました。", exc_info=e)
+        with self.timeline.phase("setup_hook"):
+            # 前回保存した日程索引・ギルド設定を読み込む (最新化は Cog の定期タスクで行う)
+            await asyncio.gather(self.schedule_index.load(), self.guild_settings.load())
+            if self.monitor_loop_lag:
+                self._loop_lag_task = asyncio.create_task(monitor_event_loop_lag("bot"))
+
+            # Cogをロード (ディレクトリを走査せず、一覧の拡張を並行して読み込む)
+            with self.timeline.phase("cogs"):
+                await asyncio.gather(*(self._load_cog(name) for name in COG_EXTENSIONS))
+            # Cog が登録したジョブの実行を始める (準備完了が必要なジョブは on_ready まで待つ)
+            self.scheduler.start()
 
         logger.info("ボットのセットアップが完了しました (setup_hook)。")
+        self.timeline.begin("gateway")
+
+    async def _load_cog(self, name: str) -> None:
+        start = time.perf_counter()
+        try:
+            await self.load_extension(name)
+            logger.info("Cog '%s' をロードしました (%.3f秒)。", name, time.perf_counter() - start)
+        except commands.ExtensionError as e:
+            logger.exception("Cog '%s' のロードに失敗しました。", name, exc_info=e)
+
+    async def close(self) -> None:
+        """ボット終了時にMLB APIのセッションもクローズする"""
+        try:
+            await super().close()
+        finally:
+            if self._loop_lag_task is not None:
+                self._loop_lag_task.cancel()
+            if self._prewarm_task is not None:
+                self._prewarm_task.cancel()
+            await self.scheduler.close()
+            await self.outbound.close()
+            await self.mlb_client.close()
+
+    async def get_context(self, origin, /, *, cls=InstrumentedContext):
+        """コマンドのコンテキストとして InstrumentedContext を使う"""
+        return await super().get_context(origin, cls=cls)
+
+    async def before_identify_hook(self, shard_id: Optional[int], *, initial: bool = False) -> None:
+        """同じ IDENTIFY バケットのシャードだけを IDENTIFY_INTERVAL 秒ずつ空けて接続する
+
+        既定の実装は初回以外のシャードを一律5秒待たせるが、max_concurrency > 1 の場合は
+        別バケットのシャードを同時に接続できる。
+        """
+        bucket = (shard_id or 0) % self.identify_concurrency
+        lock = self._identify_locks.setdefault(bucket, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            last = self._last_identify.get(bucket)
+            if last is not None:
+                wait = last + IDENTIFY_INTERVAL - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self._last_identify[bucket] = loop.time()
+
+    def shard_stats(self) -> List[Dict[str, Any]]:
+        """担当しているシャードごとの遅延・ギルド数を返す"""
+        guild_counts: Dict[int, int] = {}
+        for guild in self.guilds:
+            guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+        stats = []
+        for shard_id, shard in sorted(self.shards.items()):
+            latency = shard.latency
+            stats.append({
+                "shard_id": shard_id,
+                "latency": latency if math.isfinite(latency) else None,
+                "guilds": guild_counts.get(shard_id, 0),
+                "closed": shard.is_closed(),
+            })
+        return stats
+
+    async def get_team_games(self, team_id: int, day: Optional[date] = None) -> List[GameInfo]:
+        """指定チームの指定日 (省略時は今日) の試合を返す
+
+        今日の試合はスコアが変わるため日程キャッシュから、それ以外の日は日程索引から引く
+        (索引が未構築の場合は日程キャッシュを使う)。
+        """
+        day = day or date.today()
+        if day != date.today() and len(self.schedule_index):
+            return self.schedule_index.games_on(day, team_id)
+        return await self.schedule_cache.get_team_games(team_id, day)
+
+    async def process_commands(self, message: discord.Message) -> None:
+        """シャットダウン中 (draining) は新しいコマンドを受け付けない
+
+        コマンドの処理中のログ (取得・整形・送信) にはメッセージIDを相関IDとして付ける。
+        """
+        if self.draining:
+            return
+        with correlation_scope(f"msg-{message.id}"):
+            await super().process_commands(message)
+
+    async def drain(self, timeout: float) -> bool:
+        """新しいコマンドの受け付けを止め、実行中のコマンドの完了を最大 timeout 秒待つ
+
+        Returns:
+            bool: 全てのコマンドが完了した場合True (タイムアウトした場合False)
+        """
+        self.draining = True
+        if self._inflight_commands:
+            logger.info("実行中のコマンド %d 件の完了を待ちます (最大%s秒)...", self._inflight_commands, timeout)
+        try:
+            await asyncio.wait_for(self._commands_idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("%d 件のコマンドが完了しないままシャットダウンします。", self._inflight_commands)
+            return False
+
+    async def _record_command_start(self, ctx: commands.Context) -> None:
+        ctx.command_started_at = time.perf_counter()
+        self._inflight_commands += 1
+        self._commands_idle.clear()
 
+    async def _record_command_end(self, ctx: commands.Context) -> None:
+        self._inflight_commands = max(0, self._inflight_commands - 1)
+        if not self._inflight_commands:
+            self._commands_idle.set()
+        started_at = getattr(ctx, "command_started_at", None)
+        name = ctx.command.qualified_name if ctx.command else "unknown"
+        if started_at is not None:
+            COMMAND_DURATION.labels(command=name).observe(time.perf_counter() - started_at)
+        COMMANDS.labels(command=name, outcome="error" if ctx.command_failed else "ok").inc()
 
     async def on_ready(self) -> None:
         """Botが起動し、準備が完了したときに呼び出されるイベントハンドラ"""
-        logger.info(f'{self.user} としてログインしました (on_ready)')
-        # Cog内のタスクはCog側で開始されるため、ここでのタスク開始は不要
+        logger.info('%s としてログインしました (on_ready)', self.user)
+        self.timeline.end("gateway")
+        # 準備完了を待っていたジョブを動かす
+        self.scheduler.wake()
 
     # on_message は commands.Bot がコマンドを処理するため、通常は不要
     # もしコマンド以外のメッセージにも反応したい場合は、以下のように実装し、
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, Optional
+try:
+    import fcntl
+except ImportError:  # Windows ではプロセス間のロックなし (クラスタモードは想定しない)
+    fcntl = None  # type: ignore[assignment]
+from .teams import DEFAULT_TEAM_ID
+
+logger = logging.getLogger(__name__)
+
+
+class GuildSettings:
+    """ギルド (サーバー) ごとの設定を保持し、JSONファイルに保存する
+
+    現在はお気に入りチーム (team_id) のみを扱う。未設定のギルドはドジャースを使う。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._team_ids: Dict[int, int] = {}
+
+    def get_team_id(self, guild_id: Optional[int]) -> int:
+        """ギルドのお気に入りチームIDを返す (未設定・DMの場合は既定のチーム)"""
+        if guild_id is None:
+            return DEFAULT_TEAM_ID
+        return self._team_ids.get(guild_id, DEFAULT_TEAM_ID)
+
+    async def set_team_id(self, guild_id: int, team_id: int) -> None:
+        """ギルドのお気に入りチームを設定して保存する
+
+        クラスタモードでは複数プロセスが同じファイルに書き込むため、ロックファイルで排他したうえで
+        ディスクの内容を読み直して1件だけ書き換え、他のプロセスが設定したギルドを上書きしないようにする。
+        """
+        self._team_ids[guild_id] = team_id
+        if not self.path:
+            return
+        try:
+            self._team_ids = await asyncio.to_thread(self._update_file, self.path, guild_id, team_id)
+        except OSError as e:
+            logger.warning("GuildSettings: 設定ファイルを保存できませんでした (%s): %s", self.path, e)
+
+    async def load(self) -> bool:
+        """ディスクから設定を読み込む
+
+        Returns:
+            bool: 読み込めた場合True (ファイルがない・壊れている場合はFalse)
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            data = await asyncio.to_thread(self._read_file, self.path)
+            self._team_ids = {int(guild_id): int(team_id) for guild_id, team_id in data["team_ids"].items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("GuildSettings: 設定ファイルを読み込めませんでした (%s): %s", self.path, e)
+            return False
+        logger.info("GuildSettings: %dギルド分の設定を読み込みました (%s)", len(self._team_ids), self.path)
+        return True
+
+    async def save(self) -> None:
+        """設定をディスクに保存する (パス未設定の場合は何もしない)"""
+        if not self.path:
+            return
+        data = {"team_ids": {str(guild_id): team_id for guild_id, team_id in self._team_ids.items()}}
+        try:
+            await asyncio.to_thread(self._write_file, self.path, data)
+        except OSError as e:
+            logger.warning("GuildSettings: 設定ファイルを保存できませんでした (%s): %s", self.path, e)
+
+    @classmethod
+    def _update_file(cls, path: str, guild_id: int, team_id: int) -> Dict[int, int]:
+        """ロックを取ってファイルの1ギルド分を書き換え、書き込んだ内容を返す"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            team_ids: Dict[int, int] = {}
+            if os.path.exists(path):
+                try:
+                    data = cls._read_file(path)
+                    team_ids = {int(g): int(t) for g, t in data["team_ids"].items()}
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning("GuildSettings: 壊れた設定ファイルを作り直します (%s): %s", path, e)
+            team_ids[guild_id] = team_id
+            cls._write_file(path, {"team_ids": {str(g): t for g, t in team_ids.items()}})
+        return team_ids
+
+    @staticmethod
+    def _read_file(path: str) -> dict:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_file(path: str, data: dict) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
@@ -0,0 +1,210 @@
+import copy
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from .api_client import GameInfo, MLBClient
+
+logger = logging.getLogger(__name__)
+
+
+class JsonPatchError(ValueError):
+    """JSON Patch の適用に失敗した場合の例外"""
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    """JSON Pointer (RFC 6901) をトークンのリストに分解する"""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"不正なJSON Pointerです: {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def _resolve_parent(doc: Any, tokens: List[str]) -> Any:
+    target = doc
+    for token in tokens[:-1]:
+        try:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise JsonPatchError(f"パスが存在しません: /{'/'.join(tokens)}") from e
+    return target
+
+
+def _get(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        return doc
+    parent = _resolve_parent(doc, tokens)
+    key = tokens[-1]
+    try:
+        return parent[int(key)] if isinstance(parent, list) else parent[key]
+    except (KeyError, IndexError, ValueError, TypeError) as e:
+        raise JsonPatchError(f"パスが存在しません: /{'/'.join(tokens)}") from e
+
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("ルートは削除できません")
+    parent = _resolve_parent(doc, tokens)
+    key = tokens[-1]
+    try:
+        return parent.pop(int(key)) if isinstance(parent, list) else parent.pop(key)
+    except (KeyError, IndexError, ValueError, TypeError) as e:
+        raise JsonPatchError(f"削除対象が存在しません: /{'/'.join(tokens)}") from e
+
+
+def _add(doc: Any, tokens: List[str], value: Any, replace: bool = False) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve_parent(doc, tokens)
+    key = tokens[-1]
+    if isinstance(parent, list):
+        if key == "-":
+            parent.append(value)
+            return doc
+        try:
+            index = int(key)
+        except ValueError as e:
+            raise JsonPatchError(f"不正な配列インデックスです: {key!r}") from e
+        if replace:
+            if not 0 <= index < len(parent):
+                raise JsonPatchError(f"配列インデックスが範囲外です: {index}")
+            parent[index] = value
+        else:
+            if not 0 <= index <= len(parent):
+                raise JsonPatchError(f"配列インデックスが範囲外です: {index}")
+            parent.insert(index, value)
+    elif isinstance(parent, dict):
+        if replace and key not in parent:
+            raise JsonPatchError(f"置換対象が存在しません: /{'/'.join(tokens)}")
+        parent[key] = value
+    else:
+        raise JsonPatchError(f"値を追加できないパスです: /{'/'.join(tokens)}")
+    return doc
+
+
+def apply_json_patch(doc: Any, operations: List[Dict[str, Any]]) -> Any:
+    """JSON Patch (RFC 6902) の操作列をドキュメントにその場で適用する
+
+    Returns:
+        パッチ適用後のドキュメント (ルートを置き換える操作があるため戻り値を使うこと)
+
+    Raises:
+        JsonPatchError: 操作が不正、またはパスが存在しない場合
+    """
+    for op in operations:
+        kind = op.get("op")
+        tokens = _parse_pointer(op.get("path", ""))
+        if kind == "add":
+            doc = _add(doc, tokens, op["value"])
+        elif kind == "replace":
+            doc = _add(doc, tokens, op["value"], replace=True)
+        elif kind == "remove":
+            _remove(doc, tokens)
+        elif kind == "move":
+            value = _remove(doc, _parse_pointer(op["from"]))
+            doc = _add(doc, tokens, value)
+        elif kind == "copy":
+            value = copy.deepcopy(_get(doc, _parse_pointer(op["from"])))
+            doc = _add(doc, tokens, value)
+        elif kind == "test":
+            if _get(doc, tokens) != op.get("value"):
+                raise JsonPatchError(f"testに失敗しました: {op.get('path')}")
+        else:
+            raise JsonPatchError(f"未対応の操作です: {kind!r}")
+    return doc
+
+
+@dataclass(frozen=True)
+class LiveScore:
+    """プッシュ通知の差分判定に使うライブ試合の要約"""
+    status: str
+    away_score: int
+    home_score: int
+    inning: Optional[int] = None
+    inning_half: Optional[str] = None
+
+
+class LiveFeed:
+    """1試合分のライブフィード (feed/live) をローカルに保持する
+
+    初回のみフィード全体を取得し、以降は timestamps エンドポイントで更新の有無を確認して、
+    更新があれば diffPatch エンドポイントの差分 (JSON Patch) だけを適用する。
+    """
+
+    def __init__(self, game_pk: int):
+        self.game_pk = game_pk
+        self.doc: Optional[Dict[str, Any]] = None
+        self.timecode: Optional[str] = None
+        self.full_fetches = 0
+        self.diff_fetches = 0
+
+    async def update(self, client: MLBClient) -> bool:
+        """フィードを最新に更新する
+
+        Returns:
+            bool: フィードが更新された場合True
+        """
+        if self.doc is None or self.timecode is None:
+            await self._load_full(client)
+            return True
+
+        timestamps = await client.fetch_live_timestamps(self.game_pk)
+        if not timestamps or timestamps[-1] == self.timecode:
+            return False
+
+        diff = await client.fetch_live_diff(self.game_pk, self.timecode)
+        self.diff_fetches += 1
+        if isinstance(diff, dict):
+            # 差分が大きすぎる場合はフィード全体が返される
+            self._set_doc(diff)
+            return True
+
+        try:
+            doc = self.doc
+            for patch in diff:
+                doc = apply_json_patch(doc, patch.get("diff", []))
+            self._set_doc(doc)
+        except JsonPatchError as e:
+            logger.warning("LiveFeed: 差分の適用に失敗したため全体を再取得します (gamePk=%s): %s", self.game_pk, e)
+            await self._load_full(client)
+        return True
+
+    async def _load_full(self, client: MLBClient) -> None:
+        self.full_fetches += 1
+        self._set_doc(await client.fetch_live_feed(self.game_pk))
+
+    def _set_doc(self, doc: Dict[str, Any]) -> None:
+        self.doc = doc
+        self.timecode = doc.get("metaData", {}).get("timeStamp")
+
+    def score(self) -> Optional[LiveScore]:
+        """現在のスコア要約を返す (フィード未取得の場合はNone)"""
+        if self.doc is None:
+            return None
+        linescore = self.doc.get("liveData", {}).get("linescore", {})
+        teams = linescore.get("teams", {})
+        return LiveScore(
+            status=self.doc["gameData"]["status"]["detailedState"],
+            away_score=teams.get("away", {}).get("runs", 0),
+            home_score=teams.get("home", {}).get("runs", 0),
+            inning=linescore.get("currentInning"),
+            inning_half=linescore.get("inningHalf"),
+        )
+
+    def to_game_info(self) -> Optional[GameInfo]:
+        """フィードの内容を GameInfo に変換する (フィード未取得の場合はNone)"""
+        score = self.score()
+        if self.doc is None or score is None:
+            return None
+        game_data = self.doc["gameData"]
+        return GameInfo(
+            date=game_data["datetime"].get("officialDate", ""),
+            status=score.status,
+            home_team=game_data["teams"]["home"]["name"],
+            away_team=game_data["teams"]["away"]["name"],
+            venue=game_data["venue"]["name"],
+            game_time_utc=game_data["datetime"]["dateTime"],
+            home_score=str(score.home_score),
+            away_score=str(score.away_score),
+            game_pk=self.game_pk,
+        )
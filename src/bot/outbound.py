@@ -0,0 +1,240 @@
+"""Discordへの送信を一元化するディスパッチャ
+
+メッセージ送信のレート制限 (ルートバケット) はチャンネル単位なので、チャンネルごとにキューを持ち、
+1チャンネルにつき1つのワーカーが順番に送信する。キューは優先度付きで、コマンドへの返信 (interactive) を
+試合速報などの一斉配信 (broadcast) より先に送る。送信間隔はチャンネル単位とボット全体の
+トークンバケットで調整し、429 を受ける前に自分で待つ。
+
+同じチャンネルで数秒以内に同じ質問 (dedup_key) があった場合は、同じ回答を送り直さずに
+既存のメッセージへのリンクを返す。
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import discord
+from ..logs import CORRELATION_ID
+from ..metrics import (
+    DISCORD_SEND_DURATION, DISCORD_SEND_ERRORS, OUTBOUND_DEDUPLICATED, OUTBOUND_QUEUE_WAIT,
+)
+
+logger = logging.getLogger(__name__)
+
+# 優先度 (小さいほど先に送る)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BROADCAST = 1
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BROADCAST: "broadcast"}
+
+# チャンネルごとの送信レート (Discordの POST /channels/{id}/messages はおおむね5秒に5回)
+CHANNEL_RATE = 1.0
+CHANNEL_BURST = 5
+# ボット全体の送信レート (グローバルレート制限は毎秒50リクエスト)
+GLOBAL_RATE = 45.0
+GLOBAL_BURST = 45
+# 同じ質問への回答を再利用する秒数
+DEDUP_WINDOW = 5.0
+
+SendFunc = Callable[..., Awaitable[discord.Message]]
+
+
+class TokenBucket:
+    """送信間隔を調整するトークンバケット
+
+    reserve() は1トークンを予約し、送信してよい時刻までの待ち秒数を返す。
+    トークンが足りない場合は残量を負にして後続の予約を後ろにずらす。
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def reserve(self) -> float:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    send: SendFunc = field(compare=False)
+    args: Tuple[Any, ...] = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False)
+    kind: str = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: "asyncio.Future[discord.Message]" = field(compare=False)
+    # 送信を依頼したコマンドの相関ID (ワーカーはチャンネルごとに1つなので送信ごとに付け替える)
+    correlation_id: Optional[str] = field(default=None, compare=False)
+
+
+class _ChannelQueue:
+    """1チャンネル分の優先度付きキューと送信レート"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.jobs: List[_Job] = []
+        self.bucket = bucket
+        self.worker: Optional[asyncio.Task] = None
+
+
+class OutboundDispatcher:
+    """チャンネルごとの送信キューを管理する (DodgersBot が1つだけ所有する)"""
+
+    def __init__(
+        self,
+        *,
+        dedup_window: float = DEDUP_WINDOW,
+        channel_rate: float = CHANNEL_RATE,
+        channel_burst: int = CHANNEL_BURST,
+        global_rate: float = GLOBAL_RATE,
+        global_burst: int = GLOBAL_BURST,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.dedup_window = dedup_window
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self._clock = clock
+        self._queues: Dict[int, _ChannelQueue] = {}
+        self._global_bucket = TokenBucket(global_rate, global_burst, clock)
+        self._recent: Dict[Tuple[int, str], Tuple[float, "asyncio.Future[discord.Message]"]] = {}
+        self._seq = itertools.count()
+        self._closed = False
+
+    # --- 送信 ---
+
+    async def send(
+        self,
+        channel_id: int,
+        send: SendFunc,
+        *args: Any,
+        priority: int = PRIORITY_INTERACTIVE,
+        kind: str = "reply",
+        dedup_key: Optional[str] = None,
+        **kwargs: Any,
+    ) -> discord.Message:
+        """send(*args, **kwargs) をチャンネルのキューに入れ、送信されたメッセージを返す
+
+        Args:
+            channel_id: 送信先チャンネルのID (キューとレート制限の単位)
+            send: 実際に送信する関数 (例: channel.send)
+            priority: PRIORITY_INTERACTIVE または PRIORITY_BROADCAST
+            kind: メトリクスのラベル (reply/broadcast など)
+            dedup_key: 同じチャンネルで dedup_window 秒以内に同じキーの送信があれば、
+                送り直さずに既存のメッセージへのリンクを返す
+
+        Raises:
+            discord.HTTPException: 送信に失敗した場合
+        """
+        if self._closed:
+            raise RuntimeError("OutboundDispatcher はクローズされています")
+
+        if dedup_key is not None:
+            previous = self._lookup_recent(channel_id, dedup_key)
+            if previous is not None:
+                try:
+                    message = await asyncio.shield(previous)
+                except Exception:
+                    message = None
+                if message is not None:
+                    OUTBOUND_DEDUPLICATED.inc()
+                    pointer = f"↑ 同じ質問への回答はこちらです: {message.jump_url}"
+                    return await self._enqueue(channel_id, send, (pointer,), {}, priority, kind)
+
+        future = self._enqueue(channel_id, send, args, kwargs, priority, kind)
+        if dedup_key is not None:
+            self._recent[(channel_id, dedup_key)] = (self._clock(), future)
+        return await future
+
+    def _lookup_recent(self, channel_id: int, dedup_key: str) -> Optional["asyncio.Future[discord.Message]"]:
+        now = self._clock()
+        if len(self._recent) > 1024:
+            self._recent = {k: v for k, v in self._recent.items() if now - v[0] <= self.dedup_window}
+        entry = self._recent.get((channel_id, dedup_key))
+        if entry is None or now - entry[0] > self.dedup_window:
+            return None
+        return entry[1]
+
+    def _enqueue(self, channel_id: int, send: SendFunc, args: Tuple[Any, ...],
+                        kwargs: Dict[str, Any], priority: int, kind: str) -> "asyncio.Future[discord.Message]":
+        future: "asyncio.Future[discord.Message]" = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            queue = self._queues[channel_id] = _ChannelQueue(
+                TokenBucket(self.channel_rate, self.channel_burst, self._clock))
+        heapq.heappush(queue.jobs, _Job(
+            priority, next(self._seq), send, args, kwargs, kind, self._clock(), future, CORRELATION_ID.get()))
+        if queue.worker is None or queue.worker.done():
+            queue.worker = asyncio.create_task(self._run_channel(channel_id, queue))
+        return future
+
+    async def _run_channel(self, channel_id: int, queue: _ChannelQueue) -> None:
+        """キューが空になるまでチャンネルの送信を順番に処理する (空になったらワーカーは終了する)"""
+        while queue.jobs:
+            wait = max(queue.bucket.reserve(), self._global_bucket.reserve())
+            if wait > 0:
+                await asyncio.sleep(wait)
+            # 待っている間により優先度の高い送信が入っていればそれを先に送る
+            job = heapq.heappop(queue.jobs)
+            if job.future.done():
+                continue
+            OUTBOUND_QUEUE_WAIT.labels(priority=PRIORITY_NAMES.get(job.priority, "other")).observe(
+                self._clock() - job.enqueued_at)
+            token = CORRELATION_ID.set(job.correlation_id)
+            try:
+                with DISCORD_SEND_DURATION.labels(kind=job.kind).time():
+                    message = await job.send(*job.args, **job.kwargs)
+            except Exception as e:
+                if isinstance(e, discord.HTTPException):
+                    DISCORD_SEND_ERRORS.labels(kind=job.kind).inc()
+                if not job.future.done():
+                    job.future.set_exception(e)
+                continue
+            finally:
+                CORRELATION_ID.reset(token)
+            if not job.future.done():
+                job.future.set_result(message)
+        if self._queues.get(channel_id) is queue and not queue.jobs:
+            del self._queues[channel_id]
+
+    # --- 監視 ---
+
+    def depth(self, priority: Optional[int] = None) -> int:
+        """キューに溜まっている送信の数 (priority 指定時はその優先度のみ)"""
+        return sum(
+            1 for queue in self._queues.values() for job in queue.jobs
+            if priority is None or job.priority == priority
+        )
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "channels": len(self._queues),
+            "interactive": self.depth(PRIORITY_INTERACTIVE),
+            "broadcast": self.depth(PRIORITY_BROADCAST),
+        }
+
+    # --- 終了 ---
+
+    async def close(self) -> None:
+        """未送信のメッセージを破棄してワーカーを停止する"""
+        self._closed = True
+        queues = list(self._queues.values())
+        self._queues.clear()
+        for queue in queues:
+            for job in queue.jobs:
+                if not job.future.done():
+                    job.future.cancel()
+            queue.jobs.clear()
+            if queue.worker is not None:
+                queue.worker.cancel()
+        workers = [q.worker for q in queues if q.worker is not None]
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        self._recent.clear()
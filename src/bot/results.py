@@ -0,0 +1,227 @@
+"""終了した試合の結果を列指向で保持するストア (!dodgers stats などの集計用)
+
+チームごとに、終了した試合を日付順に並べた列 (array.array) を持つ。
+1試合はホーム・ビジターの2チームの列にそれぞれ1行ずつ追加する。
+集計は列全体に対する sum / itertools.compress などの組み込み関数 (C実装のループ) で行うため、
+シーズン全体 (1チーム162試合) の集計も数十マイクロ秒で終わり、上流へのリクエストは発生しない。
+
+成績はレギュラーシーズンの試合 (gameType が "R") だけで数える。
+試合は終了した時点で追加する (日程索引の更新時と、日程キャッシュが上流から取得した時)。
+同じ gamePk を再度追加した場合は、内容が変わっていれば (スコアの訂正など) その行を書き換える。
+"""
+import bisect
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from itertools import compress
+from typing import Dict, Iterable, Optional
+from .api_client import GameInfo
+
+# 成績に数える試合の状態 (中止・延期・サスペンデッドは数えない)
+COMPLETED_STATES = frozenset({"Final", "Game Over", "Completed Early"})
+# 成績に数える試合の種別 (レギュラーシーズンのみ。オープン戦・オールスター・ポストシーズンは数えない)
+REGULAR_SEASON = "R"
+# 直近の成績 (last-10) として数える試合数
+RECENT_GAMES = 10
+
+
+@dataclass
+class SeasonSummary:
+    """1チームのシーズン成績"""
+    team_id: int
+    games: int = 0
+    wins: int = 0
+    losses: int = 0
+    runs_scored: int = 0
+    runs_allowed: int = 0
+    home_wins: int = 0
+    home_losses: int = 0
+    away_wins: int = 0
+    away_losses: int = 0
+    last10_wins: int = 0
+    last10_losses: int = 0
+    # 直近の連勝・連敗 (例: "W3", "L2"。試合がなければ空文字)
+    streak: str = ""
+    # 直近 RECENT_GAMES 試合の勝敗 (古い順, "W"/"L"/"T")
+    recent: str = ""
+
+    @property
+    def run_differential(self) -> int:
+        return self.runs_scored - self.runs_allowed
+
+    @property
+    def win_pct(self) -> Optional[float]:
+        decided = self.wins + self.losses
+        return self.wins / decided if decided else None
+
+
+class _TeamColumns:
+    """1チーム分の列 (行は日付・試合番号の順)"""
+
+    __slots__ = ("order", "game_pk", "is_home", "won", "lost", "runs_for", "runs_against", "rows")
+
+    def __init__(self) -> None:
+        # 並び順のキー (日付の序数 * 10 + 試合番号)
+        self.order = array("q")
+        self.game_pk = array("q")
+        self.is_home = array("b")
+        self.won = array("b")
+        self.lost = array("b")
+        self.runs_for = array("h")
+        self.runs_against = array("h")
+        # gamePk → 行番号
+        self.rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.game_pk)
+
+    def put(self, order: int, game_pk: int, is_home: int, won: int, lost: int,
+            runs_for: int, runs_against: int) -> bool:
+        """行を追加または書き換える
+
+        Returns:
+            bool: 追加または内容が変わった場合True
+        """
+        values = (is_home, won, lost, runs_for, runs_against)
+        columns = (self.is_home, self.won, self.lost, self.runs_for, self.runs_against)
+        row = self.rows.get(game_pk)
+        if row is not None:
+            if self.order[row] == order and all(column[row] == value for column, value in zip(columns, values)):
+                return False
+            # 日付が変わった (サスペンデッドの再開など) 場合は並べ直すため一度取り除く
+            if self.order[row] != order:
+                self._delete(row)
+            else:
+                for column, value in zip(columns, values):
+                    column[row] = value
+                return True
+
+        if not self.order or order >= self.order[-1]:
+            # 新しく終わった試合は末尾に追加するだけで済む
+            self.order.append(order)
+            self.game_pk.append(game_pk)
+            for column, value in zip(columns, values):
+                column.append(value)
+            self.rows[game_pk] = len(self.game_pk) - 1
+            return True
+
+        row = bisect.bisect_right(self.order, order)
+        self.order.insert(row, order)
+        self.game_pk.insert(row, game_pk)
+        for column, value in zip(columns, values):
+            column.insert(row, value)
+        self._reindex(row)
+        return True
+
+    def _delete(self, row: int) -> None:
+        del self.rows[self.game_pk[row]]
+        for column in (self.order, self.game_pk, self.is_home, self.won, self.lost, self.runs_for, self.runs_against):
+            del column[row]
+        self._reindex(row)
+
+    def _reindex(self, start: int) -> None:
+        for row in range(start, len(self.game_pk)):
+            self.rows[self.game_pk[row]] = row
+
+
+class ResultsStore:
+    """終了した試合の結果の列指向ストア"""
+
+    def __init__(self) -> None:
+        self._teams: Dict[int, _TeamColumns] = {}
+        self._game_pks: set = set()
+
+    def __len__(self) -> int:
+        """保持している試合数"""
+        return len(self._game_pks)
+
+    def clear(self) -> None:
+        self._teams.clear()
+        self._game_pks.clear()
+
+    # --- 追加 ---
+
+    def add(self, game: GameInfo) -> bool:
+        """終了したレギュラーシーズンの試合を追加する (それ以外の試合・スコアがない試合は無視する)
+
+        Returns:
+            bool: 追加または内容が変わった場合True
+        """
+        if (
+            game.status not in COMPLETED_STATES or game.game_type != REGULAR_SEASON or game.game_pk is None
+            or game.home_score is None or game.away_score is None
+            or game.home_team_id is None or game.away_team_id is None
+        ):
+            return False
+        home_score, away_score = int(game.home_score), int(game.away_score)
+        winner = game.winner_team_id
+        if winner is None and home_score != away_score:
+            winner = game.home_team_id if home_score > away_score else game.away_team_id
+        order = date.fromisoformat(game.date).toordinal() * 10 + game.game_number
+
+        changed = False
+        for team_id, is_home, runs_for, runs_against in (
+            (game.home_team_id, 1, home_score, away_score),
+            (game.away_team_id, 0, away_score, home_score),
+        ):
+            columns = self._teams.get(team_id)
+            if columns is None:
+                columns = self._teams[team_id] = _TeamColumns()
+            won = int(winner == team_id)
+            lost = int(winner is not None and winner != team_id)
+            changed |= columns.put(order, game.game_pk, is_home, won, lost, runs_for, runs_against)
+        self._game_pks.add(game.game_pk)
+        return changed
+
+    def add_games(self, games: Iterable[GameInfo]) -> int:
+        """複数の試合を追加する
+
+        Returns:
+            int: 追加または内容が変わった試合の数
+        """
+        return sum(self.add(game) for game in games)
+
+    # --- 集計 ---
+
+    def summary(self, team_id: int) -> SeasonSummary:
+        """チームのシーズン成績 (勝敗・得失点・ホーム/ビジター別・直近10試合・連勝/連敗)"""
+        columns = self._teams.get(team_id)
+        if columns is None or not len(columns):
+            return SeasonSummary(team_id=team_id)
+
+        won, lost, is_home = columns.won, columns.lost, columns.is_home
+        wins, losses = sum(won), sum(lost)
+        home_wins, home_losses = sum(compress(won, is_home)), sum(compress(lost, is_home))
+        recent_won, recent_lost = won[-RECENT_GAMES:], lost[-RECENT_GAMES:]
+        return SeasonSummary(
+            team_id=team_id,
+            games=len(columns),
+            wins=wins,
+            losses=losses,
+            runs_scored=sum(columns.runs_for),
+            runs_allowed=sum(columns.runs_against),
+            home_wins=home_wins,
+            home_losses=home_losses,
+            away_wins=wins - home_wins,
+            away_losses=losses - home_losses,
+            last10_wins=sum(recent_won),
+            last10_losses=sum(recent_lost),
+            streak=self._streak(won, lost),
+            recent="".join("W" if w else "L" if l else "T" for w, l in zip(recent_won, recent_lost)),
+        )
+
+    @staticmethod
+    def _streak(won: array, lost: array) -> str:
+        last = len(won) - 1
+        if won[last]:
+            column, label = won, "W"
+        elif lost[last]:
+            column, label = lost, "L"
+        else:
+            return ""
+        count = 0
+        for row in range(last, -1, -1):
+            if not column[row]:
+                break
+            count += 1
+        return f"{label}{count}"
@@ -0,0 +1,268 @@
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from .api_client import GameInfo, MLBClient
+from .cache import FINAL_STATES
+from .results import ResultsStore
+from .teams import DEFAULT_TEAM_ID
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 4
+
+# 差分更新で取得する範囲 (今日からの相対日数)
+INCREMENTAL_DAYS_BEFORE = 3
+INCREMENTAL_DAYS_AFTER = 14
+# この秒数ごとにシーズン全体を取り直す (日程変更の取りこぼし対策)
+FULL_REFRESH_INTERVAL = 7 * 24 * 3600
+
+# ディスク上の1行 (配列) のフィールド順
+_ROW_FIELDS = (
+    "game_pk", "date", "status", "home_team", "away_team", "venue",
+    "game_time_utc", "home_score", "away_score", "game_number",
+    "home_team_id", "away_team_id", "winner_team_id", "game_type",
+)
+
+
+class ScheduleIndex:
+    """シーズンの試合日程をローカルに保持する索引
+
+    startDate/endDate 指定の1回のリクエストでリーグ全体のシーズン日程を取得して
+    gamePk・日付・チームIDで索引化し、コンパクトなJSON (1試合1配列) としてディスクに保存する。
+    以降は今日の前後数日分だけを定期的に取り直して差分をマージする。
+    日付指定・次の試合・直近の結果の問い合わせはネットワークを使わずに索引から答える。
+    終了した試合は results (列指向の結果ストア) にも追加し、シーズン成績の集計に使う。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.season: Optional[int] = None
+        self.full_refreshed_at: float = 0.0
+        self._games: Dict[int, GameInfo] = {}
+        self._by_date: Dict[str, List[int]] = {}
+        self._dates: List[str] = []
+        self._team_dates: Dict[int, List[str]] = {}
+        self.results = ResultsStore()
+        # 最後に読み込んだ・保存したファイルの更新時刻 (reload_if_changed で使う)
+        self._file_mtime: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    # --- 問い合わせ (ネットワークなし) ---
+
+    def get(self, game_pk: int) -> Optional[GameInfo]:
+        """gamePk で試合を取得する"""
+        return self._games.get(game_pk)
+
+    def games_on(self, day: date, team_id: int = DEFAULT_TEAM_ID) -> List[GameInfo]:
+        """指定チームの指定日の全試合 (ダブルヘッダーは第1試合から順) を返す"""
+        return [
+            game for game in (self._games[pk] for pk in self._by_date.get(day.isoformat(), ()))
+            if team_id in (game.home_team_id, game.away_team_id)
+        ]
+
+    def next_game(self, now: Optional[datetime] = None, team_id: int = DEFAULT_TEAM_ID) -> Optional[GameInfo]:
+        """指定チームのまだ終了していない直近の試合を返す"""
+        now = now or datetime.now(timezone.utc)
+        dates = self._team_dates.get(team_id, [])
+        start = bisect.bisect_left(dates, (now - timedelta(days=1)).date().isoformat())
+        for day in dates[start:]:
+            for game in self.games_on(date.fromisoformat(day), team_id):
+                if game.status not in FINAL_STATES:
+                    return game
+        return None
+
+    def last_results(self, count: int, today: Optional[date] = None, team_id: int = DEFAULT_TEAM_ID) -> List[GameInfo]:
+        """指定チームの今日以前に終了した試合を新しい順に最大 count 件返す"""
+        dates = self._team_dates.get(team_id, [])
+        end = bisect.bisect_right(dates, (today or date.today()).isoformat())
+        results: List[GameInfo] = []
+        for day in reversed(dates[:end]):
+            for game in reversed(self.games_on(date.fromisoformat(day), team_id)):
+                if game.status in FINAL_STATES and game.home_score is not None:
+                    results.append(game)
+                    if len(results) >= count:
+                        return results
+        return results
+
+    # --- 更新 ---
+
+    def merge(self, games: Iterable[GameInfo]) -> int:
+        """試合を追加・更新して索引を再構築する
+
+        Returns:
+            int: 追加または内容が変わった試合の数
+        """
+        changed = 0
+        for game in games:
+            if game.game_pk is None:
+                continue
+            previous = self._games.get(game.game_pk)
+            if previous != game:
+                self._games[game.game_pk] = game
+                self.results.add(game)
+                changed += 1
+        if changed:
+            self._rebuild()
+        return changed
+
+    def add_results(self, games: Iterable[GameInfo]) -> int:
+        """索引の外で取得した試合 (日程キャッシュの取得結果) のうち、索引のシーズンの試合を結果ストアに加える
+
+        別のシーズンの試合 (過去の日付の問い合わせなど) は集計に混ぜない。
+        シーズンが未確定 (索引の初回の全体取得前) の間は何もしない (全体取得で結果ストアは作り直される)。
+
+        Returns:
+            int: 追加または内容が変わった試合の数
+        """
+        if self.season is None:
+            return 0
+        prefix = f"{self.season:04d}-"
+        return self.results.add_games(game for game in games if game.date.startswith(prefix))
+
+    def _rebuild(self) -> None:
+        by_date: Dict[str, List[int]] = {}
+        team_dates: Dict[int, set] = {}
+        for pk, game in self._games.items():
+            by_date.setdefault(game.date, []).append(pk)
+            for team_id in (game.home_team_id, game.away_team_id):
+                if team_id is not None:
+                    team_dates.setdefault(team_id, set()).add(game.date)
+        for pks in by_date.values():
+            pks.sort(key=lambda pk: (self._games[pk].game_number, self._games[pk].game_time_utc))
+        self._by_date = by_date
+        self._dates = sorted(by_date)
+        self._team_dates = {team_id: sorted(days) for team_id, days in team_dates.items()}
+
+    async def refresh(self, client: MLBClient, today: Optional[date] = None) -> int:
+        """索引を更新し、変更があればディスクに保存する
+
+        索引が空・シーズンが変わった・前回の全体取得から FULL_REFRESH_INTERVAL 経過した場合は
+        シーズン全体を、それ以外は今日の前後数日分だけを取得する。
+
+        Returns:
+            int: 追加または内容が変わった試合の数
+        """
+        today = today or date.today()
+        full = (
+            not self._games
+            or self.season != today.year
+            or time.time() - self.full_refreshed_at > FULL_REFRESH_INTERVAL
+        )
+        if full:
+            start, end = date(today.year, 1, 1), date(today.year, 12, 31)
+        else:
+            start = today - timedelta(days=INCREMENTAL_DAYS_BEFORE)
+            end = today + timedelta(days=INCREMENTAL_DAYS_AFTER)
+
+        games = await client.fetch_schedule_range(start, end)
+        if full and self.season != today.year:
+            # シーズンが変わったら前シーズンの試合は破棄する
+            self._games.clear()
+            self.results.clear()
+            self._rebuild()
+        changed = self.merge(games)
+        if full:
+            self.season = today.year
+            self.full_refreshed_at = time.time()
+        logger.info(
+            "ScheduleIndex: %s更新 %s〜%s (%d試合取得, %d件変更, 合計%d試合)",
+            "全体" if full else "差分", start, end, len(games), changed, len(self._games),
+        )
+        if changed or full:
+            await self.save()
+        return changed
+
+    # --- 永続化 ---
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_FORMAT_VERSION,
+            "season": self.season,
+            "full_refreshed_at": self.full_refreshed_at,
+            "fields": list(_ROW_FIELDS),
+            "games": [
+                [getattr(game, name) for name in _ROW_FIELDS]
+                for game in self._games.values()
+            ],
+        }
+
+    def load_dict(self, data: dict) -> None:
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"未対応の索引フォーマットです: {data.get('version')}")
+        self.season = data.get("season")
+        self.full_refreshed_at = data.get("full_refreshed_at", 0.0)
+        self._games = {}
+        for row in data["games"]:
+            game = GameInfo(**dict(zip(_ROW_FIELDS, row)))
+            self._games[game.game_pk] = game
+        self._rebuild()
+        self.results.clear()
+        self.results.add_games(self._games.values())
+
+    async def load(self) -> bool:
+        """ディスクから索引を読み込む
+
+        Returns:
+            bool: 読み込めた場合True (ファイルがない・壊れている場合はFalse)
+        """
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            data = await asyncio.to_thread(self._read_file, self.path)
+            self.load_dict(data)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("ScheduleIndex: 索引ファイルを読み込めませんでした (%s): %s", self.path, e)
+            return False
+        self._file_mtime = mtime
+        logger.info("ScheduleIndex: %d試合を読み込みました (%s)", len(self._games), self.path)
+        return True
+
+    async def reload_if_changed(self) -> bool:
+        """他のプロセスが索引ファイルを更新していれば読み込み直す
+
+        Returns:
+            bool: 読み込み直した場合True
+        """
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._file_mtime:
+            return False
+        return await self.load()
+
+    async def save(self) -> None:
+        """索引をディスクに保存する (パス未設定の場合は何もしない)"""
+        if not self.path:
+            return
+        try:
+            await asyncio.to_thread(self._write_file, self.path, self.to_dict())
+            self._file_mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            logger.warning("ScheduleIndex: 索引ファイルを保存できませんでした (%s): %s", self.path, e)
+
+    @staticmethod
+    def _read_file(path: str) -> dict:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_file(path: str, data: dict) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 複数プロセスが同時に保存しても一時ファイルが衝突しないようにする
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
@@ -0,0 +1,335 @@
+"""ボットの定期ジョブをまとめて実行するスケジューラ
+
+Cog ごとに tasks.loop を持つ代わりに、ジョブ (日程索引の更新・ライブ更新のポーリング・keep-alive など) を
+1つのスケジューラに登録する。1つのループが次に実行時刻を迎えるジョブを待ち、ジョブごとのタスクとして実行する。
+
+- 実行間隔にはゆらぎ (jitter) を加え、複数プロセスのジョブが同じ時刻に揃わないようにする
+- 1回の実行には締め切り (deadline) を設け、超えたら打ち切って timeout として数える
+- 外部へのリクエストを伴うジョブは見積もり (cost) を宣言し、全ジョブ共通の予算 (RequestBudget) から差し引く。
+  予算が足りなければその回は実行せずスキップとして数え、予算が戻る時刻に再試行する。
+  実行後は実際に送った MLB API へのリクエスト数との差を予算に反映する
+- ボットの準備が必要なジョブ (requires_ready) は on_ready まで実行しない
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+from .api_client import count_requests
+from ..logs import correlation_scope, new_correlation_id
+from ..metrics import BACKGROUND_TASK_DURATION, BACKGROUND_TASK_RUNS, BACKGROUND_TASK_SKIPS
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[], Awaitable[None]]
+
+# 外部へのリクエストの予算 (1分あたりの回数) と、まとめて使える上限
+DEFAULT_REQUEST_BUDGET = 30.0
+DEFAULT_BUDGET_BURST = 10
+# 実行間隔に加えるゆらぎの既定値 (間隔に対する割合, ±)
+DEFAULT_JITTER = 0.1
+
+
+class RequestBudget:
+    """全ジョブで共有する外部リクエストの予算 (トークンバケット)
+
+    outbound.TokenBucket と違い、足りない場合は予約せずに待ち秒数だけを返す (ジョブはその回をスキップする)。
+    """
+
+    def __init__(self, per_minute: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst)
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self.used = 0
+        self.denied = 0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, cost: float) -> float:
+        """cost 分の予算を使う
+
+        Returns:
+            float: 使えた場合は0、足りない場合は使えるようになるまでの秒数
+        """
+        self._refill()
+        if self._tokens >= cost:
+            self._tokens -= cost
+            self.used += int(cost)
+            return 0.0
+        self.denied += 1
+        if self.rate <= 0:
+            return float("inf")
+        return (cost - self._tokens) / self.rate
+
+    def settle(self, charged: float, actual: int) -> None:
+        """見積もり (try_acquire 済みの cost) と実際に送ったリクエスト数の差を反映する
+
+        見積もりより多く送った分は追加で差し引き (残りが負になれば、その分だけ後のジョブが待つ)、
+        少なかった分は返す。
+        """
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + charged - actual)
+        self.used += actual - int(charged)
+
+    def snapshot(self) -> Dict[str, float]:
+        self._refill()
+        return {
+            "per_minute": self.rate * 60.0,
+            "available": round(self._tokens, 2),
+            "used": self.used,
+            "denied": self.denied,
+        }
+
+
+@dataclass
+class JobStats:
+    """ジョブごとの実行結果の集計"""
+    runs: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    skips: Dict[str, int] = field(default_factory=dict)
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    last_duration: Optional[float] = None
+    # 予定時刻から実際に始まるまでの遅れ (秒)
+    last_delay: Optional[float] = None
+    last_outcome: Optional[str] = None
+    # 実際に送った MLB API へのリクエスト数 (合計と前回の実行)
+    requests: int = 0
+    last_requests: Optional[int] = None
+
+
+@dataclass
+class Job:
+    """スケジューラに登録されたジョブ"""
+    name: str
+    func: JobFunc = field(repr=False)
+    interval: float
+    jitter: float = DEFAULT_JITTER
+    deadline: Optional[float] = None
+    cost: float = 0.0
+    requires_ready: bool = True
+    next_run: float = 0.0
+    running: bool = False
+    stats: JobStats = field(default_factory=JobStats)
+    task: Optional["asyncio.Task[None]"] = field(default=None, repr=False)
+
+
+class Scheduler:
+    """ボットの定期ジョブを1つのループで実行するスケジューラ"""
+
+    def __init__(
+        self,
+        *,
+        request_budget: float = DEFAULT_REQUEST_BUDGET,
+        budget_burst: int = DEFAULT_BUDGET_BURST,
+        is_ready: Callable[[], bool] = lambda: True,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[float, float], float] = random.uniform,
+    ):
+        self.budget = RequestBudget(request_budget, budget_burst, clock)
+        self._is_ready = is_ready
+        self._clock = clock
+        self._rng = rng
+        self._jobs: Dict[str, Job] = {}
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def get(self, name: str) -> Optional[Job]:
+        return self._jobs.get(name)
+
+    # --- 登録 ---
+
+    def add_job(
+        self,
+        name: str,
+        func: JobFunc,
+        *,
+        interval: float,
+        jitter: float = DEFAULT_JITTER,
+        deadline: Optional[float] = None,
+        cost: float = 0.0,
+        requires_ready: bool = True,
+        initial_delay: float = 0.0,
+    ) -> Job:
+        """ジョブを登録する (同じ名前のジョブは置き換える)
+
+        Args:
+            interval: 実行間隔 (秒, 前回の実行が終わってから数える)
+            jitter: 実行間隔に加えるゆらぎ (間隔に対する割合, ±)
+            deadline: 1回の実行の締め切り (秒, 省略時は無制限)
+            cost: 1回の実行で使う外部リクエスト数の見積もり (0 の場合は予算を使わない)
+            requires_ready: ボットの準備完了まで実行しない場合True
+            initial_delay: 最初の実行までの秒数
+        """
+        self.remove_job(name)
+        job = Job(
+            name=name, func=func, interval=interval, jitter=jitter, deadline=deadline,
+            cost=cost, requires_ready=requires_ready, next_run=self._clock() + initial_delay,
+        )
+        self._jobs[name] = job
+        self.wake()
+        return job
+
+    def remove_job(self, name: str) -> bool:
+        """ジョブの登録を解除する (実行中の場合はキャンセルする)"""
+        job = self._jobs.pop(name, None)
+        if job is None:
+            return False
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+        return True
+
+    def set_interval(self, name: str, interval: float) -> None:
+        """ジョブの実行間隔を変える
+
+        実行中でなければ、次回の実行時刻も新しい間隔に合わせて早める (遅くはしない)。
+        """
+        job = self._jobs.get(name)
+        if job is None or job.interval == interval:
+            return
+        job.interval = interval
+        if not job.running:
+            job.next_run = min(job.next_run, self._clock() + interval)
+            self.wake()
+
+    def wake(self) -> None:
+        """待機中のループを起こして実行時刻を計算し直させる (on_ready の後など)"""
+        self._wakeup.set()
+
+    # --- 実行 ---
+
+    def start(self) -> None:
+        """スケジューラのループを開始する (イベントループ上で呼び出す)"""
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run(), name="Scheduler")
+
+    async def close(self) -> None:
+        """ループと実行中のジョブを止める"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        if self._runner is not None:
+            tasks.append(self._runner)
+            self._runner = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+            ready = self._is_ready()
+            timeout: Optional[float] = None
+            for job in list(self._jobs.values()):
+                if job.running or (job.requires_ready and not ready):
+                    continue
+                if job.next_run <= now:
+                    self._dispatch(job, now)
+                if not job.running:
+                    wait = max(0.0, job.next_run - now)
+                    timeout = wait if timeout is None else min(timeout, wait)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self, job: Job, now: float) -> None:
+        charged = job.cost
+        if charged:
+            wait = self.budget.try_acquire(charged)
+            if wait > 0:
+                # 予算が戻る時刻 (ただし通常の間隔より遅くはしない) に再試行する
+                self._skip(job, "budget")
+                job.next_run = now + min(wait, job.interval)
+                return
+        job.stats.last_delay = now - job.next_run
+        job.running = True
+        job.task = asyncio.create_task(self._execute(job, charged), name=f"Scheduler:{job.name}")
+
+    def _skip(self, job: Job, reason: str) -> None:
+        job.stats.skips[reason] = job.stats.skips.get(reason, 0) + 1
+        BACKGROUND_TASK_SKIPS.labels(task=job.name, reason=reason).inc()
+        logger.info("ジョブ %s をスキップしました (%s)", job.name, reason)
+
+    async def _execute(self, job: Job, charged: float) -> None:
+        start = time.perf_counter()
+        outcome = "error"
+        requests = [0]
+        try:
+            # 1回の実行ごとに相関IDを付け、その実行中のログ (取得・配信) をまとめて追えるようにする
+            # 送ったリクエストも数え、終わった後に見積もりとの差を予算に反映する
+            with correlation_scope(new_correlation_id(job.name)), count_requests() as requests:
+                await asyncio.wait_for(job.func(), timeout=job.deadline)
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            logger.warning("ジョブ %s が締め切り (%s秒) までに終わらなかったため打ち切りました。", job.name, job.deadline)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception:
+            logger.exception("ジョブ %s の実行中にエラーが発生しました", job.name)
+        finally:
+            job.running = False
+            job.task = None
+            if charged or requests[0]:
+                self.budget.settle(charged, requests[0])
+            job.stats.requests += requests[0]
+            job.stats.last_requests = requests[0]
+            if outcome != "cancelled":
+                self._record(job, outcome, time.perf_counter() - start)
+                job.next_run = self._clock() + self._next_delay(job)
+                self.wake()
+
+    def _record(self, job: Job, outcome: str, duration: float) -> None:
+        stats = job.stats
+        stats.runs += 1
+        stats.errors += outcome == "error"
+        stats.timeouts += outcome == "timeout"
+        stats.total_duration += duration
+        stats.max_duration = max(stats.max_duration, duration)
+        stats.last_duration = duration
+        stats.last_outcome = outcome
+        BACKGROUND_TASK_DURATION.labels(task=job.name).observe(duration)
+        BACKGROUND_TASK_RUNS.labels(task=job.name, outcome=outcome).inc()
+
+    def _next_delay(self, job: Job) -> float:
+        if not job.jitter:
+            return job.interval
+        return max(0.0, job.interval * (1.0 + self._rng(-job.jitter, job.jitter)))
+
+    # --- 状態 ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """予算とジョブごとの実行回数・所要時間・スキップ数"""
+        now = self._clock()
+        jobs = {}
+        for name, job in sorted(self._jobs.items()):
+            stats = job.stats
+            jobs[name] = {
+                "interval": job.interval,
+                "cost": job.cost,
+                "running": job.running,
+                "next_run_in": None if job.running else round(max(0.0, job.next_run - now), 3),
+                "runs": stats.runs,
+                "errors": stats.errors,
+                "timeouts": stats.timeouts,
+                "skips": dict(stats.skips),
+                "last_outcome": stats.last_outcome,
+                "last_duration": stats.last_duration,
+                "avg_duration": stats.total_duration / stats.runs if stats.runs else None,
+                "max_duration": stats.max_duration,
+                "last_delay": stats.last_delay,
+                "requests": stats.requests,
+                "last_requests": stats.last_requests,
+            }
+        return {"budget": self.budget.snapshot(), "jobs": jobs}
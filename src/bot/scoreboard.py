@@ -0,0 +1,185 @@
+"""ライブスコアボード
+
+チャンネルごとに1つの埋め込みメッセージを送信し、以降は試合の変化に合わせてそのメッセージを編集する。
+描画結果は試合状態ごとにキャッシュし、内容が変わらない編集は送らない。短時間に続いた更新は
+チャンネルごとに最新の1件にまとめ、Discordのチャンネル単位の編集レート制限を超えないように間隔を空ける。
+送信・編集はボットの送信キュー (OutboundDispatcher) に一斉配信と同じ優先度で入れ、コマンドへの返信より後に送る。
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+import discord
+from .api_client import GameInfo
+from .outbound import OutboundDispatcher, PRIORITY_BROADCAST
+from .utils import format_scoreboard_embed
+from ..metrics import SCOREBOARD_UPDATES
+
+logger = logging.getLogger(__name__)
+
+# 同じチャンネルのメッセージを編集する最小間隔 (秒)
+# Discordのチャンネル単位のレート制限 (おおむね5秒に5回) より十分に緩くしておく
+MIN_EDIT_INTERVAL = 2.0
+# 一時的なエラー (429 / 5xx) で編集に失敗したときの再試行間隔の上限 (秒, 失敗が続くごとに倍にする)
+MAX_RETRY_INTERVAL = 60.0
+# 描画結果をキャッシュする試合状態の数
+RENDER_CACHE_SIZE = 64
+
+RenderKey = Tuple
+
+
+def scoreboard_key(game: GameInfo, inning: Optional[int] = None, inning_half: Optional[str] = None) -> RenderKey:
+    """スコアボードの表示内容を決める値の組 (試合状態のバージョン) を返す"""
+    return (
+        game.game_pk, game.date, game.status, game.away_team, game.home_team,
+        game.away_score, game.home_score, game.venue, game.game_time_utc,
+        inning, inning_half,
+    )
+
+
+class ScoreboardRenderer:
+    """試合状態ごとに埋め込みの描画結果をキャッシュする (LRU)
+
+    同じ試合状態は全チャンネルで同じ埋め込みを使い回すため、描画は状態が変わったときに1回だけ行われる。
+    返す埋め込みは共有されるので、呼び出し側で変更してはいけない。
+    """
+
+    def __init__(self, max_size: int = RENDER_CACHE_SIZE):
+        self.max_size = max_size
+        self._cache: "OrderedDict[RenderKey, discord.Embed]" = OrderedDict()
+
+    def render(self, game: GameInfo, inning: Optional[int] = None,
+               inning_half: Optional[str] = None) -> Tuple[RenderKey, discord.Embed]:
+        key = scoreboard_key(game, inning, inning_half)
+        embed = self._cache.get(key)
+        if embed is not None:
+            self._cache.move_to_end(key)
+            return key, embed
+        embed = format_scoreboard_embed(game, inning, inning_half)
+        self._cache[key] = embed
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return key, embed
+
+
+@dataclass
+class ChannelScoreboard:
+    """1チャンネル分のスコアボードの状態"""
+    channel_id: int
+    message: Optional[discord.Message] = None
+    rendered_key: Optional[RenderKey] = None
+    pending: Optional[Tuple[RenderKey, discord.Embed]] = None
+    last_edit: float = 0.0
+    # 続けて一時的なエラーになった回数 (再試行の間隔に使う)
+    failures: int = 0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class ScoreboardManager:
+    """チャンネルごとのスコアボードメッセージを管理し、編集をまとめて送る"""
+
+    def __init__(self, outbound: OutboundDispatcher, *, min_edit_interval: float = MIN_EDIT_INTERVAL,
+                 renderer: Optional[ScoreboardRenderer] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.outbound = outbound
+        self.min_edit_interval = min_edit_interval
+        self.renderer = renderer or ScoreboardRenderer()
+        self._clock = clock
+        self.boards: Dict[int, ChannelScoreboard] = {}
+
+    def __len__(self) -> int:
+        return len(self.boards)
+
+    def get_message(self, channel_id: int) -> Optional[discord.Message]:
+        board = self.boards.get(channel_id)
+        return board.message if board else None
+
+    async def post(self, channel: discord.abc.Messageable, channel_id: int, game: GameInfo,
+                   inning: Optional[int] = None, inning_half: Optional[str] = None) -> discord.Message:
+        """チャンネルにスコアボードを送信する (既にあればそのメッセージを更新して返す)"""
+        board = self.boards.get(channel_id)
+        if board is not None and board.message is not None:
+            self._schedule(board, *self.renderer.render(game, inning, inning_half))
+            return board.message
+
+        key, embed = self.renderer.render(game, inning, inning_half)
+        message = await self.outbound.send(
+            channel_id, channel.send, embed=embed, priority=PRIORITY_BROADCAST, kind="scoreboard")
+        self.boards[channel_id] = ChannelScoreboard(
+            channel_id=channel_id, message=message, rendered_key=key, last_edit=self._clock(),
+        )
+        return message
+
+    def update_all(self, game: GameInfo, inning: Optional[int] = None, inning_half: Optional[str] = None) -> None:
+        """全チャンネルのスコアボードを試合の最新状態に更新する (編集はバックグラウンドで送られる)"""
+        if not self.boards:
+            return
+        key, embed = self.renderer.render(game, inning, inning_half)
+        for board in list(self.boards.values()):
+            self._schedule(board, key, embed)
+
+    def remove(self, channel_id: int) -> bool:
+        """チャンネルのスコアボードの更新を止める (メッセージ自体は残す)"""
+        board = self.boards.pop(channel_id, None)
+        if board is None:
+            return False
+        if board.task is not None:
+            board.task.cancel()
+        return True
+
+    def close(self) -> None:
+        for channel_id in list(self.boards):
+            self.remove(channel_id)
+
+    def _schedule(self, board: ChannelScoreboard, key: RenderKey, embed: discord.Embed) -> None:
+        if key == board.rendered_key and board.pending is None:
+            SCOREBOARD_UPDATES.labels(outcome="unchanged").inc()
+            return
+        if board.pending is not None:
+            # まだ送っていない更新は最新のものに置き換える
+            SCOREBOARD_UPDATES.labels(outcome="coalesced").inc()
+        board.pending = (key, embed)
+        if board.task is None or board.task.done():
+            board.task = asyncio.create_task(self._flush(board))
+
+    async def _flush(self, board: ChannelScoreboard) -> None:
+        while board.pending is not None:
+            wait = board.last_edit + self.min_edit_interval - self._clock()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            key, embed = board.pending
+            board.pending = None
+            if key == board.rendered_key or board.message is None:
+                SCOREBOARD_UPDATES.labels(outcome="unchanged").inc()
+                continue
+            board.last_edit = self._clock()
+            try:
+                # 所要時間と送信エラーの数は送信キューが記録する
+                await self.outbound.send(
+                    board.channel_id, board.message.edit, embed=embed, priority=PRIORITY_BROADCAST, kind="scoreboard")
+            except (discord.Forbidden, discord.NotFound):
+                SCOREBOARD_UPDATES.labels(outcome="error").inc()
+                # メッセージが削除された・権限がなくなったチャンネルは更新をやめる
+                self.boards.pop(board.channel_id, None)
+                logger.warning("チャンネル %d のスコアボードを編集できないため更新を停止しました。", board.channel_id)
+                return
+            except discord.HTTPException as e:
+                SCOREBOARD_UPDATES.labels(outcome="error").inc()
+                if e.status != 429 and e.status < 500:
+                    logger.error("チャンネル %d のスコアボードの編集に失敗しました: %s", board.channel_id, e)
+                    continue
+                # 一時的なエラーは、より新しい更新が来ていなければ同じ内容を間隔を空けて送り直す
+                # (最終スコアのように以降の更新がない場合も表示が古いまま残らないようにする)
+                if board.pending is None:
+                    board.pending = (key, embed)
+                board.failures += 1
+                retry_after = min(self.min_edit_interval * 2 ** board.failures, MAX_RETRY_INTERVAL)
+                board.last_edit = self._clock() + retry_after - self.min_edit_interval
+                logger.warning("チャンネル %d のスコアボードの編集に失敗しました (%.0f秒後に再試行): %s",
+                               board.channel_id, retry_after, e)
+                continue
+            board.failures = 0
+            board.rendered_key = key
+            SCOREBOARD_UPDATES.labels(outcome="edited").inc()
@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Team:
+    """MLB球団の情報を保持するデータクラス"""
+    id: int
+    name: str
+    short_name: str
+    abbreviation: str
+    aliases: Tuple[str, ...] = ()
+
+
+# ドジャース (既定のチーム)
+DEFAULT_TEAM_ID = 119
+
+MLB_TEAMS: Tuple[Team, ...] = (
+    Team(108, "Los Angeles Angels", "Angels", "LAA", ("ANA",)),
+    Team(109, "Arizona Diamondbacks", "D-backs", "AZ", ("ARI", "Diamondbacks")),
+    Team(110, "Baltimore Orioles", "Orioles", "BAL"),
+    Team(111, "Boston Red Sox", "Red Sox", "BOS"),
+    Team(112, "Chicago Cubs", "Cubs", "CHC"),
+    Team(113, "Cincinnati Reds", "Reds", "CIN"),
+    Team(114, "Cleveland Guardians", "Guardians", "CLE"),
+    Team(115, "Colorado Rockies", "Rockies", "COL"),
+    Team(116, "Detroit Tigers", "Tigers", "DET"),
+    Team(117, "Houston Astros", "Astros", "HOU"),
+    Team(118, "Kansas City Royals", "Royals", "KC", ("KCR",)),
+    Team(119, "Los Angeles Dodgers", "Dodgers", "LAD"),
+    Team(120, "Washington Nationals", "Nationals", "WSH", ("WAS", "Nats")),
+    Team(121, "New York Mets", "Mets", "NYM"),
+    Team(133, "Athletics", "Athletics", "ATH", ("OAK", "A's")),
+    Team(134, "Pittsburgh Pirates", "Pirates", "PIT"),
+    Team(135, "San Diego Padres", "Padres", "SD", ("SDP",)),
+    Team(136, "Seattle Mariners", "Mariners", "SEA"),
+    Team(137, "San Francisco Giants", "Giants", "SF", ("SFG",)),
+    Team(138, "St. Louis Cardinals", "Cardinals", "STL"),
+    Team(139, "Tampa Bay Rays", "Rays", "TB", ("TBR",)),
+    Team(140, "Texas Rangers", "Rangers", "TEX"),
+    Team(141, "Toronto Blue Jays", "Blue Jays", "TOR"),
+    Team(142, "Minnesota Twins", "Twins", "MIN"),
+    Team(143, "Philadelphia Phillies", "Phillies", "PHI"),
+    Team(144, "Atlanta Braves", "Braves", "ATL"),
+    Team(145, "Chicago White Sox", "White Sox", "CWS", ("CHW",)),
+    Team(146, "Miami Marlins", "Marlins", "MIA"),
+    Team(147, "New York Yankees", "Yankees", "NYY"),
+    Team(158, "Milwaukee Brewers", "Brewers", "MIL"),
+)
+
+TEAMS_BY_ID: Dict[int, Team] = {team.id: team for team in MLB_TEAMS}
+
+# 略称・愛称・正式名称 (小文字) からチームへの対応表
+_TEAMS_BY_KEY: Dict[str, Team] = {}
+for _team in MLB_TEAMS:
+    for _key in (_team.abbreviation, _team.short_name, _team.name, *_team.aliases):
+        _TEAMS_BY_KEY[_key.lower()] = _team
+
+
+def get_team(team_id: int) -> Optional[Team]:
+    """チームIDからチームを取得する"""
+    return TEAMS_BY_ID.get(team_id)
+
+
+def find_team(query: str) -> Optional[Team]:
+    """略称・愛称・正式名称・チームIDのいずれかからチームを探す
+
+    完全一致がない場合は、名称の一部に一致するチームが1つだけならそれを返す。
+
+    Args:
+        query: 検索文字列 (例: "LAD", "dodgers", "119", "Los Angeles Dodgers")
+
+    Returns:
+        Optional[Team]: 見つかったチーム (見つからない・曖昧な場合はNone)
+    """
+    key = query.strip().lower()
+    if not key:
+        return None
+    if key.isdigit():
+        return TEAMS_BY_ID.get(int(key))
+    if key in _TEAMS_BY_KEY:
+        return _TEAMS_BY_KEY[key]
+    candidates = {team for team in MLB_TEAMS if key in team.name.lower()}
+    return candidates.pop() if len(candidates) == 1 else None
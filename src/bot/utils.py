@@ -1,7 +1,14 @@
-from datetime import datetime, timezone, timedelta
-from typing import Optional
+import logging
+from datetime import date, datetime, timezone, timedelta
+from typing import TYPE_CHECKING, List, Optional
 from .api_client import GameInfo
 
+if TYPE_CHECKING:
+    import discord
+    from .results import SeasonSummary
+
+logger = logging.getLogger(__name__)
+
 def utc_to_jst(utc_time_str: str) -> str:
     """UTC時間文字列を日本時間(JST)に変換する
     
@@ -18,9 +25,29 @@ def utc_to_jst(utc_time_str: str) -> str:
         jst_time = utc_time.astimezone(timezone(timedelta(hours=9)))
         return jst_time.strftime('%Y年%m月%d日 %H:%M')
     except ValueError as e:
-        print(f"時間変換エラー: {e}")
+        logger.warning("時間変換エラー: %s", e)
         return "時間情報なし"
 
+def parse_date(text: str, today: Optional[date] = None) -> date:
+    """コマンド引数の日付文字列を date に変換する
+    
+    Args:
+        text: "YYYY-MM-DD", "MM-DD" または "MM/DD" 形式の文字列 (年省略時は今年)
+        today: 年を補うための基準日 (省略時は今日)
+    
+    Returns:
+        date: 変換された日付
+    
+    Raises:
+        ValueError: 解析できない場合
+    """
+    parts = text.strip().replace("/", "-").split("-")
+    if len(parts) == 3:
+        return date(int(parts[0]), int(parts[1]), int(parts[2]))
+    if len(parts) == 2:
+        return date((today or date.today()).year, int(parts[0]), int(parts[1]))
+    raise ValueError(f"日付として解析できません: {text}")
+
 def format_score(game: GameInfo) -> str:
     """試合のスコア情報をフォーマットする
     
@@ -37,11 +64,12 @@ def format_score(game: GameInfo) -> str:
     away_score = game.away_score or "?"
     return f" ({game.away_team} {away_score} - {home_score} {game.home_team})"
 
-def format_game_info(game: GameInfo) -> str:
+def format_game_info(game: GameInfo, title: str = "今日のドジャースの試合") -> str:
     """試合情報をDiscordメッセージ用にフォーマットする
     
     Args:
         game: 試合情報
+        title: 見出し (日付の前に表示される)
     
     Returns:
         str: フォーマットされたメッセージ
@@ -50,9 +78,116 @@ def format_game_info(game: GameInfo) -> str:
     game_time = utc_to_jst(game.game_time_utc)
     
     return (
-        f"⚾ **今日のドジャースの試合 ({game.date})** ⚾\n"
+        f"⚾ **{title} ({game.date})** ⚾\n"
         f"対戦: {game.away_team} @ {game.home_team}\n"
         f"球場: {game.venue}\n"
         f"状態: {game.status}{score_info}\n"
         f"開始時刻 (日本時間): {game_time}"
-    )
\ No newline at end of file
+    )
+
+def format_live_update(game: GameInfo, inning: Optional[int] = None, inning_half: Optional[str] = None) -> str:
+    """ライブ更新の通知メッセージをフォーマットする
+    
+    Args:
+        game: 試合情報
+        inning: 現在のイニング (不明な場合はNone)
+        inning_half: "Top" または "Bottom" (不明な場合はNone)
+    
+    Returns:
+        str: フォーマットされたメッセージ
+    """
+    inning_info = ""
+    if inning is not None and game.status not in ("Final", "Game Over"):
+        half = {"Top": "表", "Bottom": "裏"}.get(inning_half or "", "")
+        inning_info = f" {inning}回{half}"
+    
+    return (
+        f"📣 **{game.away_team} {game.away_score or 0} - {game.home_score or 0} {game.home_team}**\n"
+        f"状態: {game.status}{inning_info}"
+    )
+
+def format_scoreboard_embed(game: GameInfo, inning: Optional[int] = None, inning_half: Optional[str] = None) -> "discord.Embed":
+    """試合情報をスコアボード用の埋め込みにフォーマットする
+    
+    Args:
+        game: 試合情報
+        inning: 現在のイニング (不明な場合はNone)
+        inning_half: "Top" または "Bottom" (不明な場合はNone)
+    
+    Returns:
+        discord.Embed: スコアボードの埋め込み
+    """
+    status = game.status
+    if inning is not None and game.status not in ("Final", "Game Over"):
+        half = {"Top": "表", "Bottom": "裏"}.get(inning_half or "", "")
+        status = f"{status} {inning}回{half}"
+    
+    # APIサーバー (/game, /interactions) は日付・試合の整形だけを使うので、discord.py はここで初めて import する
+    import discord
+
+    embed = discord.Embed(
+        title=f"⚾ {game.away_team} @ {game.home_team}",
+        description=f"{game.date} / {game.venue}",
+        color=0x005A9C,  # ドジャーブルー
+    )
+    if format_score(game):
+        embed.add_field(name=game.away_team, value=game.away_score or "0", inline=True)
+        embed.add_field(name=game.home_team, value=game.home_score or "0", inline=True)
+    embed.add_field(name="状態", value=status, inline=False)
+    embed.add_field(name="開始時刻 (日本時間)", value=utc_to_jst(game.game_time_utc), inline=False)
+    return embed
+
+
+def format_games(games: List[GameInfo], title: str = "ドジャースの試合") -> str:
+    """同じ日の試合 (ダブルヘッダーを含む) をまとめてフォーマットする
+    
+    Args:
+        games: 試合情報のリスト (第1試合から順)
+        title: 見出し
+    
+    Returns:
+        str: フォーマットされたメッセージ
+    """
+    if len(games) == 1:
+        return format_game_info(games[0], title)
+    return "\n\n".join(
+        format_game_info(game, f"{title} 第{game.game_number}試合") for game in games
+    )
+
+
+def format_result_line(game: GameInfo) -> str:
+    """終了した試合を1行の結果としてフォーマットする
+    
+    Args:
+        game: 試合情報
+    
+    Returns:
+        str: "MM/DD アウェイ 2 - 5 ホーム (状態)" 形式の文字列
+    """
+    month_day = game.date[5:].replace("-", "/")
+    return (
+        f"{month_day} {game.away_team} {game.away_score} - "
+        f"{game.home_score} {game.home_team} ({game.status})"
+    )
+
+
+def format_season_summary(summary: "SeasonSummary", team_name: str) -> str:
+    """シーズン成績をフォーマットする
+    
+    Args:
+        summary: ResultsStore.summary() の結果
+        team_name: 見出しに使うチーム名
+    
+    Returns:
+        str: 勝敗・得失点・ホーム/ビジター別・直近10試合の成績
+    """
+    pct = f"{summary.win_pct:.3f}".lstrip("0") if summary.win_pct is not None else "---"
+    streak = f" ({summary.streak})" if summary.streak else ""
+    return (
+        f"📊 **{team_name} のシーズン成績** 📊\n"
+        f"成績: {summary.wins}勝{summary.losses}敗 (勝率 {pct}, {summary.games}試合)\n"
+        f"得失点: {summary.runs_scored} - {summary.runs_allowed} ({summary.run_differential:+d})\n"
+        f"ホーム: {summary.home_wins}勝{summary.home_losses}敗 / "
+        f"ビジター: {summary.away_wins}勝{summary.away_losses}敗\n"
+        f"直近10試合: {summary.last10_wins}勝{summary.last10_losses}敗 {summary.recent}{streak}"
+    )
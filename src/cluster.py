@@ -0,0 +1,344 @@
+"""クラスタモード (BOT_RUN_MODE=cluster)
+
+1つのランチャー (FastAPIサーバーのプロセス) がシャードの範囲を複数のワーカープロセスに割り振り、
+各ワーカーは担当シャードだけに接続する DodgersBot (AutoShardedBot) を動かす。
+
+- statsapi へのリクエストはワーカーから直接送らず、ランチャーの共有キャッシュ (SharedMLBCache) を経由する。
+  同じURLへのリクエストはプロセスをまたいで1回の上流呼び出しにまとまる
+- ワーカーは SHARD_REPORT_INTERVAL 秒ごとにシャードごとの遅延・ギルド数をランチャーへ報告し、
+  ランチャーは GET /shards と /metrics で公開する
+- ランチャーとワーカー間の内部エンドポイントは起動ごとに生成する秘密のパス (/internal/{secret}/...) で保護する
+"""
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import secrets
+import signal
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+import aiohttp
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from src.bot.api_client import MLBClient
+from src.logs import setup_logging, setup_logging_from_config, shutdown_logging
+from src.metrics import SHARD_GUILDS, SHARD_LATENCY
+
+if TYPE_CHECKING:
+    from src.bot.core import DodgersBot
+
+logger = logging.getLogger(__name__)
+
+MLB_UPSTREAM_BASE = "https://statsapi.mlb.com"
+# ワーカーがシャードの状態を報告する間隔 (秒)
+SHARD_REPORT_INTERVAL = 15.0
+# READY になるまでの報告間隔 (秒)
+READY_REPORT_INTERVAL = 1.0
+# 共有キャッシュのTTL (パスの末尾で判定, 上から順に評価)
+HUB_CACHE_TTLS: Tuple[Tuple[str, float], ...] = (
+    ("/feed/live/timestamps", 2.0),
+    ("/feed/live/diffPatch", 2.0),
+    ("/feed/live", 5.0),
+)
+HUB_DEFAULT_TTL = 10.0
+HUB_MAX_ENTRIES = 256
+
+
+def shard_ranges(shard_count: int, processes: int) -> List[List[int]]:
+    """シャード 0..shard_count-1 を processes 個の連続した範囲に分ける (端数は前のプロセスに寄せる)"""
+    processes = max(1, min(processes, shard_count))
+    per_process, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for index in range(processes):
+        size = per_process + (1 if index < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def hub_client_kwargs(hub_url: str, secret: str) -> Dict[str, str]:
+    """ランチャーの共有キャッシュを向く MLBClient のエンドポイント引数を返す"""
+    base = f"{hub_url}/internal/{secret}/mlb"
+    return {
+        "endpoint": f"{base}/api/v1/schedule?sportId=1&date={{date}}",
+        "range_endpoint": f"{base}/api/v1/schedule?sportId=1&startDate={{start}}&endDate={{end}}",
+        "live_feed_endpoint": f"{base}/api/v1.1/game/{{game_pk}}/feed/live",
+    }
+
+
+async def fetch_recommended_shards(token: str) -> Tuple[int, int]:
+    """GET /gateway/bot から推奨シャード数と IDENTIFY の max_concurrency を取得する"""
+    from discord.http import Route
+
+    url = f"{Route.BASE}/gateway/bot"
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, headers={"Authorization": f"Bot {token}"}) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"], data.get("session_start_limit", {}).get("max_concurrency", 1)
+
+
+class SharedMLBCache:
+    """クラスタ内の全プロセスで共有する statsapi のレスポンスキャッシュ (ランチャーが持つ)
+
+    レスポンスの本文をURLごとに短時間保持し、同じURLへの同時リクエストは1回の上流呼び出しにまとめる。
+    日程の解釈やTTLの細かい制御は各ワーカーの ScheduleCache が行うので、ここでは本文をそのまま返す。
+    """
+
+    def __init__(self, client: MLBClient, upstream_base: str = MLB_UPSTREAM_BASE,
+                 *, clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.upstream_base = upstream_base.rstrip("/")
+        self._clock = clock
+        self._entries: Dict[str, Tuple[float, bytes]] = {}
+        self._inflight: Dict[str, "asyncio.Task[bytes]"] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def ttl_for(path: str) -> float:
+        for suffix, ttl in HUB_CACHE_TTLS:
+            if path.endswith(suffix):
+                return ttl
+        return HUB_DEFAULT_TTL
+
+    async def get(self, path: str, query: str = "") -> bytes:
+        """statsapi の path?query のレスポンス本文を返す
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: 上流へのリクエストが失敗した場合
+        """
+        key = f"{path}?{query}" if query else path
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() < entry[0]:
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch(key, self.ttl_for(path)))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, ttl: float) -> bytes:
+        body = await self.client.get_bytes(self.upstream_base + key, "cluster_hub")
+        now = self._clock()
+        if len(self._entries) >= HUB_MAX_ENTRIES:
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+        self._entries[key] = (now + ttl, body)
+        return body
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "entries": len(self._entries), "inflight": len(self._inflight)}
+
+
+class ClusterHub:
+    """ランチャー側の状態 (共有キャッシュとワーカーからのシャード報告)"""
+
+    def __init__(self, cache: SharedMLBCache, secret: Optional[str] = None,
+                 *, clock: Callable[[], float] = time.time):
+        self.cache = cache
+        self.secret = secret or secrets.token_urlsafe(24)
+        self._clock = clock
+        self._reports: Dict[int, Dict[str, Any]] = {}
+
+    def record(self, cluster_id: int, report: Dict[str, Any]) -> None:
+        self._reports[cluster_id] = {**report, "cluster_id": cluster_id, "received_at": self._clock()}
+        for shard in report.get("shards", []):
+            label = str(shard["shard_id"])
+            SHARD_GUILDS.labels(shard=label).set(shard["guilds"])
+            latency = shard.get("latency")
+            SHARD_LATENCY.labels(shard=label).set(latency if latency is not None else math.nan)
+
+    def shards(self) -> List[Dict[str, Any]]:
+        """全ワーカーの最新の報告をシャードごとに並べて返す (報告が古いものは stale)"""
+        now = self._clock()
+        shards = []
+        for cluster_id, report in sorted(self._reports.items()):
+            stale = now - report["received_at"] > SHARD_REPORT_INTERVAL * 3
+            for shard in report.get("shards", []):
+                shards.append({**shard, "cluster_id": cluster_id, "pid": report.get("pid"), "stale": stale})
+        return sorted(shards, key=lambda shard: shard["shard_id"])
+
+    def ready_clusters(self) -> int:
+        """READY になったと報告してきた (報告が古くない) ワーカーの数"""
+        now = self._clock()
+        return sum(
+            1 for report in self._reports.values()
+            if report.get("ready") and now - report["received_at"] <= SHARD_REPORT_INTERVAL * 3
+        )
+
+    def startup(self) -> Dict[int, Any]:
+        """ワーカーごとの起動フェーズの所要時間 (ワーカーが報告したもの)"""
+        return {cluster_id: report.get("startup", {}) for cluster_id, report in sorted(self._reports.items())}
+
+
+router = APIRouter()
+
+
+def _get_hub(request: Request, secret: str) -> ClusterHub:
+    hub: Optional[ClusterHub] = getattr(request.app.state, "cluster", None)
+    if hub is None or not secrets.compare_digest(secret, hub.secret):
+        raise HTTPException(status_code=404)
+    return hub
+
+
+@router.get("/internal/{secret}/mlb/{path:path}", include_in_schema=False)
+async def mlb_proxy(secret: str, path: str, request: Request) -> Response:
+    """ワーカーからの statsapi リクエストを共有キャッシュ経由で処理する"""
+    hub = _get_hub(request, secret)
+    try:
+        body = await hub.cache.get(f"/{path}", request.url.query)
+    except aiohttp.ClientResponseError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        raise HTTPException(status_code=502, detail="statsapi へのリクエストに失敗しました")
+    return Response(content=body, media_type="application/json")
+
+
+@router.post("/internal/{secret}/shards/{cluster_id}", include_in_schema=False)
+async def report_shards(secret: str, cluster_id: int, request: Request) -> dict:
+    """ワーカーからのシャードの状態報告を受け付ける"""
+    hub = _get_hub(request, secret)
+    hub.record(cluster_id, await request.json())
+    return {"status": "ok"}
+
+
+class ClusterLauncher:
+    """シャードの範囲ごとにワーカープロセスを起動・停止する"""
+
+    def __init__(self, shard_count: int, processes: int, hub_url: str, secret: str, *, identify_concurrency: int = 1):
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, processes)
+        self.hub_url = hub_url
+        self.secret = secret
+        self.identify_concurrency = max(1, identify_concurrency)
+        self.processes: List[multiprocessing.process.BaseProcess] = []
+
+    async def start(self) -> None:
+        """ワーカーを順に起動する
+
+        IDENTIFY のレート制限はプロセスをまたいで共有されるため、前のワーカーが自分のシャードを
+        IDENTIFY し終えるまでの時間だけ間を空けて次のワーカーを起動する。
+        """
+        from src.bot.core import IDENTIFY_INTERVAL
+
+        context = multiprocessing.get_context("spawn")
+        for cluster_id, shard_ids in enumerate(self.ranges):
+            process = context.Process(
+                target=run_cluster_worker,
+                args=(cluster_id, shard_ids, self.shard_count, self.hub_url, self.secret, self.identify_concurrency),
+                name=f"DodgersCluster-{cluster_id}",
+            )
+            process.start()
+            self.processes.append(process)
+            logger.info("クラスタ %d を起動しました: shards=%d-%d pid=%s", cluster_id, shard_ids[0], shard_ids[-1], process.pid)
+            if cluster_id < len(self.ranges) - 1:
+                await asyncio.sleep(IDENTIFY_INTERVAL * math.ceil(len(shard_ids) / self.identify_concurrency))
+
+    async def stop(self, timeout: float) -> None:
+        """全ワーカーに SIGTERM を送り、最大 timeout 秒待っても終わらなければ強制終了する"""
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                logger.warning("%s が終了しないため強制終了します。", process.name)
+                process.kill()
+                await asyncio.to_thread(process.join, 1.0)
+        self.processes.clear()
+
+
+def run_cluster_worker(cluster_id: int, shard_ids: Sequence[int], shard_count: int,
+                       hub_url: str, secret: str, identify_concurrency: int) -> None:
+    """ワーカープロセスのエントリーポイント (ランチャーから spawn される)"""
+    # 設定を読むまでは既定の設定で、全レコードにクラスタIDを付ける
+    setup_logging(static_fields={"cluster": cluster_id})
+    try:
+        asyncio.run(_run_worker(cluster_id, list(shard_ids), shard_count, hub_url, secret, identify_concurrency))
+    finally:
+        # キューに残ったレコードを書き出してから終了する
+        shutdown_logging()
+
+
+async def _run_worker(cluster_id: int, shard_ids: List[int], shard_count: int,
+                      hub_url: str, secret: str, identify_concurrency: int) -> None:
+    from src.startup import STARTUP
+
+    with STARTUP.phase("import_bot"):
+        from src.bot.core import DodgersBot, configure_discord_endpoints, default_intents
+    with STARTUP.phase("config"):
+        from src.config import config
+        config.load()
+    setup_logging_from_config(config, {"cluster": cluster_id})
+
+    configure_discord_endpoints(config.DISCORD_API_BASE, config.DISCORD_GATEWAY_URL)
+    mlb_client = MLBClient(
+        **hub_client_kwargs(hub_url, secret),
+        timeout=config.MLB_API_TIMEOUT,
+        max_concurrency=config.MLB_API_MAX_CONCURRENCY,
+        max_retries=config.MLB_API_MAX_RETRIES,
+    )
+    bot = DodgersBot(
+        intents=default_intents(config.MESSAGE_CONTENT_INTENT),
+        mlb_client=mlb_client,
+        schedule_index_path=config.SCHEDULE_INDEX_PATH,
+        guild_settings_path=config.GUILD_SETTINGS_PATH,
+        shard_ids=shard_ids,
+        shard_count=shard_count,
+        identify_concurrency=identify_concurrency,
+        guild_ready_timeout=config.GUILD_READY_TIMEOUT,
+        # keep-alive はランチャーのヘルスチェックへ、最初のワーカーだけが送る
+        keep_alive_url=f"{hub_url}/" if cluster_id == 0 else None,
+        # 日程索引の更新も最初のワーカーだけが行い、他のワーカーは保存された索引ファイルを読み直す
+        schedule_index_owner=cluster_id == 0,
+        request_budget=config.SCHEDULER_REQUEST_BUDGET,
+        timeline=STARTUP,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    bot_task = asyncio.create_task(bot.start(config.DISCORD_BOT_TOKEN), name="DiscordBot")
+    reporter = asyncio.create_task(_report_shards(bot, f"{hub_url}/internal/{secret}/shards/{cluster_id}"))
+    stop_task = asyncio.create_task(stop.wait())
+    try:
+        await asyncio.wait({bot_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        if bot_task.done() and bot_task.exception() is not None:
+            logger.error("ボットが異常終了しました", exc_info=bot_task.exception())
+    finally:
+        logger.info("クラスタ %d を終了します。", cluster_id)
+        reporter.cancel()
+        stop_task.cancel()
+        if not bot.is_closed():
+            await bot.drain(config.SHUTDOWN_DRAIN_TIMEOUT)
+            await bot.close()
+
+
+async def _report_shards(bot: "DodgersBot", url: str, interval: float = SHARD_REPORT_INTERVAL) -> None:
+    """シャードの状態を定期的にランチャーへ報告する
+
+    READY になるまでは READY_REPORT_INTERVAL 秒ごとに報告し、ランチャーの /readyz にすぐ反映させる。
+    """
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+        while True:
+            ready = bot.is_ready()
+            report = {"pid": os.getpid(), "ready": ready, "shards": bot.shard_stats(), "startup": bot.timeline.snapshot()}
+            try:
+                async with session.post(url, data=json.dumps(report), headers={"Content-Type": "application/json"}) as response:
+                    if response.status >= 400:
+                        logger.warning("シャードの状態報告に失敗しました: HTTP %d", response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("シャードの状態報告に失敗しました: %s", e)
+            await asyncio.sleep(interval if ready else min(interval, READY_REPORT_INTERVAL))
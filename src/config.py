@@ -1,36 +1,117 @@
 import os
-from typing import Optional
-from dotenv import load_dotenv
+from types import SimpleNamespace
+from typing import Dict, Optional
 
 class Config:
-    """アプリケーション設定を管理するクラス"""
+    """アプリケーション設定を管理するクラス
+
+    import 時には何もせず、最初に設定値を参照したとき (または load() を呼んだとき) に
+    .env と環境変数を読み込んで検証する。
+    """
     
     _instance = None
+    _loaded = False
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance._load_config()
         return cls._instance
+
+    def __getattr__(self, name: str):
+        # 読み込み前に設定値が参照されたら、その時点で読み込む
+        if name.startswith('_') or self._loaded:
+            raise AttributeError(name)
+        self.load()
+        return getattr(self, name)
+
+    def load(self) -> "Config":
+        """設定を読み込む (読み込み済みの場合は何もしない)
+
+        Raises:
+            ValueError: 必須の設定がない・値が不正な場合
+        """
+        if not self._loaded:
+            self._load_config()
+            self._loaded = True
+        return self
     
     def _load_config(self) -> None:
-        """環境変数を読み込む"""
+        """環境変数を読み込む
+
+        値はいったんローカルの settings に集め、全ての検証を通った後でまとめて設定する
+        (途中で ValueError になっても、読み込みかけの値が残らないようにする)。
+        """
+        from dotenv import load_dotenv
+        from .logs import parse_logger_rules
+
         load_dotenv()
+        settings = SimpleNamespace()
         
+        # ログ設定
+        settings.LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO').upper()
+        # json (1行1レコードの構造化ログ) / text (従来の1行テキスト)
+        settings.LOG_FORMAT: str = os.getenv('LOG_FORMAT', 'json').lower()
+        if settings.LOG_FORMAT not in ('json', 'text'):
+            raise ValueError(f"LOG_FORMAT は json / text のいずれかを指定してください: {settings.LOG_FORMAT}")
+        # ロガーごとの間引き率 (例: "discord.gateway=0.1,uvicorn.access=0.01")
+        settings.LOG_SAMPLE_RATES: Dict[str, float] = parse_logger_rules(os.getenv('LOG_SAMPLE_RATES'))
+        # ロガーごとの流量制限 (1秒あたりのレコード数, 例: "discord=20")
+        settings.LOG_RATE_LIMITS: Dict[str, float] = parse_logger_rules(os.getenv('LOG_RATE_LIMITS'))
+
         # Discord Bot設定
-        self.DISCORD_BOT_TOKEN: Optional[str] = os.getenv('DISCORD_BOT_TOKEN')
-        if not self.DISCORD_BOT_TOKEN:
+        settings.DISCORD_BOT_TOKEN: Optional[str] = os.getenv('DISCORD_BOT_TOKEN')
+        if not settings.DISCORD_BOT_TOKEN:
             raise ValueError("DISCORD_BOT_TOKENが設定されていません")
+        # プレフィックスコマンド (!dodgers など) に必要な message_content インテントを要求するか
+        settings.MESSAGE_CONTENT_INTENT: bool = os.getenv('MESSAGE_CONTENT_INTENT', 'true').lower() in ('1', 'true', 'yes')
+
+        # Discord の REST / ゲートウェイの接続先 (ローカルの偽ゲートウェイで試験する場合のみ設定する)
+        settings.DISCORD_API_BASE: Optional[str] = os.getenv('DISCORD_API_BASE')
+        settings.DISCORD_GATEWAY_URL: Optional[str] = os.getenv('DISCORD_GATEWAY_URL')
+
+        # スラッシュコマンド (Interactions エンドポイント) 設定
+        # 公開鍵を設定すると POST /interactions が有効になる
+        settings.DISCORD_PUBLIC_KEY: Optional[str] = os.getenv('DISCORD_PUBLIC_KEY')
+        # スラッシュコマンドの登録 (python -m src.interactions) に使う
+        settings.DISCORD_APPLICATION_ID: Optional[str] = os.getenv('DISCORD_APPLICATION_ID')
         
         # サーバー設定
-        self.PORT: int = int(os.getenv('PORT', '8000'))
+        settings.PORT: int = int(os.getenv('PORT', '8000'))
+        # ボットの動かし方: integrated (APIサーバーと同じイベントループ) / thread (別スレッド)
+        # / none (ボットを動かさず、APIとスラッシュコマンドだけを処理するワーカー)
+        # / cluster (シャードを複数のワーカープロセスに割り振る)
+        settings.BOT_RUN_MODE: str = os.getenv('BOT_RUN_MODE', 'integrated').lower()
+        if settings.BOT_RUN_MODE not in ('integrated', 'thread', 'none', 'cluster'):
+            raise ValueError(f"BOT_RUN_MODE は integrated / thread / none / cluster のいずれかを指定してください: {settings.BOT_RUN_MODE}")
+        # シャード数 (0 の場合は Discord の推奨値)
+        settings.SHARD_COUNT: int = int(os.getenv('SHARD_COUNT', '0'))
+        # クラスタモードで起動するワーカープロセス数
+        settings.CLUSTER_PROCESSES: int = int(os.getenv('CLUSTER_PROCESSES', '2'))
+        # 同時に IDENTIFY できるバケット数 (0 の場合は Discord の値, 分からなければ1)
+        settings.IDENTIFY_MAX_CONCURRENCY: int = int(os.getenv('IDENTIFY_MAX_CONCURRENCY', '0'))
+        # ゲートウェイ接続後、ギルド情報 (GUILD_CREATE) を待ってから on_ready とみなすまでの秒数
+        settings.GUILD_READY_TIMEOUT: float = float(os.getenv('GUILD_READY_TIMEOUT', '2.0'))
+        # 定期ジョブ (日程索引の更新・ライブ更新のポーリング) が上流へ送るリクエストの予算 (1分あたり)
+        settings.SCHEDULER_REQUEST_BUDGET: float = float(os.getenv('SCHEDULER_REQUEST_BUDGET', '30'))
+        # 終了時に実行中のコマンドの完了を待つ最大秒数
+        settings.SHUTDOWN_DRAIN_TIMEOUT: float = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', '10'))
         
         # MLB API設定
-        self.MLB_API_ENDPOINT: str = os.getenv(
+        settings.MLB_API_ENDPOINT: str = os.getenv(
             'MLB_API_ENDPOINT',
-            'https://statsapi.mlb.com/api/v1/schedule?sportId=1&teamId=119&date={date}'
+            'https://statsapi.mlb.com/api/v1/schedule?sportId=1&date={date}'
         )
-    
+        settings.MLB_API_TIMEOUT: float = float(os.getenv('MLB_API_TIMEOUT', '10'))
+        settings.MLB_API_MAX_CONCURRENCY: int = int(os.getenv('MLB_API_MAX_CONCURRENCY', '8'))
+        settings.MLB_API_MAX_RETRIES: int = int(os.getenv('MLB_API_MAX_RETRIES', '2'))
+
+        # 日程索引の保存先
+        settings.SCHEDULE_INDEX_PATH: str = os.getenv('SCHEDULE_INDEX_PATH', 'data/schedule_index.json')
+        # ギルドごとの設定 (お気に入りチーム) の保存先
+        settings.GUILD_SETTINGS_PATH: str = os.getenv('GUILD_SETTINGS_PATH', 'data/guild_settings.json')
+
+        vars(self).update(vars(settings))
+
     @property
     def is_valid(self) -> bool:
         """設定が有効かどうかを確認する"""
@@ -40,5 +121,5 @@ class Config:
             self.MLB_API_ENDPOINT is not None
         ])
 
-# 設定インスタンスをグローバルに公開
+# 設定インスタンスをグローバルに公開 (読み込みは最初の参照時)
 config = Config()
\ No newline at end of file
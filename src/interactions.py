@@ -0,0 +1,246 @@
+"""Discord Interactions (HTTP) エンドポイント
+
+スラッシュコマンド `/dodgers` を FastAPI の `POST /interactions` で受け付ける。
+ゲートウェイ接続を持たないので、複数の uvicorn ワーカーで横に並べてコマンドを処理できる
+(ゲートウェイ側のプロセスはイベント処理だけを担当する)。
+
+リクエストは Discord の公開鍵 (DISCORD_PUBLIC_KEY) で Ed25519 署名を検証してから処理する。
+Discord は3秒以内の応答を求めるため、INTERACTION_DEFER_AFTER 秒以内に答えが出れば即時応答し、
+間に合わなければ「考え中」(deferred) を返して、答えが出た時点で元の応答を編集する。
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import aiohttp
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+from src.bot.api_client import GameInfo
+from src.bot.teams import DEFAULT_TEAM_ID
+from src.bot.utils import format_games, parse_date
+from src.logs import correlation_scope, setup_logging_from_config
+from src.metrics import COMMAND_DURATION, COMMANDS, INTERACTION_RESPONSES
+
+logger = logging.getLogger(__name__)
+
+DISCORD_API_BASE = "https://discord.com/api/v10"
+
+# Interaction の種類
+INTERACTION_PING = 1
+INTERACTION_APPLICATION_COMMAND = 2
+# 応答の種類
+RESPONSE_PONG = 1
+RESPONSE_CHANNEL_MESSAGE = 4
+RESPONSE_DEFERRED_CHANNEL_MESSAGE = 5
+# 本人にだけ見えるメッセージ
+FLAG_EPHEMERAL = 1 << 6
+
+# この秒数以内に答えが出なければ deferred 応答に切り替える (Discordの期限は3秒)
+INTERACTION_DEFER_AFTER = 2.0
+# 署名のタイムスタンプとして許容するずれ (秒, 再送攻撃対策)
+MAX_TIMESTAMP_SKEW = 300
+
+# 登録するスラッシュコマンド (PUT /applications/{id}/commands の本文)
+SLASH_COMMANDS: List[Dict[str, Any]] = [
+    {
+        "name": "dodgers",
+        "description": "ドジャースの試合情報を表示します",
+        "type": 1,
+        "options": [
+            {
+                "name": "date",
+                "description": "日付 (YYYY-MM-DD / MM-DD, 省略時は今日)",
+                "type": 3,
+                "required": False,
+            },
+        ],
+    },
+]
+
+TeamGamesLookup = Callable[[int, date], Awaitable[List[GameInfo]]]
+
+
+class InteractionService:
+    """署名の検証とスラッシュコマンドの処理を行う
+
+    試合情報は get_team_games から引く (同じプロセスでボットが動いていればボットのキャッシュ、
+    そうでなければワーカー自身の日程キャッシュ)。
+    """
+
+    def __init__(
+        self,
+        public_key: str,
+        get_team_games: TeamGamesLookup,
+        *,
+        defer_after: float = INTERACTION_DEFER_AFTER,
+        api_base: str = DISCORD_API_BASE,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._verify_key = VerifyKey(bytes.fromhex(public_key))
+        self._get_team_games = get_team_games
+        self.defer_after = defer_after
+        self.api_base = api_base
+        self._clock = clock
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._followups: Set[asyncio.Task] = set()
+
+    # --- 署名 ---
+
+    def verify(self, signature: str, timestamp: str, body: bytes) -> bool:
+        """X-Signature-Ed25519 / X-Signature-Timestamp ヘッダーと本文の署名を検証する"""
+        try:
+            if abs(self._clock() - int(timestamp)) > MAX_TIMESTAMP_SKEW:
+                return False
+            self._verify_key.verify(timestamp.encode() + body, bytes.fromhex(signature))
+        except (BadSignatureError, ValueError):
+            return False
+        return True
+
+    # --- 処理 ---
+
+    async def handle(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """検証済みの Interaction を処理して応答 (JSON) を返す"""
+        if payload.get("type") == INTERACTION_PING:
+            return {"type": RESPONSE_PONG}
+        if payload.get("type") != INTERACTION_APPLICATION_COMMAND:
+            raise HTTPException(status_code=400, detail="未対応の Interaction です")
+
+        name = payload.get("data", {}).get("name")
+        if name != "dodgers":
+            INTERACTION_RESPONSES.labels(response="error").inc()
+            return _message(f"未対応のコマンドです: /{name}", ephemeral=True)
+
+        started = time.perf_counter()
+        # 処理と deferred 応答の編集のログに Interaction のIDを相関IDとして付ける
+        with correlation_scope(f"int-{payload.get('id')}"):
+            return await self._respond(payload, started)
+
+    async def _respond(self, payload: Dict[str, Any], started: float) -> Dict[str, Any]:
+        task = asyncio.create_task(self._dodgers(payload))
+        try:
+            content = await asyncio.wait_for(asyncio.shield(task), timeout=self.defer_after)
+        except asyncio.TimeoutError:
+            # 間に合わないので先に deferred を返し、答えが出たら元の応答を編集する
+            followup = asyncio.create_task(self._follow_up(payload, task, started))
+            self._followups.add(followup)
+            followup.add_done_callback(self._followups.discard)
+            INTERACTION_RESPONSES.labels(response="deferred").inc()
+            return {"type": RESPONSE_DEFERRED_CHANNEL_MESSAGE}
+        except Exception:
+            logger.exception("/dodgers の処理中にエラーが発生しました")
+            self._record("/dodgers", started, ok=False)
+            INTERACTION_RESPONSES.labels(response="error").inc()
+            return _message("試合情報の取得中にエラーが発生しました。", ephemeral=True)
+
+        self._record("/dodgers", started, ok=True)
+        INTERACTION_RESPONSES.labels(response="immediate").inc()
+        return _message(content)
+
+    async def _dodgers(self, payload: Dict[str, Any]) -> str:
+        """/dodgers [date] の返信内容を作る"""
+        options = {o["name"]: o.get("value") for o in payload.get("data", {}).get("options", [])}
+        date_text = options.get("date")
+        if date_text:
+            try:
+                day = parse_date(date_text)
+            except ValueError:
+                return "日付は YYYY-MM-DD または MM-DD の形式で指定してください。"
+            title, missing = "ドジャースの試合", f"{day.isoformat()} のドジャースの試合情報が見つかりませんでした。"
+        else:
+            day = date.today()
+            title, missing = "今日のドジャースの試合", "今日のドジャースの試合情報が見つかりませんでした。"
+
+        games = await self._get_team_games(DEFAULT_TEAM_ID, day)
+        return format_games(games, title) if games else missing
+
+    async def _follow_up(self, payload: Dict[str, Any], task: "asyncio.Task[str]", started: float) -> None:
+        try:
+            content = await task
+            ok = True
+        except Exception:
+            logger.exception("/dodgers の処理中にエラーが発生しました (deferred)")
+            content, ok = "試合情報の取得中にエラーが発生しました。", False
+        self._record("/dodgers", started, ok=ok)
+
+        url = f"{self.api_base}/webhooks/{payload['application_id']}/{payload['token']}/messages/@original"
+        try:
+            async with self._get_session().patch(url, json={"content": content}) as response:
+                if response.status >= 400:
+                    logger.error("deferred 応答の編集に失敗しました: HTTP %d", response.status)
+        except aiohttp.ClientError as e:
+            logger.error("deferred 応答の編集に失敗しました: %s", e)
+
+    @staticmethod
+    def _record(command: str, started: float, *, ok: bool) -> None:
+        COMMAND_DURATION.labels(command=command).observe(time.perf_counter() - started)
+        COMMANDS.labels(command=command, outcome="ok" if ok else "error").inc()
+
+    # --- ライフサイクル ---
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        return self._session
+
+    async def close(self) -> None:
+        """送信中の deferred 応答を待ってからセッションをクローズする"""
+        if self._followups:
+            await asyncio.wait(list(self._followups), timeout=5)
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+def _message(content: str, *, ephemeral: bool = False) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"content": content}
+    if ephemeral:
+        data["flags"] = FLAG_EPHEMERAL
+    return {"type": RESPONSE_CHANNEL_MESSAGE, "data": data}
+
+
+router = APIRouter()
+
+
+@router.post("/interactions")
+async def interactions(request: Request) -> JSONResponse:
+    """Discord からの Interaction (スラッシュコマンド) を受け付ける"""
+    service: Optional[InteractionService] = getattr(request.app.state, "interactions", None)
+    if service is None:
+        raise HTTPException(status_code=404, detail="Interactions エンドポイントは無効です (DISCORD_PUBLIC_KEY 未設定)")
+
+    body = await request.body()
+    signature = request.headers.get("X-Signature-Ed25519", "")
+    timestamp = request.headers.get("X-Signature-Timestamp", "")
+    if not service.verify(signature, timestamp, body):
+        raise HTTPException(status_code=401, detail="署名が不正です")
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="本文がJSONではありません")
+    return JSONResponse(await service.handle(payload))
+
+
+async def register_commands(application_id: str, bot_token: str, api_base: str = DISCORD_API_BASE) -> None:
+    """SLASH_COMMANDS をグローバルコマンドとして登録する (既存の定義は置き換えられる)"""
+    url = f"{api_base}/applications/{application_id}/commands"
+    headers = {"Authorization": f"Bot {bot_token}"}
+    async with aiohttp.ClientSession() as session:
+        async with session.put(url, json=SLASH_COMMANDS, headers=headers) as response:
+            response.raise_for_status()
+            registered = await response.json()
+    logger.info("スラッシュコマンドを登録しました: %s", [c['name'] for c in registered])
+
+
+if __name__ == "__main__":
+    # python -m src.interactions でスラッシュコマンドを登録する
+    from src.config import config
+
+    setup_logging_from_config(config)
+    if not config.DISCORD_APPLICATION_ID:
+        raise SystemExit("DISCORD_APPLICATION_ID が設定されていません")
+    if not config.DISCORD_BOT_TOKEN:
+        raise SystemExit("DISCORD_BOT_TOKEN が設定されていません")
+    asyncio.run(register_commands(config.DISCORD_APPLICATION_ID, config.DISCORD_BOT_TOKEN))
@@ -0,0 +1,351 @@
+"""構造化ログ (JSON) のパイプライン
+
+ログを出すスレッド (イベントループ) では書式化も書き込みもしない。
+ルートロガーには QueueHandler だけを付け、レコードをキューに積んで返る。
+メッセージの書式化 (record.getMessage)・JSON化・標準エラーへの書き込みは
+QueueListener のバックグラウンドスレッドで行う。
+
+- 書式化は遅延する: logger.info("... %s", value) の引数は書き込み時まで参照のまま保持されるので、
+  f文字列ではなく %-形式で渡し、ログの後で変更するオブジェクトは渡さないこと
+- ロガー名ごとの間引き (LOG_SAMPLE_RATES) と流量制限 (LOG_RATE_LIMITS) はキューに積む前に行う。
+  間引きは INFO 以下のレコードだけが対象で、相関IDがあればIDごとに一括で残す・捨てるを決める
+  (同じリクエストのログは揃って残る)
+- 相関ID (correlation_id) は contextvars で受け渡す。コマンド・Interaction の処理の最初に
+  correlation_scope() で設定すると、取得・整形・送信のログに同じIDが付く
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import secrets
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Mapping, Optional, TextIO, Tuple
+from .metrics import LOG_QUEUE_DEPTH, LOG_RECORDS_DROPPED
+
+DEFAULT_QUEUE_SIZE = 10000
+TEXT_FORMAT = '%(asctime)s - {prefix}%(name)s - %(levelname)s - %(message)s'
+
+CORRELATION_ID: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+# LogRecord が標準で持つ属性 (これ以外の属性は extra として出力する)
+# color_message は uvicorn が端末向けに付ける色付きのメッセージ
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "message", "asctime", "taskName", "correlation_id", "color_message",
+}
+
+
+# --- 相関ID ---
+
+def get_correlation_id() -> Optional[str]:
+    """現在のコンテキストの相関ID (設定されていなければNone)"""
+    return CORRELATION_ID.get()
+
+
+def new_correlation_id(prefix: str = "req") -> str:
+    """新しい相関IDを作る (メッセージIDなど既存のIDがない場合に使う)"""
+    return f"{prefix}-{secrets.token_hex(6)}"
+
+
+@contextmanager
+def correlation_scope(correlation_id: Optional[str] = None) -> Iterator[str]:
+    """with ブロックの間 (とその中で作成したタスク) のログに相関IDを付ける"""
+    correlation_id = correlation_id or new_correlation_id()
+    token = CORRELATION_ID.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        CORRELATION_ID.reset(token)
+
+
+# --- 設定値 ---
+
+def parse_logger_rules(text: Optional[str]) -> Dict[str, float]:
+    """"discord.gateway=0.1,uvicorn.access=0.01" 形式の設定をロガー名→値の辞書にする
+
+    ロガー名を "*" にすると全てのロガーに適用する (より長い名前の設定が優先)。
+
+    Raises:
+        ValueError: 形式が不正な場合
+    """
+    rules: Dict[str, float] = {}
+    for item in (text or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, value = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"ロガーごとの設定は 名前=値 の形式で指定してください: {item}")
+        rules["" if name.strip() == "*" else name.strip()] = float(value)
+    return rules
+
+
+def _match_rule(rules: Mapping[str, float], name: str) -> Optional[float]:
+    """ロガー名に最も長く前方一致する設定値 (logging と同じくドット区切りで親をたどる)"""
+    while True:
+        if name in rules:
+            return rules[name]
+        if not name:
+            return None
+        name = name.rpartition(".")[0]
+
+
+# --- 間引き・流量制限 ---
+
+class LogSampler(logging.Filter):
+    """ロガー名ごとの間引きと流量制限 (ルートロガーのハンドラに付ける)
+
+    sample_rates: 残す割合 (0〜1)。WARNING 以上は間引かない
+    rate_limits: 1秒あたりに残すレコード数 (ロガーごと, 全レベル)。
+        捨てた件数は次に残したレコードの suppressed に入れる
+    """
+
+    def __init__(self, sample_rates: Optional[Mapping[str, float]] = None,
+                 rate_limits: Optional[Mapping[str, float]] = None,
+                 clock=time.monotonic):
+        super().__init__()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.configure(sample_rates, rate_limits)
+
+    def configure(self, sample_rates: Optional[Mapping[str, float]] = None,
+                  rate_limits: Optional[Mapping[str, float]] = None) -> None:
+        with self._lock:
+            self.sample_rates = dict(sample_rates or {})
+            self.rate_limits = dict(rate_limits or {})
+            # ロガー名 → (間引き率, 流量制限) の解決結果
+            self._resolved: Dict[str, Tuple[Optional[float], Optional[float]]] = {}
+            # ロガー名 → [トークン, 最終更新時刻, 捨てた件数]
+            self._buckets: Dict[str, list] = {}
+
+    def _resolve(self, name: str) -> Tuple[Optional[float], Optional[float]]:
+        resolved = self._resolved.get(name)
+        if resolved is None:
+            resolved = self._resolved[name] = (
+                _match_rule(self.sample_rates, name), _match_rule(self.rate_limits, name))
+        return resolved
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_rate, rate_limit = self._resolve(record.name)
+        if sample_rate is not None and sample_rate < 1.0 and record.levelno < logging.WARNING:
+            if not self._sampled(sample_rate, getattr(record, "correlation_id", None)):
+                LOG_RECORDS_DROPPED.labels(reason="sampled").inc()
+                return False
+            record.sample_rate = sample_rate
+        if rate_limit is not None:
+            suppressed = self._take(record.name, rate_limit)
+            if suppressed is None:
+                LOG_RECORDS_DROPPED.labels(reason="rate_limited").inc()
+                return False
+            if suppressed:
+                record.suppressed = suppressed
+        return True
+
+    @staticmethod
+    def _sampled(rate: float, correlation_id: Optional[str]) -> bool:
+        if rate <= 0.0:
+            return False
+        if correlation_id is None:
+            return random.random() < rate
+        return zlib.crc32(correlation_id.encode()) % 10000 < rate * 10000
+
+    def _take(self, name: str, rate: float) -> Optional[int]:
+        """流量制限の枠を1つ使う
+
+        Returns:
+            Optional[int]: 使えた場合は直前に捨てた件数、枠がない場合はNone
+        """
+        now = self._clock()
+        capacity = max(1.0, rate)
+        with self._lock:
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                bucket = self._buckets[name] = [capacity, now, 0]
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return None
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+            return suppressed
+
+
+# --- 書式 ---
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in record.__dict__.items()
+            if key not in _RECORD_ATTRS and not key.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコードを1行のJSONにする (extra で渡した値と static_fields もフィールドとして出力する)"""
+
+    def __init__(self, static_fields: Optional[Mapping[str, Any]] = None):
+        super().__init__()
+        self.static_fields = dict(static_fields or {})
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        correlation_id = getattr(record, "correlation_id", None)
+        if correlation_id is not None:
+            payload["correlation_id"] = correlation_id
+        payload.update(self.static_fields)
+        payload.update(_extra_fields(record))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """従来の1行テキスト形式 (相関IDと extra は末尾に key=value で付ける)"""
+
+    def __init__(self, static_fields: Optional[Mapping[str, Any]] = None):
+        prefix = "".join(f"{key}={value} - " for key, value in (static_fields or {}).items())
+        super().__init__(TEXT_FORMAT.format(prefix=prefix))
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = super().formatMessage(record)
+        fields = _extra_fields(record)
+        correlation_id = getattr(record, "correlation_id", None)
+        if correlation_id is not None:
+            fields = {"correlation_id": correlation_id, **fields}
+        if fields:
+            message += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return message
+
+
+# --- キュー ---
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """書式化せずにキューへ積む QueueHandler
+
+    標準の QueueHandler.prepare はメッセージをその場で書式化するので、相関IDを付けるだけにする。
+    キューが一杯の場合は待たずに捨てて数える。
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # 相関IDはログを出したコンテキストでしか分からないので、間引きの判定より前に付ける
+        record.correlation_id = CORRELATION_ID.get()
+        return super().handle(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason="queue_full").inc()
+
+
+_handler: Optional[_QueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_output: Optional[logging.StreamHandler] = None
+_sampler: Optional[LogSampler] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    *,
+    sample_rates: Optional[Mapping[str, float]] = None,
+    rate_limits: Optional[Mapping[str, float]] = None,
+    static_fields: Optional[Mapping[str, Any]] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    stream: Optional[TextIO] = None,
+    force: bool = False,
+) -> None:
+    """ルートロガーをキュー経由の構造化ログに切り替える
+
+    2回目以降の呼び出しはレベル・書式・間引きの設定だけを更新する
+    (import 時に既定値で設定し、設定ファイルを読んだ後に呼び直す)。
+    logging.basicConfig と同じく、ルートロガーに既にハンドラがあれば (force でない限り) 何もしない。
+
+    Args:
+        level: ルートロガーのレベル (DEBUG/INFO/WARNING など)
+        fmt: json または text
+        sample_rates: ロガー名→残す割合 (parse_logger_rules の結果)
+        rate_limits: ロガー名→1秒あたりのレコード数
+        static_fields: 全レコードに付けるフィールド (クラスタIDなど)
+        queue_size: キューの上限 (最初の呼び出しのみ有効)
+        stream: 出力先 (省略時は標準エラー, 最初の呼び出しのみ有効)
+        force: 既存のハンドラを外して切り替える場合True
+    """
+    global _handler, _listener, _output, _sampler
+    if fmt not in ("json", "text"):
+        raise ValueError(f"ログの形式は json または text を指定してください: {fmt}")
+    formatter = JsonFormatter(static_fields) if fmt == "json" else TextFormatter(static_fields)
+    with _setup_lock:
+        if _handler is None:
+            root = logging.getLogger()
+            if root.handlers and not force and _output not in root.handlers:
+                return
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            records: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+            _sampler = LogSampler(sample_rates, rate_limits)
+            _handler = _QueueHandler(records)
+            _handler.addFilter(_sampler)
+            first_setup = _output is None
+            if first_setup:
+                _output = logging.StreamHandler(stream or sys.stderr)
+            _listener = logging.handlers.QueueListener(records, _output)
+            _listener.start()
+            if first_setup:
+                # 終了時にキューに残ったレコードを書き出す (呼ばれた時点で止まっていれば何もしない)
+                atexit.register(shutdown_logging)
+            LOG_QUEUE_DEPTH.set_function(records.qsize)
+            root.addHandler(_handler)
+        else:
+            assert _sampler is not None
+            _sampler.configure(sample_rates, rate_limits)
+        assert _output is not None
+        _output.setFormatter(formatter)
+        logging.getLogger().setLevel(level.upper())
+
+
+def shutdown_logging() -> None:
+    """キューに残っているレコードを書き出してバックグラウンドスレッドを止める
+
+    以降のログはキューを通さず、ルートロガーに直接付けた出力先へ書き込む。
+    """
+    global _handler, _listener
+    with _setup_lock:
+        handler, listener = _handler, _listener
+        _handler = _listener = None
+        if handler is None or listener is None:
+            return
+        root = logging.getLogger()
+        root.removeHandler(handler)
+        listener.stop()
+        assert _output is not None
+        root.addHandler(_output)
+
+
+def setup_logging_from_config(settings: Any, static_fields: Optional[Mapping[str, Any]] = None) -> None:
+    """Config の LOG_* 設定で setup_logging を呼ぶ"""
+    setup_logging(
+        settings.LOG_LEVEL,
+        settings.LOG_FORMAT,
+        sample_rates=settings.LOG_SAMPLE_RATES,
+        rate_limits=settings.LOG_RATE_LIMITS,
+        static_fields=static_fields,
+    )
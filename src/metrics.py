@@ -0,0 +1,340 @@
+"""Prometheus テキスト形式のメトリクス
+
+ボットのスレッドとFastAPIのスレッドの両方から記録されるため、各系列はロックで保護する。
+記録側の処理は「ロックを取って数値を足すだけ」に留め、集計 (累積バケットの計算や文字列化) は
+/metrics が呼ばれたときにだけ行う。
+"""
+import asyncio
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """ラベルごとの系列を持つメトリクスの基底クラス"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, **labels: str):
+        """ラベル値に対応する系列を返す (なければ作成する)"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} はラベルが必要です: {self.labelnames}")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    @property
+    def family_name(self) -> str:
+        return self.name
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.family_name} {self.documentation}", f"# TYPE {self.family_name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key: Tuple[str, ...], child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """収集時に呼び出して値を得る関数を設定する (関数は単調増加する累計値を返すこと)"""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class Counter(_Metric):
+    """単調増加するカウンタ"""
+
+    kind = "counter"
+
+    @property
+    def family_name(self) -> str:
+        return f"{self.name}_total"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default().set_function(function)
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.family_name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        # float の代入はアトミックなのでロックは不要
+        self._value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """収集時に呼び出して値を得る関数を設定する"""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class Gauge(_Metric):
+    """任意に増減する値 (収集時に関数を呼び出すこともできる)"""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default().set_function(function)
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """with ブロックの所要時間 (秒) を記録する"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    """値の分布を固定バケットで集計するヒストグラム"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["Registry"] = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _render_child(self, key, child) -> List[str]:
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """メトリクスを登録し、Prometheus テキスト形式で出力する"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"メトリクス {metric.name} は既に登録されています")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# --- アプリケーションのメトリクス ---
+
+MLB_API_REQUEST_DURATION = Histogram(
+    "mlb_api_request_duration_seconds", "MLB Stats APIへのリクエスト1回の所要時間", ("endpoint",))
+MLB_API_REQUESTS = Counter(
+    "mlb_api_requests", "MLB Stats APIへのリクエスト数 (outcome: ok/retry/error)", ("endpoint", "outcome"))
+
+COMMAND_DURATION = Histogram(
+    "bot_command_duration_seconds", "コマンドハンドラの所要時間", ("command",))
+COMMANDS = Counter(
+    "bot_commands", "処理したコマンド数 (outcome: ok/error)", ("command", "outcome"))
+
+DISCORD_SEND_DURATION = Histogram(
+    "discord_send_duration_seconds", "Discordへのメッセージ送信の所要時間", ("kind",))
+DISCORD_SEND_ERRORS = Counter(
+    "discord_send_errors", "Discordへのメッセージ送信の失敗数", ("kind",))
+
+INTERACTION_RESPONSES = Counter(
+    "interaction_responses", "スラッシュコマンドへの応答数 (response: immediate/deferred/error)", ("response",))
+
+OUTBOUND_QUEUE_WAIT = Histogram(
+    "outbound_queue_wait_seconds", "送信キューに入ってから送信が始まるまでの待ち時間", ("priority",))
+OUTBOUND_QUEUE_DEPTH = Gauge(
+    "outbound_queue_depth", "送信キューに溜まっているメッセージ数", ("priority",))
+OUTBOUND_DEDUPLICATED = Counter(
+    "outbound_deduplicated", "同じ質問への回答を既存メッセージへのリンクで済ませた数")
+
+BACKGROUND_TASK_DURATION = Histogram(
+    "background_task_duration_seconds", "バックグラウンドタスク1回の所要時間", ("task",))
+BACKGROUND_TASK_RUNS = Counter(
+    "background_task_runs", "バックグラウンドタスクの実行数 (outcome: ok/error/timeout)", ("task", "outcome"))
+BACKGROUND_TASK_SKIPS = Counter(
+    "background_task_skips", "バックグラウンドタスクを実行しなかった回数 (reason: budget)", ("task", "reason"))
+
+DISCORD_GATEWAY_LATENCY = Gauge(
+    "discord_gateway_latency_seconds", "Discordゲートウェイのハートビート遅延")
+SHARD_LATENCY = Gauge(
+    "discord_shard_latency_seconds", "シャードごとのゲートウェイのハートビート遅延", ("shard",))
+SHARD_GUILDS = Gauge(
+    "discord_shard_guilds", "シャードごとのギルド数", ("shard",))
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "イベントループの遅延 (予定時刻からの遅れ)", ("loop",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+SCOREBOARD_UPDATES = Counter(
+    "scoreboard_updates", "スコアボードの更新要求数 (outcome: edited/unchanged/coalesced/error)", ("outcome",))
+
+STARTUP_PHASE_DURATION = Gauge(
+    "startup_phase_duration_seconds", "起動フェーズごとの所要時間", ("phase",))
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped", "書き出さずに捨てたログレコード数 (reason: sampled/rate_limited/queue_full)", ("reason",))
+LOG_QUEUE_DEPTH = Gauge(
+    "log_queue_depth", "書き出し待ちのログレコード数")
+
+SCHEDULE_CACHE = Gauge(
+    "schedule_cache", "日程キャッシュの現在の件数 (stat: entries/inflight)", ("stat",))
+# 日程キャッシュの累計のカウンタ (schedule_cache_<stat>_total, 値は収集時に CacheStats から読む)
+SCHEDULE_CACHE_COUNTERS = {
+    stat: Counter(f"schedule_cache_{stat}", documentation)
+    for stat, documentation in (
+        ("hits", "日程キャッシュのヒット数"),
+        ("stale_hits", "期限切れのエントリを返して裏で取り直した数"),
+        ("misses", "日程キャッシュのミス数"),
+        ("coalesced", "進行中の取得にまとめたリクエスト数"),
+        ("upstream_calls", "日程キャッシュから上流への取得数"),
+        ("errors", "日程キャッシュの上流への取得の失敗数"),
+    )
+}
+
+
+async def monitor_event_loop_lag(loop_name: str, interval: float = 0.5) -> None:
+    """実行中のイベントループの遅延を interval 秒ごとに記録し続ける (タスクとして起動する)"""
+    loop = asyncio.get_running_loop()
+    histogram = EVENT_LOOP_LAG.labels(loop=loop_name)
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        histogram.observe(max(0.0, loop.time() - expected))
+
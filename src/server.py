@@ -1,43 +1,95 @@
-import uvicorn
-from fastapi import FastAPI
+from src.startup import STARTUP # 起動フェーズの計測はこの import の時点から始まる
+import yarl
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
 import asyncio
+import importlib
+import os
 import threading
 import logging
-import discord
-from typing import Optional
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from datetime import date
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, AsyncIterator, Coroutine, Dict, List, Optional
 from src.config import config
-from src.bot.core import DodgersBot
-
-# ロギング設定 (レベルをINFOに戻す)
-logging.basicConfig(
-    level=logging.INFO, # DEBUGからINFOに戻す
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from src.bot.api_client import GameInfo, MLBClient
+from src.bot.cache import ScheduleCache
+from src.bot.teams import DEFAULT_TEAM_ID, find_team, get_team
+from src.bot.utils import parse_date
+from src.cluster import (
+    ClusterHub, ClusterLauncher, SharedMLBCache, fetch_recommended_shards, router as cluster_router,
+)
+from src.interactions import InteractionService, router as interactions_router
+from src.logs import setup_logging, setup_logging_from_config, shutdown_logging
+from src.metrics import (
+    DISCORD_GATEWAY_LATENCY, OUTBOUND_QUEUE_DEPTH, REGISTRY, SCHEDULE_CACHE, SCHEDULE_CACHE_COUNTERS,
+    SHARD_GUILDS, SHARD_LATENCY, monitor_event_loop_lag,
 )
-# discordライブラリのロガーレベル設定を削除 (basicConfigに従う)
-# discord_logger = logging.getLogger('discord')
-# discord_logger.setLevel(logging.DEBUG)
 
-logger = logging.getLogger(__name__) # このモジュールのロガー
+if TYPE_CHECKING:
+    # discord.py を含むボット本体は起動後に import する (import_bot_core)
+    from src.bot.core import DodgersBot
 
-# FastAPIアプリケーションの初期化
-app = FastAPI(
-    title="Dodgers Discord Bot API",
-    description="ドジャースの試合情報を提供するDiscordボットの管理API",
-    version="1.0.0"
-)
+# ロギング設定 (キュー経由の構造化ログ。LOG_* の設定は読み込み後に setup_logging_from_config で反映する)
+setup_logging()
+
+logger = logging.getLogger(__name__) # このモジュールのロガー
 
 # Discordボットクライアントのインスタンス
-bot_client: Optional[DodgersBot] = None
+bot_client: Optional["DodgersBot"] = None
+# ボットを動かしているイベントループ (integrated モードではAPIと同じループ)
+bot_loop: Optional[asyncio.AbstractEventLoop] = None
+# ボットを動かさないワーカー (BOT_RUN_MODE=none) が自前で持つ日程キャッシュ
+worker_schedule_cache: Optional[ScheduleCache] = None
+
+async def import_bot_core() -> ModuleType:
+    """ボット本体 (src.bot.core と discord.py) を import する
+
+    discord.py の import は重いので、モジュールの import 時ではなく起動後にスレッドで行い、
+    その間もAPIサーバー (/livez など) が応答できるようにする。
+    """
+    with STARTUP.phase("import_bot"):
+        return await asyncio.to_thread(importlib.import_module, "src.bot.core")
 
 async def run_bot_async(token: str) -> None:
     """Discordボットを非同期で実行するコルーチン"""
-    global bot_client
+    global bot_client, bot_loop
     logger.info("run_bot_async: コルーチン開始")
+    bot_loop = asyncio.get_running_loop()
+    try:
+        core = await import_bot_core()
+    except Exception:
+        logger.exception("run_bot_async: ボット本体の import に失敗しました")
+        return
+    import discord # import_bot_core で読み込み済み
+
     try:
-        intents = discord.Intents.default()
-        intents.message_content = True
+        core.configure_discord_endpoints(config.DISCORD_API_BASE, config.DISCORD_GATEWAY_URL)
+        # スラッシュコマンドだけで運用する場合は特権インテントを要求しない
+        intents = core.default_intents(config.MESSAGE_CONTENT_INTENT)
         # logger.debug(f"run_bot_async: Intents設定完了 - message_content={intents.message_content}") # DEBUGログ削除
-        bot_client = DodgersBot(intents=intents)
+        mlb_client = MLBClient(
+            endpoint=config.MLB_API_ENDPOINT,
+            timeout=config.MLB_API_TIMEOUT,
+            max_concurrency=config.MLB_API_MAX_CONCURRENCY,
+            max_retries=config.MLB_API_MAX_RETRIES,
+        )
+        bot_client = core.DodgersBot(
+            intents=intents,
+            mlb_client=mlb_client,
+            schedule_index_path=config.SCHEDULE_INDEX_PATH,
+            guild_settings_path=config.GUILD_SETTINGS_PATH,
+            shard_count=config.SHARD_COUNT or None,
+            identify_concurrency=config.IDENTIFY_MAX_CONCURRENCY or 1,
+            guild_ready_timeout=config.GUILD_READY_TIMEOUT,
+            # keep-alive は Discord の REST API ではなく、このサーバーのヘルスチェックへ送る
+            keep_alive_url=f"http://127.0.0.1:{config.PORT}/",
+            request_budget=config.SCHEDULER_REQUEST_BUDGET,
+            timeline=STARTUP,
+            # integrated モードではAPIと同じループなので、遅延は lifespan の "api" の計測だけで足りる
+            monitor_loop_lag=config.BOT_RUN_MODE != "integrated",
+        )
         logger.info("run_bot_async: Discordボットクライアントを作成しました。")
         logger.info("run_bot_async: bot.start(token) を呼び出します...")
         await bot_client.start(token)
@@ -76,20 +128,218 @@ def run_bot_in_thread() -> None:
     finally:
         logger.info("run_bot_in_thread: スレッドの処理が終了します。")
 
+async def shutdown_bot(bot_task: Optional[asyncio.Task], timeout: float) -> None:
+    """同じループで動いているボットを停止する
 
-@app.on_event("startup")
-async def startup_event() -> None:
-    """FastAPIサーバー起動時にDiscordボットを起動する"""
-    logger.info("FastAPIサーバーを起動します (startup_event)")
+    新しいコマンドの受け付けを止めて実行中のコマンドを最大 timeout 秒待ち (ドレイン)、
+    ゲートウェイを閉じてから bot.start() のタスクが終わるのを待つ。
+    """
+    if bot_client is not None and not bot_client.is_closed():
+        await bot_client.drain(timeout)
+        try:
+            await asyncio.wait_for(bot_client.close(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("shutdown_bot: bot.close() がタイムアウトしました。")
+    if bot_task is not None and not bot_task.done():
+        try:
+            await asyncio.wait_for(bot_task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("shutdown_bot: ボットのタスクが終了しないためキャンセルしました。")
+        except asyncio.CancelledError:
+            pass
 
-    # ボットを別スレッドで起動
-    bot_thread = threading.Thread(
-        target=run_bot_in_thread,
-        daemon=True,
-        name="DiscordBotThread"
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """FastAPIサーバーの起動・終了に合わせてDiscordボットを起動・停止する
+
+    BOT_RUN_MODE が integrated (既定) の場合はボットをAPIサーバーと同じイベントループ上の
+    タスクとして動かし、thread の場合は従来どおり別スレッド・別ループで動かす。
+    none の場合はボットを動かさず、ワーカー自身の日程キャッシュで /game と /interactions に答える。
+    cluster の場合はシャードを CLUSTER_PROCESSES 個のワーカープロセスに割り振り、
+    このプロセスは statsapi の共有キャッシュとシャードの状態の集約を担当する。
+
+    時間のかかる処理 (ボットの import・ログイン、MLBデータの事前取得、ワーカーの起動) は全てタスクとして
+    始めるだけにして、すぐにリクエストを受け付ける。準備が整ったかどうかは /readyz で確認できる。
+    """
+    global worker_schedule_cache
+    if not STARTUP.is_done("config"):
+        with STARTUP.phase("config"):
+            config.load()
+    setup_logging_from_config(config)
+    logger.info("FastAPIサーバーを起動します (lifespan, BOT_RUN_MODE=%s)", config.BOT_RUN_MODE)
+    # APIサーバー側のイベントループ遅延も記録する
+    loop_lag_task = asyncio.create_task(monitor_event_loop_lag("api"))
+
+    bot_task: Optional[asyncio.Task] = None
+    worker_client: Optional[MLBClient] = None
+    prewarm_task: Optional[asyncio.Task] = None
+    launcher_task: Optional[asyncio.Task] = None
+    app.state.cluster = None
+    app.state.cluster_launcher = None
+    if config.BOT_RUN_MODE in ("none", "cluster"):
+        worker_client = MLBClient(
+            endpoint=config.MLB_API_ENDPOINT,
+            timeout=config.MLB_API_TIMEOUT,
+            max_concurrency=config.MLB_API_MAX_CONCURRENCY,
+            max_retries=config.MLB_API_MAX_RETRIES,
+        )
+        await worker_client.start()
+        worker_schedule_cache = ScheduleCache(worker_client.fetch_league_schedule)
+        if config.BOT_RUN_MODE == "cluster":
+            launcher_task = asyncio.create_task(run_cluster(app, worker_client), name="ClusterLauncher")
+        else:
+            prewarm_task = asyncio.create_task(prewarm_worker_cache(worker_schedule_cache), name="MLBPrewarm")
+            logger.info("Discordボットは起動しません (BOT_RUN_MODE=none)")
+    elif config.BOT_RUN_MODE == "thread":
+        bot_thread = threading.Thread(
+            target=run_bot_in_thread,
+            daemon=True,
+            name="DiscordBotThread"
+        )
+        bot_thread.start()
+        logger.info("Discordボットのスレッドを開始しました (lifespan)")
+    else:
+        bot_task = asyncio.create_task(run_bot_async(config.DISCORD_BOT_TOKEN), name="DiscordBot")
+        logger.info("Discordボットをサーバーのイベントループ上で開始しました (lifespan)")
+
+    interactions: Optional[InteractionService] = None
+    if config.DISCORD_PUBLIC_KEY:
+        interactions = InteractionService(config.DISCORD_PUBLIC_KEY, lookup_team_games)
+        logger.info("スラッシュコマンドの Interactions エンドポイントを有効にしました (POST /interactions)")
+    app.state.interactions = interactions
+    ready_task = asyncio.create_task(watch_ready(), name="WatchReady")
+
+    try:
+        yield
+    finally:
+        logger.info("FastAPIサーバーを終了します (lifespan)")
+        ready_task.cancel()
+        if interactions is not None:
+            await interactions.close()
+        if bot_task is not None:
+            await shutdown_bot(bot_task, config.SHUTDOWN_DRAIN_TIMEOUT)
+        if launcher_task is not None:
+            launcher_task.cancel()
+            launcher: Optional[ClusterLauncher] = app.state.cluster_launcher
+            if launcher is not None:
+                await launcher.stop(config.SHUTDOWN_DRAIN_TIMEOUT)
+        if prewarm_task is not None:
+            prewarm_task.cancel()
+        if worker_client is not None:
+            await worker_client.close()
+            worker_schedule_cache = None
+        loop_lag_task.cancel()
+        shutdown_logging()
+
+async def prewarm_worker_cache(cache: ScheduleCache) -> None:
+    """ボットを動かさないワーカーで、今日のリーグ日程を事前に取得しておく"""
+    with STARTUP.phase("mlb_prewarm"):
+        try:
+            await cache.get(date.today())
+        except Exception:
+            # 取得できなくても起動は続ける (最初のリクエストで取り直す)
+            logger.warning("今日の日程の事前取得に失敗しました。", exc_info=True)
+
+async def run_cluster(app: FastAPI, client: MLBClient) -> None:
+    """クラスタモードのランチャーを作成し、ワーカーを順に起動する"""
+    launcher = await start_cluster(app, client)
+    app.state.cluster_launcher = launcher
+    with STARTUP.phase("cluster_launch"):
+        await launcher.start()
+
+async def start_cluster(app: FastAPI, client: MLBClient) -> ClusterLauncher:
+    """共有キャッシュを用意し、シャードをワーカープロセスに割り振るランチャーを作成する"""
+    core = await import_bot_core()
+    core.configure_discord_endpoints(config.DISCORD_API_BASE, config.DISCORD_GATEWAY_URL)
+    shard_count, identify_concurrency = config.SHARD_COUNT, config.IDENTIFY_MAX_CONCURRENCY
+    if not shard_count or not identify_concurrency:
+        recommended, max_concurrency = await fetch_recommended_shards(config.DISCORD_BOT_TOKEN)
+        shard_count = shard_count or recommended
+        identify_concurrency = identify_concurrency or max_concurrency
+    upstream = yarl.URL(config.MLB_API_ENDPOINT).origin()
+    hub = ClusterHub(SharedMLBCache(client, str(upstream)))
+    app.state.cluster = hub
+    launcher = ClusterLauncher(
+        shard_count, config.CLUSTER_PROCESSES, f"http://127.0.0.1:{config.PORT}", hub.secret,
+        identify_concurrency=identify_concurrency,
     )
-    bot_thread.start()
-    logger.info("Discordボットのスレッドを開始しました (startup_event)")
+    logger.info("クラスタモード: %dシャードを%dプロセスで担当します", shard_count, len(launcher.ranges))
+    return launcher
+
+# FastAPIアプリケーションの初期化
+app = FastAPI(
+    title="Dodgers Discord Bot API",
+    description="ドジャースの試合情報を提供するDiscordボットの管理API",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+app.include_router(interactions_router)
+app.include_router(cluster_router)
+STARTUP.end("import")
+
+async def run_on_bot_loop(coro: Coroutine[Any, Any, Any]) -> Any:
+    """ボットのイベントループ上でコルーチンを実行して結果を返す
+
+    integrated モードでは同じループなのでそのまま await し、
+    thread モードではボットのループに投げて完了を待つ。
+    """
+    if bot_loop is None or bot_loop is asyncio.get_running_loop():
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, bot_loop))
+
+async def lookup_team_games(team_id: int, day: date) -> List[GameInfo]:
+    """チームの指定日の試合を返す (ボットがいればボットのキャッシュ・索引、いなければワーカーのキャッシュ)
+
+    Raises:
+        HTTPException: どちらも使えない場合 (503)
+    """
+    if bot_client is not None and bot_client.is_ready():
+        return await run_on_bot_loop(bot_client.get_team_games(team_id, day))
+    if worker_schedule_cache is not None:
+        return await worker_schedule_cache.get_team_games(team_id, day)
+    raise HTTPException(status_code=503, detail="Discordボットが準備できていません")
+
+def readiness() -> Dict[str, bool]:
+    """BOT_RUN_MODE ごとの準備完了の条件と、それぞれを満たしているか"""
+    if config.BOT_RUN_MODE == "none":
+        return {"mlb_prewarm": STARTUP.is_done("mlb_prewarm")}
+    if config.BOT_RUN_MODE == "cluster":
+        hub = getattr(app.state, "cluster", None)
+        launcher = getattr(app.state, "cluster_launcher", None)
+        return {"clusters": hub is not None and launcher is not None and hub.ready_clusters() >= len(launcher.ranges)}
+    return {
+        "discord": bot_client is not None and bot_client.is_ready(),
+        "mlb_prewarm": bot_client is not None and bot_client.prewarmed,
+    }
+
+async def watch_ready(interval: float = 0.05) -> None:
+    """準備が整った時点を起動完了 (ready フェーズ) として記録する"""
+    while not all(readiness().values()):
+        await asyncio.sleep(interval)
+    STARTUP.end("ready")
+    logger.info("起動が完了しました (%.2f秒)", STARTUP.elapsed(), extra={"phases": STARTUP.snapshot()})
+
+@app.get("/livez")
+async def livez() -> dict:
+    """生存確認 (イベントループが応答できれば常に200)"""
+    return {"status": "alive", "uptime": round(STARTUP.elapsed(), 3)}
+
+@app.get("/readyz")
+async def readyz() -> JSONResponse:
+    """準備完了の確認 (準備ができていなければ503) と起動フェーズごとの所要時間"""
+    checks = readiness()
+    ready = all(checks.values())
+    body: Dict[str, Any] = {
+        "ready": ready,
+        "mode": config.BOT_RUN_MODE,
+        "uptime": round(STARTUP.elapsed(), 3),
+        "checks": checks,
+        "phases": STARTUP.snapshot(),
+    }
+    hub = getattr(app.state, "cluster", None)
+    if hub is not None:
+        body["clusters"] = hub.startup()
+    return JSONResponse(body, status_code=200 if ready else 503)
 
 @app.get("/")
 async def health_check() -> dict:
@@ -104,15 +354,114 @@ async def health_check() -> dict:
         # logger.debug("Health Check: Bot is connected.") # DEBUGログ削除
     # else: # DEBUGログ削除
         # logger.debug(f"Health Check: Bot status - bot_client is None: {bot_client is None}, is_ready: {bot_client.is_ready() if bot_client else 'N/A'}")
+    if bot_client:
+        status["schedule_cache"] = bot_client.schedule_cache.snapshot()
+        status["outbound"] = bot_client.outbound.snapshot()
+    hub = getattr(app.state, "cluster", None)
+    if hub is not None:
+        status["cluster"] = {"shared_cache": hub.cache.snapshot(), "shards": len(hub.shards())}
 
     return status
 
+def _gateway_latency() -> float:
+    """ボットのゲートウェイ遅延 (未接続の場合はNaN)"""
+    if bot_client is None or not bot_client.is_ready():
+        return float("nan")
+    return bot_client.latency
+
+def _schedule_cache_stat(stat: str, missing: float = float("nan")):
+    """日程キャッシュの値を読む関数 (ボットがない間は missing を返す。累計のカウンタは0)"""
+    def read() -> float:
+        if bot_client is None:
+            return missing
+        return bot_client.schedule_cache.snapshot()[stat]
+    return read
+
+def _outbound_depth(priority: str):
+    def read() -> float:
+        if bot_client is None:
+            return float("nan")
+        return bot_client.outbound.snapshot()[priority]
+    return read
+
+DISCORD_GATEWAY_LATENCY.set_function(_gateway_latency)
+for _priority in ("interactive", "broadcast"):
+    OUTBOUND_QUEUE_DEPTH.labels(priority=_priority).set_function(_outbound_depth(_priority))
+for _stat in ("entries", "inflight"):
+    SCHEDULE_CACHE.labels(stat=_stat).set_function(_schedule_cache_stat(_stat))
+for _stat, _counter in SCHEDULE_CACHE_COUNTERS.items():
+    _counter.set_function(_schedule_cache_stat(_stat, missing=0.0))
+
+@app.get("/game")
+async def game(team: Optional[str] = None, date_text: Optional[str] = Query(None, alias="date")) -> dict:
+    """チームの指定日 (省略時は今日) の試合情報をJSONで返す
+
+    ボットの日程キャッシュ・日程索引をそのまま使うため、上流への呼び出しはボットと共有される。
+    """
+    found = find_team(team) if team else get_team(DEFAULT_TEAM_ID)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"チーム「{team}」が見つかりません")
+    try:
+        day = parse_date(date_text) if date_text else date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="日付は YYYY-MM-DD または MM-DD の形式で指定してください")
+
+    games = await lookup_team_games(found.id, day)
+    return {
+        "team": {"id": found.id, "name": found.name, "abbreviation": found.abbreviation},
+        "date": day.isoformat(),
+        "games": [asdict(g) for g in games],
+    }
+
+def current_shards() -> List[dict]:
+    """シャードごとの状態 (クラスタモードではワーカーからの報告、それ以外はこのプロセスのボット)"""
+    hub = getattr(app.state, "cluster", None)
+    if hub is not None:
+        return hub.shards()
+    if bot_client is None or not bot_client.is_ready():
+        return []
+    return [{**shard, "cluster_id": 0, "pid": os.getpid(), "stale": False} for shard in bot_client.shard_stats()]
+
+@app.get("/shards")
+async def shards() -> dict:
+    """シャードごとの遅延・ギルド数"""
+    shard_list = current_shards()
+    return {
+        "shard_count": len(shard_list),
+        "guilds": sum(shard["guilds"] for shard in shard_list),
+        "shards": shard_list,
+    }
+
+@app.get("/jobs")
+async def jobs() -> dict:
+    """ボットの定期ジョブごとの実行回数・所要時間・スキップ数と、リクエストの予算"""
+    if bot_client is None:
+        raise HTTPException(status_code=503, detail="このプロセスではボットが動いていません")
+    return bot_client.scheduler.snapshot()
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus テキスト形式のメトリクス"""
+    if getattr(app.state, "cluster", None) is None:
+        # クラスタモードではワーカーからの報告時に記録済み
+        for shard in current_shards():
+            SHARD_GUILDS.labels(shard=str(shard["shard_id"])).set(shard["guilds"])
+            latency = shard["latency"]
+            SHARD_LATENCY.labels(shard=str(shard["shard_id"])).set(latency if latency is not None else float("nan"))
+    return Response(content=REGISTRY.render(), media_type=REGISTRY.CONTENT_TYPE)
+
 if __name__ == "__main__":
-    port = config.PORT if config.PORT else 8000
-    logger.info(f"Uvicornサーバーをポート {port} で起動します...")
+    import uvicorn
+
+    with STARTUP.phase("config"):
+        port = config.PORT if config.PORT else 8000
+    setup_logging_from_config(config)
+    logger.info("Uvicornサーバーをポート %d で起動します...", port)
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=port,
-        log_level="info"
+        log_level="info",
+        # uvicorn のログ (アクセスログを含む) もルートロガーのキューを通す
+        log_config=None,
     )
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""起動フェーズの計測
+
+プロセスの起動 (このモジュールの import) を基準に、設定の読み込み・ボットの import・ログイン・
+Cog の読み込み・MLBデータの事前取得・ゲートウェイ接続などの各フェーズの開始時刻と所要時間を記録する。
+記録した値は /readyz と /metrics (startup_phase_duration_seconds) で確認できる。
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from .metrics import STARTUP_PHASE_DURATION
+
+
+class StartupTimeline:
+    """起動フェーズごとの開始時刻 (基準からの秒数) と所要時間を記録する
+
+    thread モードではボットのスレッドからも記録されるため、更新はロックで保護する。
+    フェーズは重なってよい (例: MLBデータの事前取得はログインと並行して進む)。
+    """
+
+    def __init__(self, *, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self.started_at = clock()
+        self._phases: Dict[str, List[Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        """基準からの経過秒数"""
+        return self._clock() - self.started_at
+
+    def begin(self, name: str) -> None:
+        """フェーズを開始する (同じ名前のフェーズは記録し直す)"""
+        with self._lock:
+            self._phases[name] = [self._clock(), None]
+
+    def end(self, name: str) -> None:
+        """フェーズを終了する
+
+        begin() していないフェーズは基準時刻から始まったものとして記録する。
+        既に終了しているフェーズは何もしない (再接続で on_ready が何度も呼ばれる場合など)。
+        """
+        now = self._clock()
+        with self._lock:
+            phase = self._phases.setdefault(name, [self.started_at, None])
+            if phase[1] is not None:
+                return
+            phase[1] = now
+        STARTUP_PHASE_DURATION.labels(phase=name).set(now - phase[0])
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """with ブロックを1つのフェーズとして記録する (例外で抜けた場合も終了時刻を記録する)"""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def is_done(self, name: str) -> bool:
+        with self._lock:
+            phase = self._phases.get(name)
+            return phase is not None and phase[1] is not None
+
+    def snapshot(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """フェーズごとの開始時刻 (基準からの秒数) と所要時間 (未完了は None) を開始順に返す"""
+        with self._lock:
+            phases = sorted(self._phases.items(), key=lambda item: item[1][0])
+        return {
+            name: {
+                "started_at": round(start - self.started_at, 4),
+                "duration": round(end - start, 4) if end is not None else None,
+            }
+            for name, (start, end) in phases
+        }
+
+
+# プロセス全体の起動タイムライン (server.py が最初に import して計測を始める)
+STARTUP = StartupTimeline()
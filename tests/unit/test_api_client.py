@@ -0,0 +1,80 @@
+"""MLBClient.get_bytes の再試行 (429 の Retry-After) のテスト"""
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from multidict import CIMultiDict
+
+from src.bot.api_client import MLBClient, _parse_retry_after
+
+
+def rate_limited(retry_after: str) -> aiohttp.ClientResponseError:
+    return aiohttp.ClientResponseError(
+        None, (), status=429, headers=CIMultiDict({"Retry-After": retry_after}),
+    )
+
+
+@pytest_asyncio.fixture
+async def rate_limited_server():
+    """最初のリクエストに 429 (Retry-After: 60) を返し、以降は200を返すサーバー"""
+    calls = []
+
+    async def handler(request: web.Request) -> web.Response:
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return web.Response(status=429, headers={"Retry-After": "60"})
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    yield str(server.make_url("/")), calls
+    await server.close()
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert _parse_retry_after({"Retry-After": "2.5"}) == 2.5
+
+    def test_http_date(self):
+        later = datetime.now(timezone.utc) + timedelta(seconds=30)
+        assert 25 < _parse_retry_after({"Retry-After": format_datetime(later, usegmt=True)}) <= 30
+
+    @pytest.mark.parametrize("headers", [None, {}, {"Retry-After": "soon"}])
+    def test_missing_or_invalid(self, headers):
+        assert _parse_retry_after(headers) is None
+
+
+class TestRetryDelay:
+    def test_retry_after_overrides_shorter_backoff(self):
+        client = MLBClient(timeout=10.0, backoff_base=0.001)
+        assert client._retry_delay(0, rate_limited("3")) == 3.0
+
+    def test_retry_after_is_capped_by_timeout(self):
+        client = MLBClient(timeout=10.0, backoff_base=0.001)
+        assert client._retry_delay(0, rate_limited("120")) == 10.0
+
+    def test_longer_backoff_is_kept(self):
+        client = MLBClient(timeout=10.0, backoff_base=4.0)
+        assert client._retry_delay(0, rate_limited("1")) >= 4.0
+
+    def test_retry_after_is_ignored_for_server_errors(self):
+        client = MLBClient(timeout=10.0, backoff_base=0.001)
+        error = aiohttp.ClientResponseError(None, (), status=503, headers=CIMultiDict({"Retry-After": "3"}))
+        assert client._retry_delay(0, error) < 0.01
+
+
+@pytest.mark.asyncio
+async def test_get_bytes_waits_for_retry_after(rate_limited_server):
+    url, calls = rate_limited_server
+    async with MLBClient(timeout=0.3, max_retries=1, backoff_base=0.001) as client:
+        assert await client.get_bytes(url) == b"{}"
+    # Retry-After (60秒) はリクエストのタイムアウト (0.3秒) で打ち切って待つ
+    assert len(calls) == 2
+    assert 0.25 <= calls[1] - calls[0] < 5.0
@@ -0,0 +1,118 @@
+"""ベンチマークのハーネス (シナリオの実行とベースラインとの比較) のテスト"""
+from dataclasses import asdict
+
+import pytest
+
+from benchmarks import run
+from benchmarks.harness import (
+    ABSOLUTE_SLACK_MS, BenchmarkResult, bench_format_game_info, bench_outbound_priority,
+    calibrate, calibration_scale, compare_to_baseline,
+)
+
+
+def result(**overrides) -> BenchmarkResult:
+    values = dict(
+        name="scenario", samples=100, p50_ms=10.0, p95_ms=20.0, p99_ms=30.0, throughput=1000.0,
+        upstream_calls_per_command=0.01, loop_lag_p99_ms=5.0, loop_lag_max_ms=8.0, calibration_ms=10.0,
+    )
+    values.update(overrides)
+    return BenchmarkResult(**values)
+
+
+def baseline(**overrides) -> dict:
+    return asdict(result(**overrides))
+
+
+class TestScenarios:
+    @pytest.mark.asyncio
+    async def test_outbound_priority_smoke(self):
+        outcome = await bench_outbound_priority(channels=2, broadcasts_per_channel=1, send_latency=0.0)
+        assert outcome.samples == 2
+        assert outcome.errors == 0
+        assert outcome.p50_ms <= outcome.p95_ms <= outcome.p99_ms
+        assert outcome.loop_lag_p99_ms is not None
+
+    def test_format_game_info_smoke(self):
+        outcome = bench_format_game_info(iterations=200, batch=20)
+        assert outcome.samples == 200
+        assert outcome.throughput > 0
+
+    def test_calibrate_returns_positive_time(self):
+        assert calibrate(rounds=1) > 0
+
+
+class TestCompareToBaseline:
+    def test_same_result_passes(self):
+        assert compare_to_baseline(result(), baseline(), 0.25) == []
+
+    def test_latency_regression_is_reported(self):
+        found = compare_to_baseline(result(p99_ms=30.0 * 1.25 + ABSOLUTE_SLACK_MS + 1), baseline(), 0.25)
+        assert [line.split(":")[0] for line in found] == ["scenario.p99_ms"]
+
+    def test_small_absolute_change_is_within_slack(self):
+        assert compare_to_baseline(result(p50_ms=0.01 + ABSOLUTE_SLACK_MS), baseline(p50_ms=0.01), 0.25) == []
+
+    def test_throughput_regression_is_reported(self):
+        found = compare_to_baseline(result(throughput=700.0), baseline(), 0.25)
+        assert [line.split(":")[0] for line in found] == ["scenario.throughput"]
+
+    def test_loop_lag_uses_looser_tolerance(self):
+        assert compare_to_baseline(result(loop_lag_p99_ms=12.0), baseline(), 0.25) == []
+        found = compare_to_baseline(result(loop_lag_p99_ms=20.0), baseline(), 0.25)
+        assert [line.split(":")[0] for line in found] == ["scenario.loop_lag_p99_ms"]
+
+    def test_errors_are_reported(self):
+        found = compare_to_baseline(result(errors=3), baseline(), 0.25)
+        assert [line.split(":")[0] for line in found] == ["scenario.errors"]
+
+    def test_slower_environment_scales_time_metrics(self):
+        slower = result(p99_ms=55.0, throughput=550.0, calibration_ms=20.0)
+        assert calibration_scale(slower, baseline()) == pytest.approx(2.0)
+        assert compare_to_baseline(slower, baseline(), 0.25) == []
+        # 回数の指標は環境の速さで補正しない
+        found = compare_to_baseline(result(upstream_calls_per_command=0.02, calibration_ms=20.0), baseline(), 0.25)
+        assert [line.split(":")[0] for line in found] == ["scenario.upstream_calls_per_command"]
+
+    def test_faster_environment_does_not_tighten(self):
+        faster = result(calibration_ms=5.0)
+        assert calibration_scale(faster, baseline()) == 1.0
+        assert compare_to_baseline(faster, baseline(), 0.25) == []
+
+    def test_missing_calibration_is_not_scaled(self):
+        old = baseline()
+        del old["calibration_ms"]
+        assert calibration_scale(result(calibration_ms=20.0), old) == 1.0
+
+
+class TestMedianOf:
+    def test_takes_median_per_metric_and_minimum_calibration(self):
+        merged = BenchmarkResult.median_of([
+            result(p99_ms=30.0, calibration_ms=12.0),
+            result(p99_ms=90.0, calibration_ms=10.0),
+            result(p99_ms=40.0, calibration_ms=11.0),
+        ])
+        assert merged.p99_ms == 40.0
+        assert merged.calibration_ms == 10.0
+        assert merged.params["repeat"] == 3
+
+
+class TestRunner:
+    @pytest.mark.asyncio
+    async def test_unknown_scenario_is_rejected(self, capsys):
+        with pytest.raises(SystemExit) as exc:
+            await run.main(["no_such_scenario"])
+        assert exc.value.code == 2
+        assert "no_such_scenario" in capsys.readouterr().err
+
+    @pytest.mark.asyncio
+    async def test_scenario_against_baseline(self, monkeypatch, capsys):
+        saved = {}
+        monkeypatch.setitem(run.SCENARIOS, "smoke", lambda: bench_outbound_priority(
+            channels=2, broadcasts_per_channel=1, send_latency=0.0))
+        monkeypatch.setattr(run, "load_baseline", lambda name: saved.get(name))
+
+        assert await run.main(["smoke", "--repeat", "1"]) == 0
+        assert "ベースラインなし" in capsys.readouterr().out
+        saved["smoke"] = baseline(name="smoke", p50_ms=1e-6, p95_ms=1e-6, p99_ms=1e-6, throughput=1e9)
+        assert await run.main(["smoke", "--repeat", "1"]) == 1
+        assert "回帰" in capsys.readouterr().out
@@ -0,0 +1,136 @@
+"""POST /interactions (署名の検証とスラッシュコマンドの応答) のテスト
+
+署名鍵はテストごとにローカルで生成し、Discord の公開鍵の代わりに使う。
+"""
+import asyncio
+import json
+import time
+from datetime import date
+from typing import Any, Dict, Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from nacl.signing import SigningKey
+
+from src.bot.api_client import GameInfo, LeagueSchedule
+from src.bot.cache import ScheduleCache
+from src.bot.teams import DEFAULT_TEAM_ID
+from src.interactions import (
+    INTERACTION_APPLICATION_COMMAND, INTERACTION_PING, MAX_TIMESTAMP_SKEW,
+    RESPONSE_CHANNEL_MESSAGE, RESPONSE_DEFERRED_CHANNEL_MESSAGE, RESPONSE_PONG,
+    InteractionService, router,
+)
+
+# deferred に切り替えるまでの時間 (上流の応答はテストが release を set するまで返らない)
+DEFER_AFTER = 0.1
+
+
+def _schedule(day: date) -> LeagueSchedule:
+    game = GameInfo(
+        date=day.isoformat(), status="Scheduled",
+        home_team="Los Angeles Dodgers", away_team="San Francisco Giants",
+        venue="Dodger Stadium", game_time_utc=f"{day.isoformat()}T02:10:00Z",
+        game_pk=1, home_team_id=DEFAULT_TEAM_ID, away_team_id=137,
+    )
+    return LeagueSchedule(date=day.isoformat(), games=[game])
+
+
+@pytest.fixture
+def signing_key() -> SigningKey:
+    return SigningKey.generate()
+
+
+@pytest.fixture
+def client(signing_key: SigningKey):
+    upstream_calls = []
+    release = asyncio.Event()
+
+    async def fetch(day: date) -> LeagueSchedule:
+        upstream_calls.append(day)
+        await release.wait()
+        return _schedule(day)
+
+    cache = ScheduleCache(fetch)
+    app = FastAPI()
+    app.include_router(router)
+    # deferred 応答の編集先は接続できないアドレスにする (編集の失敗はログに残るだけ)
+    service = InteractionService(
+        signing_key.verify_key.encode().hex(), cache.get_team_games,
+        defer_after=DEFER_AFTER, api_base="http://127.0.0.1:1",
+    )
+    app.state.interactions = service
+    with TestClient(app) as test_client:
+        test_client.upstream_calls = upstream_calls
+        test_client.cache = cache
+        # 上流の応答を返させる (イベントループのスレッドで set する)
+        test_client.release_upstream = lambda: test_client.portal.call(release.set)
+        yield test_client
+        test_client.portal.call(service.close)
+
+
+def post_signed(client: TestClient, key: Optional[SigningKey], payload: Dict[str, Any],
+                timestamp: Optional[str] = None, signature: Optional[str] = None):
+    body = json.dumps(payload).encode()
+    timestamp = timestamp or str(int(time.time()))
+    headers = {"X-Signature-Timestamp": timestamp}
+    if signature is None and key is not None:
+        signature = key.sign(timestamp.encode() + body).signature.hex()
+    if signature is not None:
+        headers["X-Signature-Ed25519"] = signature
+    return client.post("/interactions", content=body, headers=headers)
+
+
+def dodgers_payload() -> Dict[str, Any]:
+    return {
+        "id": "1", "type": INTERACTION_APPLICATION_COMMAND, "application_id": "42", "token": "token",
+        "data": {"name": "dodgers", "options": []},
+    }
+
+
+def test_ping_returns_pong(client, signing_key):
+    response = post_signed(client, signing_key, {"type": INTERACTION_PING})
+    assert response.status_code == 200
+    assert response.json() == {"type": RESPONSE_PONG}
+
+
+def test_missing_signature_is_rejected(client):
+    response = post_signed(client, None, {"type": INTERACTION_PING})
+    assert response.status_code == 401
+
+
+def test_signature_from_another_key_is_rejected(client):
+    response = post_signed(client, SigningKey.generate(), {"type": INTERACTION_PING})
+    assert response.status_code == 401
+
+
+def test_tampered_body_is_rejected(client, signing_key):
+    timestamp = str(int(time.time()))
+    signature = signing_key.sign(timestamp.encode() + b'{"type": 2}').signature.hex()
+    response = post_signed(client, None, {"type": INTERACTION_PING}, timestamp=timestamp, signature=signature)
+    assert response.status_code == 401
+
+
+def test_stale_timestamp_is_rejected(client, signing_key):
+    stale = str(int(time.time()) - MAX_TIMESTAMP_SKEW - 60)
+    response = post_signed(client, signing_key, {"type": INTERACTION_PING}, timestamp=stale)
+    assert response.status_code == 401
+
+
+def test_dodgers_is_deferred_on_miss_and_immediate_on_hit(client, signing_key):
+    # キャッシュが空で上流の応答が返らないので、DEFER_AFTER 後に deferred になる
+    response = post_signed(client, signing_key, dodgers_payload())
+    assert response.status_code == 200
+    assert response.json() == {"type": RESPONSE_DEFERRED_CHANNEL_MESSAGE}
+
+    # 上流の応答がキャッシュに入った後は、同じ日の問い合わせに (上流へ問い合わせずに) すぐ答える
+    client.release_upstream()
+    deadline = time.monotonic() + 5.0
+    while client.portal.call(client.cache.snapshot)["entries"] == 0:
+        assert time.monotonic() < deadline, "上流の応答がキャッシュに入りませんでした"
+        time.sleep(0.01)
+    response = post_signed(client, signing_key, dodgers_payload())
+    body = response.json()
+    assert body["type"] == RESPONSE_CHANNEL_MESSAGE
+    assert "Los Angeles Dodgers" in body["data"]["content"]
+    assert len(client.upstream_calls) == 1
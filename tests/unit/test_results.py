@@ -0,0 +1,124 @@
+"""ResultsStore (終了した試合の列指向ストア) のテスト"""
+from typing import Optional
+
+import pytest
+
+from src.bot.api_client import GameInfo
+from src.bot.results import ResultsStore, _TeamColumns
+
+LAD, SF = 119, 137
+
+
+def assert_consistent(columns: _TeamColumns) -> None:
+    """行が並び順のキー順に並び、gamePk → 行番号の対応表が列と一致していること"""
+    assert list(columns.order) == sorted(columns.order)
+    assert columns.rows == {pk: row for row, pk in enumerate(columns.game_pk)}
+    lengths = {len(column) for column in (
+        columns.order, columns.game_pk, columns.is_home, columns.won, columns.lost,
+        columns.runs_for, columns.runs_against,
+    )}
+    assert lengths == {len(columns.rows)}
+
+
+def game(game_pk: int, day: str, home_score: int, away_score: int, *,
+         game_type: Optional[str] = "R", status: str = "Final", game_number: int = 1) -> GameInfo:
+    return GameInfo(
+        date=day, status=status, home_team="Los Angeles Dodgers", away_team="San Francisco Giants",
+        venue="Dodger Stadium", game_time_utc=f"{day}T02:10:00Z",
+        home_score=str(home_score), away_score=str(away_score), game_pk=game_pk, game_number=game_number,
+        home_team_id=LAD, away_team_id=SF, game_type=game_type,
+    )
+
+
+class TestTeamColumnsPut:
+    def test_appends_in_order(self):
+        columns = _TeamColumns()
+        assert columns.put(10, 1, 1, 1, 0, 5, 3)
+        assert columns.put(20, 2, 0, 0, 1, 1, 2)
+        assert list(columns.game_pk) == [1, 2]
+        assert_consistent(columns)
+
+    def test_out_of_order_insert_reindexes_later_rows(self):
+        columns = _TeamColumns()
+        columns.put(30, 3, 1, 1, 0, 4, 1)
+        columns.put(10, 1, 1, 0, 1, 2, 6)
+        columns.put(20, 2, 0, 1, 0, 7, 0)
+        assert list(columns.order) == [10, 20, 30]
+        assert list(columns.game_pk) == [1, 2, 3]
+        assert list(columns.runs_for) == [2, 7, 4]
+        assert list(columns.won) == [0, 1, 1]
+        assert_consistent(columns)
+
+    def test_same_values_are_not_rewritten(self):
+        columns = _TeamColumns()
+        columns.put(10, 1, 1, 1, 0, 5, 3)
+        assert not columns.put(10, 1, 1, 1, 0, 5, 3)
+        assert len(columns) == 1
+
+    def test_score_correction_rewrites_row_in_place(self):
+        columns = _TeamColumns()
+        columns.put(10, 1, 1, 1, 0, 5, 3)
+        columns.put(20, 2, 1, 1, 0, 2, 1)
+        assert columns.put(10, 1, 1, 0, 1, 3, 5)
+        assert list(columns.game_pk) == [1, 2]
+        assert (columns.won[0], columns.lost[0], columns.runs_for[0], columns.runs_against[0]) == (0, 1, 3, 5)
+        assert_consistent(columns)
+
+    def test_rescheduled_game_moves_to_new_date(self):
+        columns = _TeamColumns()
+        columns.put(10, 1, 1, 1, 0, 5, 3)
+        columns.put(20, 2, 0, 0, 1, 1, 2)
+        columns.put(30, 3, 1, 1, 0, 4, 1)
+        # gamePk 1 が後日に再開・完了した (並び順のキーが変わる)
+        assert columns.put(25, 1, 1, 0, 1, 2, 3)
+        assert list(columns.order) == [20, 25, 30]
+        assert list(columns.game_pk) == [2, 1, 3]
+        assert list(columns.runs_for) == [1, 2, 4]
+        assert_consistent(columns)
+
+    def test_rescheduled_game_moves_to_end(self):
+        columns = _TeamColumns()
+        columns.put(10, 1, 1, 1, 0, 5, 3)
+        columns.put(20, 2, 0, 0, 1, 1, 2)
+        assert columns.put(40, 1, 1, 1, 0, 5, 3)
+        assert list(columns.game_pk) == [2, 1]
+        assert_consistent(columns)
+
+
+class TestResultsStore:
+    @pytest.mark.parametrize("game_type", ["S", "E", "A", "F", "D", "L", "W", None])
+    def test_only_regular_season_games_are_counted(self, game_type):
+        store = ResultsStore()
+        assert not store.add(game(1, "2024-10-05", 5, 3, game_type=game_type))
+        assert len(store) == 0
+        assert store.summary(LAD).games == 0
+
+    def test_regular_season_summary(self):
+        store = ResultsStore()
+        store.add_games([
+            game(1, "2024-04-01", 5, 3),
+            game(2, "2024-03-15", 9, 0, game_type="S"),
+            game(3, "2024-04-02", 1, 4),
+            game(4, "2024-04-03", 2, 2, status="Postponed"),
+            game(5, "2024-10-05", 6, 1, game_type="D"),
+        ])
+        summary = store.summary(LAD)
+        assert (summary.games, summary.wins, summary.losses) == (2, 1, 1)
+        assert (summary.runs_scored, summary.runs_allowed) == (6, 7)
+        assert summary.streak == "L1"
+        assert store.summary(SF).home_losses == 0 and store.summary(SF).away_wins == 1
+
+    def test_late_results_keep_date_order(self):
+        store = ResultsStore()
+        store.add(game(3, "2024-04-03", 1, 0))
+        store.add(game(1, "2024-04-01", 0, 1))
+        store.add(game(2, "2024-04-02", 2, 0))
+        summary = store.summary(LAD)
+        assert summary.recent == "LWW"
+        assert summary.streak == "W2"
+
+    def test_doubleheader_orders_by_game_number(self):
+        store = ResultsStore()
+        store.add(game(2, "2024-04-01", 3, 0, game_number=2))
+        store.add(game(1, "2024-04-01", 0, 3, game_number=1))
+        assert store.summary(LAD).recent == "LW"
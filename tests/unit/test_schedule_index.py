@@ -0,0 +1,47 @@
+"""日程キャッシュの取得結果を成績の集計に加える処理 (ScheduleIndex.add_results) のテスト"""
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from src.bot.api_client import LeagueSchedule
+from src.bot.core import DodgersBot
+from src.bot.schedule_index import ScheduleIndex
+
+from .test_results import LAD, game
+
+
+class FakeMLBClient:
+    def __init__(self, schedule: LeagueSchedule):
+        self.schedule = schedule
+
+    async def fetch_league_schedule(self, game_date=None) -> LeagueSchedule:
+        return self.schedule
+
+
+def test_only_games_of_index_season_are_added():
+    index = ScheduleIndex()
+    index.season = 2024
+    assert index.add_results([game(1, "2024-04-01", 5, 3), game(2, "2023-04-01", 9, 0)]) == 1
+    assert len(index.results) == 1
+    assert index.results.summary(LAD).runs_scored == 5
+
+
+def test_nothing_is_added_before_season_is_known():
+    index = ScheduleIndex()
+    assert index.add_results([game(1, "2024-04-01", 5, 3)]) == 0
+    assert len(index.results) == 0
+
+
+@pytest.mark.asyncio
+async def test_past_season_lookup_does_not_change_standings():
+    index = ScheduleIndex()
+    index.season = 2024
+    index.merge([game(1, "2024-04-01", 5, 3)])
+    # 過去の日付の問い合わせ (`!dodgers 2023-04-01`) で取得した前シーズンの試合
+    past = LeagueSchedule(date="2023-04-01", games=[game(2, "2023-04-01", 0, 9)])
+    bot = SimpleNamespace(mlb_client=FakeMLBClient(past), schedule_index=index)
+
+    assert await DodgersBot._fetch_league_schedule(bot, date(2023, 4, 1)) is past
+    summary = index.results.summary(LAD)
+    assert (summary.games, summary.wins, summary.losses) == (1, 1, 0)
@@ -0,0 +1,284 @@
+"""Scheduler (定期ジョブの実行) と RequestBudget (外部リクエストの予算) のテスト
+
+時刻は FakeClock、ゆらぎは rng を差し替えて決定的にする。
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.bot.api_client import MLBClient
+from src.bot.cogs.live_updates import POLL_COSTS, POLL_JOB, PHASE_IDLE, PHASE_LIVE, LiveUpdatesCog
+from src.bot.scheduler import RequestBudget, Scheduler
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def no_rng(low: float, high: float) -> float:
+    raise AssertionError("jitter が0のときは rng を呼ばない")
+
+
+async def noop() -> None:
+    pass
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "条件が満たされませんでした"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest_asyncio.fixture
+async def scheduler(clock):
+    scheduler = Scheduler(request_budget=60.0, budget_burst=2, clock=clock, rng=no_rng)
+    yield scheduler
+    await scheduler.close()
+
+
+@pytest_asyncio.fixture
+async def upstream():
+    """リクエストを受けるたびに空のJSONを返すローカルサーバー"""
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    client = MLBClient(max_retries=0)
+    yield client, str(server.make_url("/"))
+    await client.close()
+    await server.close()
+
+
+class TestRequestBudget:
+    def test_denies_and_returns_wait_until_refill(self, clock):
+        budget = RequestBudget(per_minute=60.0, burst=2, clock=clock)
+        assert budget.try_acquire(1) == 0.0
+        assert budget.try_acquire(1) == 0.0
+        assert budget.try_acquire(1) == pytest.approx(1.0)
+        clock.advance(0.5)
+        assert budget.try_acquire(1) == pytest.approx(0.5)
+        clock.advance(0.5)
+        assert budget.try_acquire(1) == 0.0
+        assert (budget.used, budget.denied) == (3, 2)
+
+    def test_refill_is_capped_at_burst(self, clock):
+        budget = RequestBudget(per_minute=60.0, burst=2, clock=clock)
+        budget.try_acquire(2)
+        clock.advance(3600)
+        assert budget.snapshot()["available"] == 2.0
+
+    def test_zero_rate_never_refills(self, clock):
+        budget = RequestBudget(per_minute=0.0, burst=1, clock=clock)
+        assert budget.try_acquire(1) == 0.0
+        clock.advance(3600)
+        assert budget.try_acquire(1) == float("inf")
+
+    def test_settle_charges_extra_requests_and_refunds_unused(self, clock):
+        budget = RequestBudget(per_minute=60.0, burst=5, clock=clock)
+        budget.try_acquire(1)
+        budget.settle(1, 4)
+        assert budget.snapshot()["available"] == 1.0
+        assert budget.used == 4
+        # 見積もりを超えた分で残りが負になれば、戻るまで待たされる
+        budget.settle(0, 3)
+        assert budget.try_acquire(1) == pytest.approx(3.0)
+        assert budget.used == 7
+
+
+class TestDispatch:
+    @pytest.mark.asyncio
+    async def test_budget_shortfall_skips_and_retries_when_refilled(self, scheduler, clock):
+        scheduler.budget.try_acquire(2)
+        job = scheduler.add_job("poll", noop, interval=60.0, jitter=0.0, cost=1)
+        scheduler._dispatch(job, clock())
+        assert not job.running
+        assert job.stats.skips == {"budget": 1}
+        assert job.next_run == pytest.approx(clock() + 1.0)
+
+    @pytest.mark.asyncio
+    async def test_budget_retry_is_not_later_than_interval(self, scheduler, clock):
+        scheduler.budget.try_acquire(2)
+        job = scheduler.add_job("poll", noop, interval=0.5, jitter=0.0, cost=2)
+        scheduler._dispatch(job, clock())
+        assert job.next_run == pytest.approx(clock() + 0.5)
+
+    @pytest.mark.asyncio
+    async def test_job_without_cost_ignores_budget(self, scheduler, clock):
+        scheduler.budget.try_acquire(2)
+        job = scheduler.add_job("keep_alive", noop, interval=60.0, jitter=0.0)
+        scheduler._dispatch(job, clock())
+        task = job.task
+        assert job.running and task is not None
+        await task
+        assert job.stats.runs == 1 and job.stats.skips == {}
+        assert job.next_run == clock() + 60.0
+
+
+class TestNextDelay:
+    def test_jitter_bounds(self, clock):
+        upper = Scheduler(clock=clock, rng=lambda low, high: high)
+        lower = Scheduler(clock=clock, rng=lambda low, high: low)
+        job = upper.add_job("poll", noop, interval=100.0, jitter=0.1)
+        assert upper._next_delay(job) == pytest.approx(110.0)
+        assert lower._next_delay(job) == pytest.approx(90.0)
+
+    def test_no_jitter_uses_interval(self, scheduler):
+        job = scheduler.add_job("poll", noop, interval=100.0, jitter=0.0)
+        assert scheduler._next_delay(job) == 100.0
+
+    def test_delay_is_not_negative(self, clock):
+        scheduler = Scheduler(clock=clock, rng=lambda low, high: low)
+        job = scheduler.add_job("poll", noop, interval=100.0, jitter=2.0)
+        assert scheduler._next_delay(job) == 0.0
+
+
+class TestExecute:
+    @pytest.mark.asyncio
+    async def test_deadline_cancels_and_counts_timeout(self, scheduler, clock):
+        async def slow() -> None:
+            await asyncio.sleep(10)
+
+        job = scheduler.add_job("slow", slow, interval=60.0, jitter=0.0, deadline=0.01)
+        await scheduler._execute(job, 0)
+        assert (job.stats.runs, job.stats.timeouts, job.stats.errors) == (1, 1, 0)
+        assert job.stats.last_outcome == "timeout"
+        assert not job.running
+        assert job.next_run == clock() + 60.0
+
+    @pytest.mark.asyncio
+    async def test_error_is_recorded_and_job_is_rescheduled(self, scheduler, clock):
+        async def broken() -> None:
+            raise RuntimeError("boom")
+
+        job = scheduler.add_job("broken", broken, interval=60.0, jitter=0.0)
+        await scheduler._execute(job, 0)
+        assert (job.stats.runs, job.stats.errors) == (1, 1)
+        assert job.stats.last_outcome == "error"
+        assert job.next_run == clock() + 60.0
+
+    @pytest.mark.asyncio
+    async def test_actual_requests_are_charged(self, clock, upstream):
+        client, url = upstream
+        scheduler = Scheduler(request_budget=0.0, budget_burst=5, clock=clock, rng=no_rng)
+
+        async def poll() -> None:
+            await client.get_bytes(url)
+            # ジョブの中で作られたタスク (日程キャッシュの取得など) の送信も数える
+            await asyncio.gather(*(asyncio.create_task(client.get_bytes(url)) for _ in range(2)))
+
+        job = scheduler.add_job("poll", poll, interval=60.0, jitter=0.0, cost=1)
+        scheduler._dispatch(job, clock())
+        await job.task
+        assert (job.stats.requests, job.stats.last_requests) == (3, 3)
+        assert scheduler.budget.snapshot()["available"] == 2.0
+        assert scheduler.budget.used == 3
+
+    @pytest.mark.asyncio
+    async def test_unused_estimate_is_refunded(self, scheduler, clock):
+        job = scheduler.add_job("poll", noop, interval=60.0, jitter=0.0, cost=2)
+        scheduler._dispatch(job, clock())
+        await job.task
+        assert job.stats.last_requests == 0
+        assert scheduler.budget.snapshot()["available"] == 2.0
+        assert scheduler.budget.used == 0
+
+
+class TestSetInterval:
+    def test_shortens_but_never_delays_next_run(self, scheduler, clock):
+        job = scheduler.add_job("poll", noop, interval=1800.0, initial_delay=1800.0)
+        scheduler.set_interval("poll", 10.0)
+        assert job.next_run == clock() + 10.0
+        scheduler.set_interval("poll", 600.0)
+        assert job.interval == 600.0
+        assert job.next_run == clock() + 10.0
+
+    def test_running_job_keeps_next_run(self, scheduler, clock):
+        job = scheduler.add_job("poll", noop, interval=1800.0, initial_delay=1800.0)
+        job.running = True
+        scheduler.set_interval("poll", 10.0)
+        assert job.interval == 10.0
+        assert job.next_run == clock() + 1800.0
+
+    def test_unknown_job_is_ignored(self, scheduler):
+        scheduler.set_interval("missing", 10.0)
+        assert len(scheduler) == 0
+
+
+class TestRequiresReady:
+    @pytest.mark.asyncio
+    async def test_waits_for_ready_unless_not_required(self, clock):
+        ready = False
+        runs: List[str] = []
+
+        def job(name: str):
+            async def func() -> None:
+                runs.append(name)
+            return func
+
+        scheduler = Scheduler(is_ready=lambda: ready, clock=clock, rng=no_rng)
+        scheduler.add_job("refresh", job("refresh"), interval=60.0, jitter=0.0)
+        scheduler.add_job("keep_alive", job("keep_alive"), interval=60.0, jitter=0.0, requires_ready=False)
+        scheduler.start()
+        try:
+            await wait_for(lambda: runs == ["keep_alive"])
+            await asyncio.sleep(0.05)
+            assert runs == ["keep_alive"]
+
+            ready = True
+            scheduler.wake()
+            await wait_for(lambda: runs == ["keep_alive", "refresh"])
+        finally:
+            await scheduler.close()
+
+
+class TestLivePollCost:
+    @pytest.fixture
+    def cog(self, scheduler):
+        bot = SimpleNamespace(scheduler=scheduler, outbound=None)
+        cog = LiveUpdatesCog(bot)
+        scheduler.add_job(POLL_JOB, cog.poll_live_game, interval=60.0, cost=cog._poll_cost())
+        return cog
+
+    @staticmethod
+    def ctx(channel_id: int):
+        async def send(content: str) -> None:
+            pass
+        return SimpleNamespace(channel=SimpleNamespace(id=channel_id), send=send)
+
+    @pytest.mark.asyncio
+    async def test_cost_follows_subscribers_and_phase(self, cog, scheduler):
+        job = scheduler.get(POLL_JOB)
+        assert job.cost == 0
+
+        # 購読した直後 (フェーズはまだ idle) の最初のポーリングから予算を使う
+        await LiveUpdatesCog.subscribe.callback(cog, self.ctx(1))
+        assert cog.phase == PHASE_IDLE
+        assert job.cost == POLL_COSTS[PHASE_IDLE] > 0
+
+        # 試合中はライブフィードの取得分も見積もる
+        cog._set_phase(PHASE_LIVE)
+        assert job.cost == POLL_COSTS[PHASE_LIVE] > POLL_COSTS[PHASE_IDLE]
+
+        await LiveUpdatesCog.unsubscribe.callback(cog, self.ctx(1))
+        assert job.cost == 0
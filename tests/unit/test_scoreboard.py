@@ -0,0 +1,116 @@
+"""ScoreboardManager (スコアボードの送信・編集) のテスト"""
+import asyncio
+from types import SimpleNamespace
+from typing import List, Optional
+
+import discord
+import pytest
+import pytest_asyncio
+
+from src.bot.api_client import GameInfo
+from src.bot.outbound import OutboundDispatcher
+from src.bot.scoreboard import ScoreboardManager
+
+EDIT_INTERVAL = 0.01
+
+
+def game(status: str, home_score: int, away_score: int) -> GameInfo:
+    return GameInfo(
+        date="2024-07-01", status=status, home_team="Los Angeles Dodgers", away_team="San Francisco Giants",
+        venue="Dodger Stadium", game_time_utc="2024-07-01T02:10:00Z",
+        home_score=str(home_score), away_score=str(away_score), game_pk=745000,
+    )
+
+
+def http_error(status: int) -> discord.HTTPException:
+    return discord.HTTPException(SimpleNamespace(status=status, reason="error"), "error")
+
+
+class FakeMessage:
+    """edit を記録し、指定した回数だけ先に例外を投げるメッセージ"""
+
+    jump_url = "https://discord.com/channels/1/1/1"
+
+    def __init__(self, failures: Optional[List[Exception]] = None):
+        self.failures = list(failures or [])
+        self.attempts = 0
+        self.embeds: List[discord.Embed] = []
+
+    async def edit(self, *, embed: discord.Embed) -> "FakeMessage":
+        self.attempts += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        self.embeds.append(embed)
+        return self
+
+
+class FakeChannel:
+    id = 1
+
+    def __init__(self, message: FakeMessage):
+        self.message = message
+
+    async def send(self, *, embed: discord.Embed) -> FakeMessage:
+        return self.message
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "条件が満たされませんでした"
+        await asyncio.sleep(EDIT_INTERVAL)
+
+
+@pytest_asyncio.fixture
+async def outbound():
+    dispatcher = OutboundDispatcher()
+    yield dispatcher
+    await dispatcher.close()
+
+
+def status_of(embed: discord.Embed) -> str:
+    return next(field.value for field in embed.fields if field.name == "状態")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [429, 500, 503])
+async def test_final_score_is_retried_after_transient_error(outbound, status):
+    message = FakeMessage(failures=[http_error(status)])
+    manager = ScoreboardManager(outbound, min_edit_interval=EDIT_INTERVAL)
+    await manager.post(FakeChannel(message), 1, game("In Progress", 1, 0))
+
+    # 最終スコアの編集が一度失敗しても、以降の更新を待たずに送り直される
+    manager.update_all(game("Final", 3, 2))
+    await wait_for(lambda: message.embeds)
+    assert message.attempts == 2
+    assert status_of(message.embeds[-1]).startswith("Final")
+    manager.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_does_not_overwrite_newer_update(outbound):
+    message = FakeMessage(failures=[http_error(503)])
+    manager = ScoreboardManager(outbound, min_edit_interval=EDIT_INTERVAL)
+    await manager.post(FakeChannel(message), 1, game("In Progress", 1, 0))
+
+    manager.update_all(game("In Progress", 2, 0))
+    await wait_for(lambda: message.attempts == 1)
+    # 失敗した編集の再試行より新しい状態が優先される
+    manager.update_all(game("Final", 3, 2))
+    await wait_for(lambda: message.embeds)
+    await asyncio.sleep(EDIT_INTERVAL * 10)
+    assert [status_of(embed).split()[0] for embed in message.embeds] == ["Final"]
+    manager.close()
+
+
+@pytest.mark.asyncio
+async def test_client_error_is_not_retried(outbound):
+    message = FakeMessage(failures=[http_error(400)])
+    manager = ScoreboardManager(outbound, min_edit_interval=EDIT_INTERVAL)
+    await manager.post(FakeChannel(message), 1, game("In Progress", 1, 0))
+
+    manager.update_all(game("Final", 3, 2))
+    await wait_for(lambda: message.attempts == 1)
+    await asyncio.sleep(EDIT_INTERVAL * 10)
+    assert message.attempts == 1 and not message.embeds
+    manager.close()